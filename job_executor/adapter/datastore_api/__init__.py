@@ -1,5 +1,12 @@
+import functools
 import logging
+import os
+import threading
+import time
+import weakref
+from collections.abc import Callable
 from pathlib import Path
+from typing import ParamSpec, TypeVar
 from urllib.error import HTTPError
 
 import requests
@@ -15,14 +22,142 @@ from job_executor.adapter.datastore_api.models import (
     Operation,
 )
 from job_executor.common.exceptions import HttpRequestError, HttpResponseError
+from job_executor.common.metrics import (
+    DATASTORE_API_CONNECTIONS_OPENED,
+    DATASTORE_API_ERRORS,
+    DATASTORE_API_REQUEST_DURATION,
+    DATASTORE_API_REQUESTS,
+)
 from job_executor.config import environment, secrets
 
 DATASTORE_API_URL = environment.datastore_api_url
 DEFAULT_REQUESTS_TIMEOUT = (10, 60)  # (read timeout, connect timeout)
+POOL_SIZE = environment.datastore_api_pool_size
+MAX_RETRIES = environment.datastore_api_max_retries
+BACKOFF_FACTOR = environment.datastore_api_backoff_factor
 DATASTORE_API_SERVICE_KEY = secrets.datastore_api_service_key
+MAINTENANCE_STATUS_TTL = 10.0  # seconds to reuse a maintenance status
+MANAGER_OPERATIONS = [
+    Operation.SET_STATUS,
+    Operation.BUMP,
+    Operation.DELETE_DRAFT,
+    Operation.REMOVE,
+    Operation.ROLLBACK_REMOVE,
+    Operation.DELETE_ARCHIVE,
+    Operation.GENERATE_RSA_KEYS,
+]
+WORKER_OPERATIONS = [
+    Operation.PATCH_METADATA,
+    Operation.ADD,
+    Operation.CHANGE,
+]
 
 logger = logging.getLogger()
 
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def _observed(
+    endpoint: str,
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Records the duration of every call to the decorated function, and
+    counts the calls that raise, under the given endpoint label.
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            try:
+                with DATASTORE_API_REQUEST_DURATION.time(endpoint=endpoint):
+                    return func(*args, **kwargs)
+            except Exception:
+                DATASTORE_API_ERRORS.inc(endpoint=endpoint)
+                raise
+
+        return wrapper
+
+    return decorator
+
+
+# The pooled sessions of each thread, as requests.Session is not
+# documented to be thread safe
+_thread_sessions = threading.local()
+# The number of opened connections already counted, per connection pool
+_counted_connections: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_counted_connections_lock = threading.Lock()
+
+
+def _create_session(retry: bool) -> requests.Session:
+    session = requests.Session()
+    retries = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        # [0.0s, 1.0s, 2.0s, 4.0s, 8.0s, 16.0s] between retries by default
+        allowed_methods={"GET"},
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=POOL_SIZE,
+        max_retries=retries if retry else 0,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_sessions() -> dict[bool, requests.Session]:
+    if not hasattr(_thread_sessions, "sessions"):
+        _thread_sessions.sessions = {}
+    return _thread_sessions.sessions
+
+
+def _get_session(retry: bool) -> requests.Session:
+    """
+    Returns the pooled session of this thread for retried or
+    non-retried requests, creating it on first use.
+    """
+    sessions = _get_sessions()
+    if retry not in sessions:
+        sessions[retry] = _create_session(retry)
+    return sessions[retry]
+
+
+def _reset_sessions() -> None:
+    """
+    Forgets the sessions inherited from the parent process, so that a
+    forked worker never shares pooled connections with its parent.
+    """
+    global _thread_sessions, _counted_connections_lock
+    _thread_sessions = threading.local()
+    _counted_connections.clear()
+    _counted_connections_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_sessions)
+
+
+def _count_opened_connections() -> None:
+    """
+    Adds the connections opened since the last call to the metrics, so
+    that the share of requests that reused a connection can be derived.
+    """
+    new_connections = 0
+    with _counted_connections_lock:
+        for session in _get_sessions().values():
+            # The same adapter is mounted for both http and https
+            adapter = session.adapters["http://"]
+            assert isinstance(adapter, HTTPAdapter)
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                counted = _counted_connections.get(pool, 0)
+                new_connections += pool.num_connections - counted
+                _counted_connections[pool] = pool.num_connections
+    if new_connections > 0:
+        DATASTORE_API_CONNECTIONS_OPENED.inc(new_connections)
+
 
 def execute_request(
     method: str,
@@ -30,31 +165,28 @@ def execute_request(
     retry: bool = False,
     **kwargs,  # noqa
 ) -> Response:
+    """
+    Sends a request over the pooled session of this process. GET requests
+    are retried with exponential backoff if retry is True.
+    """
     try:
-        if retry:
-            with requests.Session() as s:
-                retries = Retry(
-                    total=6,
-                    backoff_factor=0.5,
-                    # [0.0s, 1.0s, 2.0s, 4.0s, 8.0s, 16.0s] between retries
-                    allowed_methods={"GET"},
-                )
-                s.mount("http://", HTTPAdapter(max_retries=retries))
-                response = s.request(method=method, url=url, **kwargs)
-        else:
-            response = requests.request(
-                method=method,
-                url=url,
-                timeout=DEFAULT_REQUESTS_TIMEOUT,
-                **kwargs,
-            )
+        response = _get_session(retry).request(
+            method=method,
+            url=url,
+            timeout=DEFAULT_REQUESTS_TIMEOUT,
+            **kwargs,
+        )
         if response.status_code != 200:
             raise HttpResponseError(f"{response.status_code}: {response.text}")
         return response
     except (RequestException, HTTPError) as e:
         raise HttpRequestError(e) from e
+    finally:
+        DATASTORE_API_REQUESTS.inc()
+        _count_opened_connections()
 
 
+@_observed("get_jobs")
 def get_jobs(
     job_status: JobStatus | None = None,
     operations: list[Operation] | None = None,
@@ -83,6 +215,7 @@ def get_jobs(
     return [Job.model_validate(job) for job in response.json()]
 
 
+@_observed("update_job")
 def update_job_status(
     job_id: str, new_status: JobStatus, log: str | None = None
 ) -> None:
@@ -100,6 +233,7 @@ def update_job_status(
     )
 
 
+@_observed("update_job")
 def update_description(job_id: str, new_description: str) -> None:
     execute_request(
         "PUT",
@@ -112,6 +246,7 @@ def update_description(job_id: str, new_description: str) -> None:
     )
 
 
+@_observed("get_maintenance_status")
 def get_maintenance_status() -> MaintenanceStatus:
     request_url = f"{DATASTORE_API_URL}/maintenance-statuses/latest"
     response = execute_request("GET", request_url, True)
@@ -124,12 +259,14 @@ def is_system_paused() -> bool:
     return maintenance_status.paused
 
 
+@_observed("get_datastores")
 def get_datastores() -> list[str]:
     """Get a list of all datastore rdns on this tenant"""
     request_url = f"{DATASTORE_API_URL}/datastores/rdns"
     return execute_request("GET", request_url, True).json()
 
 
+@_observed("get_datastore_directory")
 def get_datastore_directory(rdn: str) -> Path:
     request_url = f"{DATASTORE_API_URL}/datastores/{rdn}/directory"
     response = execute_request(
@@ -144,6 +281,7 @@ def get_datastore_directory(rdn: str) -> Path:
     return Path(directory)
 
 
+@_observed("post_public_key")
 def post_public_key(datastore_rdn: str, public_key_pem: bytes) -> None:
     """
     Post the public RSA key to the datastore-api.
@@ -163,48 +301,66 @@ def post_public_key(datastore_rdn: str, public_key_pem: bytes) -> None:
     )
 
 
+_system_paused: tuple[float, bool] | None = None  # (checked at, paused)
+
+
+def _is_system_paused_cached() -> bool:
+    """
+    Returns is_system_paused(), reusing the last answer for up to
+    MAINTENANCE_STATUS_TTL seconds.
+    """
+    global _system_paused
+    now = time.monotonic()
+    if (
+        _system_paused is not None
+        and now - _system_paused[0] < MAINTENANCE_STATUS_TTL
+    ):
+        return _system_paused[1]
+    paused = is_system_paused()
+    _system_paused = (now, paused)
+    return paused
+
+
+def _partition_jobs(jobs: list[Job], system_paused: bool) -> JobQueryResult:
+    built_jobs = [job for job in jobs if job.status == JobStatus.BUILT]
+    if system_paused:
+        return JobQueryResult(built_jobs=built_jobs)
+    queued_jobs = [job for job in jobs if job.status == JobStatus.QUEUED]
+    return JobQueryResult(
+        built_jobs=built_jobs,
+        queued_manager_jobs=[
+            job
+            for job in queued_jobs
+            if job.parameters.operation in MANAGER_OPERATIONS
+        ],
+        queued_worker_jobs=[
+            job
+            for job in queued_jobs
+            if job.parameters.operation in WORKER_OPERATIONS
+        ],
+    )
+
+
 def query_for_jobs() -> JobQueryResult:
     """
     Retrieves different types of jobs based on the system's state
     (paused or active).
 
-    When the system is paused, only jobs with a 'built' status are fetched.
-    In the active state, jobs are fetched based on their operations.
+    All jobs that are not completed are fetched in a single request after
+    the maintenance status is checked, and the jobs are then partitioned by
+    status and operation. The maintenance status is cached, so it is only
+    requested once every MAINTENANCE_STATUS_TTL seconds.
+    When the system is paused, only jobs with a 'built' status are returned.
+    In the active state, queued jobs are also returned based on their
+    operations.
     """
     try:
-        if is_system_paused():
-            logger.info("System is paused. Only fetching built jobs.")
-            return JobQueryResult(
-                built_jobs=get_jobs(
-                    job_status=JobStatus.BUILT, operations=None
-                ),
-            )
-        else:
-            return JobQueryResult(
-                built_jobs=get_jobs(
-                    job_status=JobStatus.BUILT, operations=None
-                ),
-                queued_manager_jobs=get_jobs(
-                    job_status=JobStatus.QUEUED,
-                    operations=[
-                        Operation.SET_STATUS,
-                        Operation.BUMP,
-                        Operation.DELETE_DRAFT,
-                        Operation.REMOVE,
-                        Operation.ROLLBACK_REMOVE,
-                        Operation.DELETE_ARCHIVE,
-                        Operation.GENERATE_RSA_KEYS,
-                    ],
-                ),
-                queued_worker_jobs=get_jobs(
-                    job_status=JobStatus.QUEUED,
-                    operations=[
-                        Operation.PATCH_METADATA,
-                        Operation.ADD,
-                        Operation.CHANGE,
-                    ],
-                ),
-            )
+        system_paused = _is_system_paused_cached()
+        jobs = get_jobs(ignore_completed=True)
+        if system_paused:
+            logger.info("System is paused. Only returning built jobs.")
+            return _partition_jobs(jobs, system_paused=True)
+        return _partition_jobs(jobs, system_paused=False)
     except Exception as e:
         logger.exception("Exception when querying for jobs", exc_info=e)
         return JobQueryResult()
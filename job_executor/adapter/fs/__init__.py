@@ -5,6 +5,9 @@ from typing import Protocol
 from job_executor.adapter.fs.datastore_files import DatastoreDirectory
 from job_executor.adapter.fs.input_files import InputDirectory
 from job_executor.adapter.fs.private_keys_directory import PrivateKeysDirectory
+from job_executor.adapter.fs.pseudonym_cache_directory import (
+    PseudonymCacheDirectory,
+)
 from job_executor.adapter.fs.working_files import WorkingDirectory
 from job_executor.config import environment
 
@@ -24,6 +27,7 @@ class LocalStorageAdapter:
     working_dir: WorkingDirectory
     input_dir: InputDirectory
     private_keys_dir: PrivateKeysDirectory
+    pseudonym_cache_dir: PseudonymCacheDirectory | None
 
     def __init__(self, datastore_dir_path: Path, datastore_rdn: str) -> None:
         self.datastore_dir = DatastoreDirectory(datastore_dir_path)
@@ -34,18 +38,26 @@ class LocalStorageAdapter:
         self.private_keys_dir = PrivateKeysDirectory(
             Path(environment.private_keys_dir) / datastore_rdn
         )
+        self.pseudonym_cache_dir = (
+            None
+            if environment.pseudonym_cache_dir is None
+            else PseudonymCacheDirectory(
+                Path(environment.pseudonym_cache_dir) / datastore_rdn,
+                environment.pseudonym_cache_max_bytes,
+            )
+        )
 
-    def move_working_dir_parquet_to_datastore(self, dataset_name: str) -> None:
+    def get_parquet_move_paths(self, dataset_name: str) -> tuple[Path, Path]:
         """
-        Moves the given parquet DRAFT file from the working directory to
-        the appropriate datastore sub directory.
+        Returns the path of the parquet DRAFT file or directory in the
+        working directory, and the path it is moved to in the datastore.
 
         * dataset_name: str - name of dataset
         """
         working_dir_parquet_path = self.working_dir._get_draft_parquet_path(
             dataset_name
         )
-        shutil.move(
+        return (
             working_dir_parquet_path,
             (
                 self.datastore_dir.data_dir
@@ -53,3 +65,12 @@ class LocalStorageAdapter:
                 / working_dir_parquet_path.parts[-1]
             ),
         )
+
+    def move_working_dir_parquet_to_datastore(self, dataset_name: str) -> None:
+        """
+        Moves the given parquet DRAFT file from the working directory to
+        the appropriate datastore sub directory.
+
+        * dataset_name: str - name of dataset
+        """
+        shutil.move(*self.get_parquet_move_paths(dataset_name))
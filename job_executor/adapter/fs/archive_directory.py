@@ -0,0 +1,216 @@
+import gzip
+import hashlib
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from job_executor.adapter.fs.atomic_files import fsync_directory, write_atomic
+
+COMPRESSED_SUFFIX = ".gz"
+
+
+@dataclass
+class ArchiveRetention:
+    """
+    How long archived snapshots are kept. A limit of None is no limit.
+
+    * max_count: int | None - number of snapshots to keep
+    * max_age: timedelta | None - age of the oldest snapshot to keep
+    * max_bytes: int | None - size of the archive to keep, the oldest
+      snapshots are deleted until the archive is below this size
+    * compress_after: timedelta | None - age of snapshots to compress
+    """
+
+    max_count: int | None = None
+    max_age: timedelta | None = None
+    max_bytes: int | None = None
+    compress_after: timedelta | None = None
+
+
+@dataclass
+class Snapshot:
+    """
+    An archived tmp backup directory or an archived draft version file.
+    """
+
+    path: Path
+    archived_at: datetime
+
+
+@dataclass
+class CompactionResult:
+    deleted_snapshots: int = 0
+    compressed_files: int = 0
+    deleted_objects: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+def _archived_at(path: Path) -> datetime:
+    """
+    Archived snapshots are named <kind>_<timestamp> with an optional file
+    suffix, where the timestamp is the naive UTC time of archiving. Falls
+    back to the modification time for snapshots that are named otherwise.
+    """
+    name = path.name.removesuffix(COMPRESSED_SUFFIX).removesuffix(".json")
+    try:
+        return datetime.fromisoformat(name.rsplit("_", 1)[-1])
+    except ValueError:
+        return datetime.fromtimestamp(path.stat().st_mtime, UTC).replace(
+            tzinfo=None
+        )
+
+
+@dataclass
+class ArchiveDirectory:
+    """
+    The archive of a datastore, where the temporary backups and draft
+    versions of finished jobs are kept. Files in the archive are hardlinked
+    to a file in objects/ named by the sha256 of their uncompressed content,
+    so that a file that is archived many times is only stored once.
+    Compressed files are named with a .gz suffix and can be read with gunzip.
+    """
+
+    path: Path
+
+    @property
+    def objects_dir(self) -> Path:
+        return self.path / "objects"
+
+    def list_snapshots(self) -> list[Snapshot]:
+        """
+        Returns the archived snapshots, newest first.
+        """
+        if not self.path.is_dir():
+            return []
+        snapshots = [
+            Snapshot(path, _archived_at(path))
+            for path in self.path.iterdir()
+            if path.name.startswith(("tmp_", "draft_version_"))
+        ]
+        return sorted(
+            snapshots, key=lambda snapshot: snapshot.archived_at, reverse=True
+        )
+
+    def total_bytes(self) -> int:
+        """
+        Returns the size of the archive, counting each hardlinked file once.
+        """
+        seen_inodes = set()
+        total_bytes = 0
+        for directory, _, file_names in os.walk(self.path):
+            for file_name in file_names:
+                stat_result = os.lstat(os.path.join(directory, file_name))
+                inode = (stat_result.st_dev, stat_result.st_ino)
+                if inode not in seen_inodes:
+                    seen_inodes.add(inode)
+                    total_bytes += stat_result.st_size
+        return total_bytes
+
+    def _snapshot_files(self, snapshot: Snapshot) -> list[Path]:
+        if snapshot.path.is_dir():
+            return sorted(snapshot.path.iterdir())
+        return [snapshot.path]
+
+    def _compress_file(self, file_path: Path) -> None:
+        """
+        Replaces the file with a gzip compressed hardlink to the object of
+        its content. The compressed file is in place before the file is
+        removed, so an interrupted compression is redone on the next run.
+        """
+        content = file_path.read_bytes()
+        object_path = (
+            self.objects_dir
+            / f"{hashlib.sha256(content).hexdigest()}{COMPRESSED_SUFFIX}"
+        )
+        if not object_path.exists():
+            os.makedirs(self.objects_dir, exist_ok=True)
+            write_atomic(object_path, gzip.compress(content, mtime=0))
+        compressed_path = file_path.with_name(
+            f"{file_path.name}{COMPRESSED_SUFFIX}"
+        )
+        link_path = file_path.with_name(f".{compressed_path.name}.link")
+        try:
+            os.link(object_path, link_path)
+        except OSError:
+            shutil.copyfile(object_path, link_path)
+        os.replace(link_path, compressed_path)
+        os.remove(file_path)
+        fsync_directory(file_path.parent)
+
+    def _compress_snapshot(self, snapshot: Snapshot) -> int:
+        compressed_files = 0
+        for file_path in self._snapshot_files(snapshot):
+            if file_path.name.startswith(".") or file_path.name.endswith(
+                COMPRESSED_SUFFIX
+            ):
+                continue
+            self._compress_file(file_path)
+            compressed_files += 1
+        if compressed_files and not snapshot.path.is_dir():
+            snapshot.path = snapshot.path.with_name(
+                f"{snapshot.path.name}{COMPRESSED_SUFFIX}"
+            )
+        return compressed_files
+
+    def _delete_snapshot(self, snapshot: Snapshot) -> None:
+        if snapshot.path.is_dir():
+            shutil.rmtree(snapshot.path)
+        else:
+            os.remove(snapshot.path)
+
+    def _delete_unused_objects(self) -> int:
+        """
+        Deletes the objects that no archived file links to anymore.
+        """
+        if not self.objects_dir.is_dir():
+            return 0
+        deleted_objects = 0
+        for object_path in self.objects_dir.iterdir():
+            if object_path.stat().st_nlink == 1:
+                os.remove(object_path)
+                deleted_objects += 1
+        return deleted_objects
+
+    def compact(
+        self, retention: ArchiveRetention, now: datetime
+    ) -> CompactionResult:
+        """
+        Deletes the snapshots that are outside the retention by count and
+        age, compresses the snapshots that are older than compress_after,
+        and deletes the oldest snapshots until the archive is within
+        max_bytes. Objects that are no longer used by any snapshot are
+        deleted.
+
+        * retention: ArchiveRetention - the limits of the archive
+        * now: datetime - naive UTC time to measure the age of snapshots from
+        """
+        result = CompactionResult(bytes_before=self.total_bytes())
+        snapshots = self.list_snapshots()
+        kept_snapshots = []
+        for index, snapshot in enumerate(snapshots):
+            age = now - snapshot.archived_at
+            if (
+                retention.max_count is not None and index >= retention.max_count
+            ) or (retention.max_age is not None and age > retention.max_age):
+                self._delete_snapshot(snapshot)
+                result.deleted_snapshots += 1
+                continue
+            if (
+                retention.compress_after is not None
+                and age > retention.compress_after
+            ):
+                result.compressed_files += self._compress_snapshot(snapshot)
+            kept_snapshots.append(snapshot)
+        result.deleted_objects += self._delete_unused_objects()
+        total_bytes = self.total_bytes()
+        if retention.max_bytes is not None:
+            while kept_snapshots and total_bytes > retention.max_bytes:
+                self._delete_snapshot(kept_snapshots.pop())
+                result.deleted_snapshots += 1
+                result.deleted_objects += self._delete_unused_objects()
+                total_bytes = self.total_bytes()
+        result.bytes_after = total_bytes
+        return result
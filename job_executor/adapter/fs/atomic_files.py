@@ -0,0 +1,45 @@
+import os
+from pathlib import Path
+
+
+def fsync_directory(directory: Path) -> None:
+    """
+    Flushes the entries of a directory to disk, so that files that were
+    created, renamed or deleted in it survive a crash.
+    """
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(file_path: Path, content: str | bytes) -> None:
+    """
+    Writes content to file_path so that readers see either the previous
+    file or the complete new file, never a partial one, and so that the
+    new file survives a crash once this returns.
+
+    The content is written and fsynced to a tmp file in the same directory,
+    which replaces file_path with os.replace before the directory is
+    fsynced. The file keeps the permissions of the file it replaces.
+
+    * file_path: Path - path of the file to write
+    * content: str | bytes - the content of the file, str is utf-8 encoded
+    """
+    file_path = Path(file_path)
+    tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.tmp")
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    try:
+        with open(tmp_path, "wb") as f:
+            if file_path.exists():
+                os.chmod(f.fileno(), file_path.stat().st_mode & 0o7777)
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    fsync_directory(file_path.parent)
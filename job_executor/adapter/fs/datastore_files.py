@@ -1,11 +1,16 @@
+import hashlib
 import json
+import logging
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
 from pathlib import Path
 
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
+from job_executor.adapter.fs.atomic_files import fsync_directory, write_atomic
+from job_executor.adapter.fs.models.bump_plan import BumpPlan, ParquetRename
 from job_executor.adapter.fs.models.datastore_versions import (
     DatastoreVersions,
     DraftVersion,
@@ -14,8 +19,60 @@ from job_executor.adapter.fs.models.metadata import (
     MetadataAll,
     MetadataAllDraft,
 )
+from job_executor.adapter.fs.operation_journal import OperationJournal
 from job_executor.common.exceptions import LocalStorageError
 
+logger = logging.getLogger()
+
+BACKUP_MANIFEST = "manifest.json"
+BUMP_PLAN = "bump_plan.json"
+BACKUP_FILE_NAMES = [
+    "datastore_versions.json",
+    "metadata_all__DRAFT.json",
+    "draft_version.json",
+    BACKUP_MANIFEST,
+    BUMP_PLAN,
+]
+
+# datastore root directory -> generation of its metadata files
+_generations: dict[Path, int] = {}
+
+
+def _file_digest(file_path: Path) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    """
+    Hardlinks source to destination, or copies the bytes of source if the
+    filesystem does not support hardlinks.
+    """
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def _read_backup_manifest(tmp_dir: Path) -> dict[str, str] | None:
+    manifest_path = tmp_dir / BACKUP_MANIFEST
+    if not manifest_path.is_file():
+        return None
+    try:
+        return json.loads(manifest_path.read_bytes())
+    except json.JSONDecodeError as e:
+        raise LocalStorageError("Invalid backup manifest") from e
+
+
+def _dump_json(model: BaseModel, exclude_none: bool = False) -> str:
+    """
+    Serializes the model by alias to the same json as json.dump with
+    indent=2 of its model_dump, without building the dict first.
+    """
+    return model.model_dump_json(
+        by_alias=True, exclude_none=exclude_none, indent=2, ensure_ascii=True
+    )
+
 
 class DatastoreDirectory:
     root_dir: Path
@@ -25,6 +82,7 @@ class DatastoreDirectory:
     datastore_versions_path: Path
     draft_version_path: Path
     archive_dir: Path
+    journal: OperationJournal
 
     def __init__(self, root_dir: Path) -> None:
         self.root_dir = root_dir
@@ -38,6 +96,20 @@ class DatastoreDirectory:
         self.datastore_versions_path = (
             self.metadata_dir / "datastore_versions.json"
         )
+        self.journal = OperationJournal(self.metadata_dir / "journal")
+
+    @property
+    def generation(self) -> int:
+        """
+        Incremented by every write to the datastore metadata files. The
+        counter is kept per root directory in module scope, so it is not
+        reset when a new DatastoreDirectory is created for the datastore.
+        """
+        return _generations.get(self.root_dir, 0)
+
+    @generation.setter
+    def generation(self, generation: int) -> None:
+        _generations[self.root_dir] = generation
 
     def _get_draft_parquet_path(self, dataset_name: str) -> Path:
         parquet_file_path = (
@@ -64,6 +136,23 @@ class DatastoreDirectory:
         """
         os.makedirs(self.data_dir / dataset_name, exist_ok=True)
 
+    def get_data_versions_path(self, version: str) -> Path:
+        """
+        Returns the path of the data_versions json file for the given version.
+
+        * version: str - '<MAJOR>_<MINOR>_<PATCH>' formatted semantic version
+        """
+        file_version = "_".join(version.split("_")[:-1])
+        return self.metadata_dir / f"data_versions__{file_version}.json"
+
+    def get_metadata_all_path(self, version: str) -> Path:
+        """
+        Returns the path of the metadata all json file for the given version.
+
+        * version: str - '<MAJOR>_<MINOR>_<PATCH>' formatted semantic version
+        """
+        return self.metadata_dir / f"metadata_all__{version}.json"
+
     def get_data_versions(self, version: str | None) -> dict:
         """
         Returns the data_versions json file for the given version as a dict.
@@ -73,9 +162,7 @@ class DatastoreDirectory:
         """
         if version is None:
             return {}
-        file_version = "_".join(version.split("_")[:-1])
-        file_path = self.metadata_dir / f"data_versions__{file_version}.json"
-        with open(file_path, "r") as f:
+        with open(self.get_data_versions_path(version), "r") as f:
             return json.load(f)
 
     def write_data_versions(self, data_versions: dict, version: str) -> None:
@@ -86,40 +173,35 @@ class DatastoreDirectory:
         * data_versions: dict - data versions dict
         * version: str - '<MAJOR>_<MINOR>_<PATCH>' formatted semantic version
         """
-        file_version = "_".join(version.split("_")[:-1])
-        file_path = (
-            self.root_dir / f"datastore/data_versions__{file_version}.json"
+        write_atomic(
+            self.get_data_versions_path(version),
+            json.dumps(data_versions, indent=2),
         )
-        with open(file_path, "w") as f:
-            return json.dump(data_versions, f, indent=2)
 
     def get_draft_version(self) -> DraftVersion:
         """
         Reads the draft version file from the datastore.
         """
-        file_path = self.draft_version_path
-        with open(file_path, "r") as f:
-            return DraftVersion.model_validate(json.load(f))
+        return DraftVersion.model_validate_json(
+            self.draft_version_path.read_bytes()
+        )
 
     def write_draft_version(self, draft_version: DraftVersion) -> None:
         """
         Writes json representation of object to the draft version json file
         by alias.
         """
-        file_path = self.draft_version_path
-        with open(file_path, "w") as f:
-            return json.dump(
-                draft_version.model_dump(by_alias=True), f, indent=2
-            )
+        self.generation += 1
+        write_atomic(self.draft_version_path, _dump_json(draft_version))
 
     def get_datastore_versions(self) -> DatastoreVersions:
         """
         Returns the contents of the datastore versions json file as
         DatastoreVersions object.
         """
-        file_path = self.datastore_versions_path
-        with open(file_path, "r") as f:
-            return DatastoreVersions.model_validate(json.load(f))
+        return DatastoreVersions.model_validate_json(
+            self.datastore_versions_path.read_bytes()
+        )
 
     def write_datastore_versions(
         self, datastore_versions: DatastoreVersions
@@ -128,11 +210,10 @@ class DatastoreDirectory:
         Writes json representation of object to the draft version json file
         by alias.
         """
-        file_path = self.datastore_versions_path
-        with open(file_path, "w") as f:
-            return json.dump(
-                datastore_versions.model_dump(by_alias=True), f, indent=2
-            )
+        self.generation += 1
+        write_atomic(
+            self.datastore_versions_path, _dump_json(datastore_versions)
+        )
 
     def get_metadata_all(self, version: str) -> MetadataAll:
         """
@@ -140,9 +221,8 @@ class DatastoreDirectory:
 
         * version: str - '<MAJOR>_<MINOR>_<PATCH>' formatted semantic version
         """
-        file_path = self.metadata_dir / f"metadata_all__{version}.json"
-        with open(file_path, "r") as f:
-            return MetadataAll.model_validate(json.load(f))
+        file_path = self.get_metadata_all_path(version)
+        return MetadataAll.model_validate_json(file_path.read_bytes())
 
     def write_metadata_all(
         self, metadata_all: MetadataAll, version: str
@@ -154,59 +234,146 @@ class DatastoreDirectory:
         * metadata_all: MetadataAll - A MetadataAll object
         * version: str - '<MAJOR>_<MINOR>_<PATCH>'
         """
-        file_path = self.metadata_dir / f"metadata_all__{version}.json"
-        with open(file_path, "w") as f:
-            return json.dump(
-                metadata_all.model_dump(by_alias=True, exclude_none=True),
-                f,
-                indent=2,
-            )
+        file_path = self.get_metadata_all_path(version)
+        self.generation += 1
+        write_atomic(file_path, _dump_json(metadata_all, exclude_none=True))
 
     def get_metadata_all_draft(self) -> MetadataAllDraft:
         """
         Returns the metadata all draft json file.
         """
-        file_path = self.draft_metadata_all_path
-        with open(file_path, "r") as f:
-            return MetadataAllDraft.model_validate(json.load(f))
+        return MetadataAllDraft.model_validate_json(
+            self.draft_metadata_all_path.read_bytes()
+        )
 
     def write_metadata_all_draft(
         self, metadata_all_draft: MetadataAllDraft
     ) -> None:
         """
         Writes json representation of object to the metadata all draft json file
-        by alias. A tmp file will be written to first
-        to avoid downtime in consuming services due to incomplete json while
-        writing.
-        """
-        tmp_file_path = f"{self.draft_metadata_all_path}.tmp"
-        with open(tmp_file_path, "w", encoding="utf-8") as f:
-            json.dump(
-                metadata_all_draft.model_dump(by_alias=True, exclude_none=True),
-                f,
-                indent=2,
-            )
-        os.remove(self.draft_metadata_all_path)
-        shutil.move(tmp_file_path, self.draft_metadata_all_path)
+        by alias.
+        """
+        self.generation += 1
+        write_atomic(
+            self.draft_metadata_all_path,
+            _dump_json(metadata_all_draft, exclude_none=True),
+        )
 
-    def rename_parquet_draft_to_release(
+    def get_metadata_stamp(self, version: str | None) -> tuple:
+        """
+        Returns a stamp of the draft version, datastore versions and
+        metadata all draft files, and of the metadata all file of the given
+        version. The stamp changes whenever one of the files is written or
+        replaced, through this directory or by anything else.
+
+        * version: str | None - '<MAJOR>_<MINOR>_<PATCH>' formatted semantic
+            version of the latest release, or None if there is none
+        """
+        paths = [
+            self.draft_version_path,
+            self.datastore_versions_path,
+            self.draft_metadata_all_path,
+        ]
+        if version is not None:
+            paths.append(self.get_metadata_all_path(version))
+        file_stamps = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                file_stamps.append(None)
+            else:
+                file_stamps.append(
+                    (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+                )
+        return (self.generation, *file_stamps)
+
+    def plan_parquet_release(
         self, dataset_name: str, version: str
-    ) -> str:
+    ) -> ParquetRename:
         """
-        Renames the parquet DRAFT file or directory for the given dataset_name,
-        with the given version.
+        Returns the rename that releases the parquet DRAFT file or directory
+        for the given dataset_name with the given version, without renaming.
 
         * dataset_name: str - name of dataset
         * version: str - '<MAJOR>_<MINOR>_<PATCH>' formatted semantic version
         """
         draft_path = self._get_draft_parquet_path(dataset_name)
         file_version = "_".join(version.split("_")[:-1])
-        file_name = (
-            draft_path.stem.replace("DRAFT", file_version) + draft_path.suffix
+        return ParquetRename(
+            dataset_name=dataset_name,
+            draft_name=draft_path.name,
+            release_name=(
+                draft_path.stem.replace("DRAFT", file_version)
+                + draft_path.suffix
+            ),
         )
-        release_path = draft_path.parent / file_name
-        shutil.move(draft_path, release_path)
-        return release_path.name
+
+    def _rename_parquet(
+        self, dataset_name: str, source: str, target: str
+    ) -> None:
+        dataset_dir = self.data_dir / dataset_name
+        if (dataset_dir / source).exists():
+            os.rename(dataset_dir / source, dataset_dir / target)
+        elif not (dataset_dir / target).exists():
+            raise LocalStorageError(
+                f"Could not find {source} or {target} for {dataset_name}"
+            )
+
+    def release_parquet_drafts(
+        self, parquet_renames: list[ParquetRename], max_workers: int = 1
+    ) -> None:
+        """
+        Renames the parquet drafts to their release names. The renames are
+        independent of each other and run on max_workers threads, which
+        pays off on network filesystems where each rename is a round trip.
+        Renames that were already done are skipped, so a partly released
+        plan can be released again.
+
+        * parquet_renames: list[ParquetRename] - the renames to do
+        * max_workers: int - number of renames to run at the same time
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(
+                executor.map(
+                    lambda rename: self._rename_parquet(
+                        rename.dataset_name,
+                        rename.draft_name,
+                        rename.release_name,
+                    ),
+                    parquet_renames,
+                )
+            )
+
+    def revert_parquet_releases(
+        self, parquet_renames: list[ParquetRename], max_workers: int = 1
+    ) -> None:
+        """
+        Renames released parquet files back to their draft names. Renames
+        that were never done or were already reverted are skipped.
+
+        * parquet_renames: list[ParquetRename] - the renames to revert
+        * max_workers: int - number of renames to run at the same time
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(
+                executor.map(
+                    lambda rename: self._rename_parquet(
+                        rename.dataset_name,
+                        rename.release_name,
+                        rename.draft_name,
+                    ),
+                    [
+                        rename
+                        for rename in parquet_renames
+                        if (
+                            self.data_dir
+                            / rename.dataset_name
+                            / rename.release_name
+                        ).exists()
+                    ],
+                )
+            )
 
     def delete_parquet_draft(self, dataset_name: str) -> None:
         """
@@ -222,41 +389,48 @@ class DatastoreDirectory:
         elif parquet_file_path.is_file():
             os.remove(parquet_file_path)
 
+    def _backed_up_files(self) -> dict[str, Path]:
+        return {
+            "draft_version.json": self.draft_version_path,
+            "metadata_all__DRAFT.json": self.draft_metadata_all_path,
+            "datastore_versions.json": self.datastore_versions_path,
+        }
+
     def save_temporary_backup(self) -> None:
         """
         Backs up metadata_all__DRAFT.json, datastore_versions.json and
         draft_version.json from the datastore to a tmp directory
-        inside the datastore directory.
+        inside the datastore directory, together with a manifest of the
+        sha256 checksums of the backed up files.
         Raises `LocalStorageError` if tmp directory already exists.
+
+        The files are hardlinked into the backup instead of copied when the
+        filesystem allows it. This is safe because the files of the datastore
+        are only ever replaced with write_atomic, never written in place, so
+        the backup keeps the content the files had when it was made.
         """
-        with open(
-            f"{self.root_dir}/datastore/datastore_versions.json",
-            encoding="utf-8",
-        ) as f:
-            datastore_versions = json.load(f)
-        with open(self.draft_version_path, encoding="utf-8") as f:
-            draft_version = json.load(f)
-        with open(self.draft_metadata_all_path, encoding="utf-8") as f:
-            metadata_all_draft = json.load(f)
         tmp_dir = self.metadata_dir / "tmp"
         if os.path.isdir(tmp_dir):
             raise LocalStorageError("tmp directory already exists")
         os.mkdir(tmp_dir)
-        with open(tmp_dir / "draft_version.json", "w", encoding="utf-8") as f:
-            json.dump(draft_version, f, indent=2)
-        with open(
-            tmp_dir / "metadata_all__DRAFT.json", "w", encoding="utf-8"
-        ) as f:
-            json.dump(metadata_all_draft, f, indent=2)
-        with open(
-            tmp_dir / "datastore_versions.json", "w", encoding="utf-8"
-        ) as f:
-            json.dump(datastore_versions, f, indent=2)
+        try:
+            manifest = {}
+            for file_name, file_path in self._backed_up_files().items():
+                _link_or_copy(file_path, tmp_dir / file_name)
+                manifest[file_name] = _file_digest(tmp_dir / file_name)
+            write_atomic(
+                tmp_dir / BACKUP_MANIFEST, json.dumps(manifest, indent=2)
+            )
+        except BaseException:
+            shutil.rmtree(tmp_dir)
+            raise
+        fsync_directory(self.metadata_dir)
 
     def restore_from_temporary_backup(self) -> str | None:
         """
         Restores the datastore from the tmp directory.
-        Raises `LocalStorageError`if there are any missing backup files.
+        Raises `LocalStorageError`if there are any missing backup files, or
+        if a backup file does not match the checksum in the manifest.
 
         Returns None if no released version in backup, else returns the
         latest release version number as dotted four part version.
@@ -273,12 +447,23 @@ class DatastoreDirectory:
         )
         if not backup_exists:
             raise LocalStorageError("Missing tmp backup files")
+        manifest = _read_backup_manifest(tmp_dir)
+        if manifest is None:
+            logger.warning("No manifest in tmp backup, restoring unverified")
+        else:
+            for file_name, digest in manifest.items():
+                if _file_digest(tmp_dir / file_name) != digest:
+                    raise LocalStorageError(
+                        f"Checksum mismatch for backup file {file_name}"
+                    )
         try:
             with open(datastore_versions_backup, "r") as f:
                 datastore_versions = json.load(f)
-            shutil.move(draft_version_backup, self.draft_version_path)
-            shutil.move(metadata_all_draft_backup, self.draft_metadata_all_path)
-            shutil.move(datastore_versions_backup, self.datastore_versions_path)
+            self.generation += 1
+            os.replace(draft_version_backup, self.draft_version_path)
+            os.replace(metadata_all_draft_backup, self.draft_metadata_all_path)
+            os.replace(datastore_versions_backup, self.datastore_versions_path)
+            fsync_directory(self.metadata_dir)
             if datastore_versions["versions"] == []:
                 return None
             else:
@@ -300,18 +485,38 @@ class DatastoreDirectory:
                 "Could not find a tmp directory to archive."
             )
         for content in os.listdir(tmp_dir):
-            if content not in [
-                "datastore_versions.json",
-                "metadata_all__DRAFT.json",
-                "draft_version.json",
-            ]:
+            if content not in BACKUP_FILE_NAMES:
                 raise LocalStorageError(
                     "Found unrecognized files and/or directories in the tmp "
                     "directory. Aborting tmp archiving."
                 )
+        self._deduplicate_archived_files(tmp_dir)
         timestamp = datetime.now(UTC).replace(tzinfo=None)
         shutil.move(tmp_dir, self.archive_dir / f"tmp_{timestamp}")
 
+    def _deduplicate_archived_files(self, tmp_dir: Path) -> None:
+        """
+        Makes every file in tmp_dir a hardlink to a file in archive/objects
+        named by the sha256 of its content, so that an archived backup only
+        takes up space for the files that changed since the last archived
+        backup. Files are left as they are where hardlinks are not supported.
+        """
+        objects_dir = self.archive_dir / "objects"
+        os.makedirs(objects_dir, exist_ok=True)
+        for file_name in os.listdir(tmp_dir):
+            file_path = tmp_dir / file_name
+            object_path = objects_dir / _file_digest(file_path)
+            try:
+                if not object_path.exists():
+                    os.link(file_path, object_path)
+                elif not os.path.samefile(file_path, object_path):
+                    link_path = tmp_dir / f".{file_name}.link"
+                    os.link(object_path, link_path)
+                    os.replace(link_path, file_path)
+            except OSError:
+                continue
+        fsync_directory(objects_dir)
+
     def delete_temporary_backup(self) -> None:
         """
         Deletes the tmp directory within the datastore if the directory
@@ -324,17 +529,41 @@ class DatastoreDirectory:
         if not os.path.isdir(tmp_dir):
             raise LocalStorageError("Could not find a tmp directory to delete.")
         for content in os.listdir(tmp_dir):
-            if content not in [
-                "datastore_versions.json",
-                "metadata_all__DRAFT.json",
-                "draft_version.json",
-            ]:
+            if content not in BACKUP_FILE_NAMES:
                 raise LocalStorageError(
                     "Found unrecognized files and/or directories in the tmp "
                     "directory. Aborting tmp deleting."
                 )
         shutil.rmtree(tmp_dir)
 
+    def undo_journal(self) -> dict | None:
+        """
+        Undoes the changes of the open transaction in the operation journal.
+        Returns the begin record of the undone transaction, or None if there
+        was no open transaction.
+        """
+        self.generation += 1
+        return self.journal.undo()
+
+    def write_bump_plan(self, bump_plan: BumpPlan) -> None:
+        """
+        Journals the plan of a BUMP in the tmp directory, next to the
+        temporary backup it is rolled back with.
+        """
+        write_atomic(
+            self.metadata_dir / "tmp" / BUMP_PLAN, _dump_json(bump_plan)
+        )
+
+    def get_bump_plan(self) -> BumpPlan | None:
+        """
+        Returns the journaled plan of a BUMP from the tmp directory, or None
+        if the BUMP was interrupted before the plan was written.
+        """
+        bump_plan_path = self.metadata_dir / "tmp" / BUMP_PLAN
+        if not bump_plan_path.is_file():
+            return None
+        return BumpPlan.model_validate_json(bump_plan_path.read_bytes())
+
     def temporary_backup_exists(self) -> bool:
         """
         Returns a boolean representing if the tmp directory exists.
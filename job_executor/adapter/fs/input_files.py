@@ -1,5 +1,7 @@
+import json
 import os
 import shutil
+import tarfile
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -29,16 +31,38 @@ class InputDirectory:
         if archived_file.is_file():
             os.remove(archived_file)
 
+    def _get_importable_tar_path(self, dataset_name: str) -> Path:
+        tar_path = self.path / f"{dataset_name}.tar"
+        if not tar_path.exists():
+            tar_path = self.path / "archive" / f"{dataset_name}.tar"
+        return tar_path
+
     def get_importable_tar_size_in_bytes(self, dataset_name: str) -> int:
         """
         Checks the size in bytes of the dataset.tar file.
         Returns size in bytes or 0 if the file does not exist.
         """
-        tar_path = self.path / f"{dataset_name}.tar"
-
-        if not tar_path.exists():
-            tar_path = self.path / "archive" / f"{dataset_name}.tar"
-
+        tar_path = self._get_importable_tar_path(dataset_name)
         if tar_path.exists():
             return os.path.getsize(tar_path)
         return 0
+
+    def get_importable_metadata(self, dataset_name: str) -> dict | None:
+        """
+        Returns the input metadata json of the dataset.tar file without
+        decrypting the dataset, as the metadata is packaged unencrypted.
+        Returns None if the file does not exist or has no readable metadata.
+        """
+        tar_path = self._get_importable_tar_path(dataset_name)
+        try:
+            with tarfile.open(tar_path) as tar:
+                # The metadata is packaged as the first member
+                member = tar.next()
+                if member is None or member.name != f"{dataset_name}.json":
+                    member = tar.getmember(f"{dataset_name}.json")
+                metadata_file = tar.extractfile(member)
+                if metadata_file is None:
+                    return None
+                return json.load(metadata_file)
+        except (OSError, KeyError, tarfile.TarError, ValueError):
+            return None
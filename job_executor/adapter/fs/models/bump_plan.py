@@ -0,0 +1,27 @@
+from job_executor.common.models import CamelModel
+
+
+class ParquetRename(CamelModel, extra="forbid"):
+    """
+    Release of the parquet draft of a dataset, where draft_name and
+    release_name are the names of the file or directory in the data
+    directory of the dataset.
+    """
+
+    dataset_name: str
+    draft_name: str
+    release_name: str
+
+
+class BumpPlan(CamelModel, extra="forbid"):
+    """
+    All changes that a BUMP makes to the files of a datastore, journaled
+    before any of them are made. The json files that are changed in place
+    are restored from the temporary backup, the renamed parquet drafts and
+    the created files are reverted from this plan.
+    """
+
+    version: str
+    update_type: str
+    renames: list[ParquetRename]
+    created_files: list[str]
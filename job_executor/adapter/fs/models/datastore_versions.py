@@ -53,13 +53,10 @@ class DatastoreVersion(CamelModel):
     data_structure_updates: list[DataStructureUpdate]
 
     def __iter__(self) -> Iterator[DataStructureUpdate]:  # type: ignore
+        # The fields of an update are all strings, so a shallow copy is
+        # enough to keep the updates of this version from being modified
         return iter(
-            [
-                DataStructureUpdate(
-                    **update.model_dump(by_alias=True, exclude_none=True)
-                )
-                for update in self.data_structure_updates
-            ]
+            [update.model_copy() for update in self.data_structure_updates]
         )
 
     def _get_current_epoch_seconds(self) -> int:
@@ -99,17 +96,14 @@ class DatastoreVersion(CamelModel):
 
     def contains(self, dataset_name: str) -> bool:
         return any(
-            [
-                update.name == dataset_name
-                for update in self.data_structure_updates
-            ]
+            update.name == dataset_name
+            for update in self.data_structure_updates
         )
 
 
 class DraftVersion(DatastoreVersion):
     def add(self, data_structure_update: DataStructureUpdate) -> None:
-        current_update_names = [update.name for update in self]
-        if data_structure_update.name in current_update_names:
+        if self.contains(data_structure_update.name):
             raise ExistingDraftException(
                 f"Draft for {data_structure_update.name} already exists"
             )
@@ -142,22 +136,25 @@ class DraftVersion(DatastoreVersion):
     def validate_bump_manifesto(
         self, bump_manifesto: "DatastoreVersion"
     ) -> bool:
-        pending_operations = [
-            update.model_dump(by_alias=True, exclude_none=True)
-            for update in self.data_structure_updates
-            if update.release_status != "DRAFT"
-        ]
-        other_pending_operations = [
-            update.model_dump(by_alias=True, exclude_none=True)
-            for update in bump_manifesto.data_structure_updates
-            if update.release_status != "DRAFT"
-        ]
-        if len(pending_operations) != len(other_pending_operations):
+        def pending_operations(
+            version: DatastoreVersion,
+        ) -> list[tuple[str, str, str, str]]:
+            return [
+                (
+                    update.name,
+                    update.description,
+                    update.operation,
+                    update.release_status,
+                )
+                for update in version.data_structure_updates
+                if update.release_status != "DRAFT"
+            ]
+
+        own_pending_operations = pending_operations(self)
+        other_pending_operations = pending_operations(bump_manifesto)
+        if len(own_pending_operations) != len(other_pending_operations):
             return False
-        for pending_operation in other_pending_operations:
-            if pending_operation not in pending_operations:
-                return False
-        return True
+        return set(other_pending_operations) <= set(own_pending_operations)
 
     def release_pending(self) -> tuple[list[DataStructureUpdate], str]:
         if self.update_type is None:
@@ -179,9 +176,12 @@ class DraftVersion(DatastoreVersion):
         self, dataset_name: str, new_status: str
     ) -> None:
         dataset_update = next(
-            update
-            for update in self.data_structure_updates
-            if update.name == dataset_name
+            (
+                update
+                for update in self.data_structure_updates
+                if update.name == dataset_name
+            ),
+            None,
         )
         if dataset_update is None:
             raise NoSuchDraftException(f"No draft for dataset {dataset_name}")
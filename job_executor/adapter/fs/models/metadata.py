@@ -1,4 +1,7 @@
 from collections.abc import Iterator
+from typing import Self
+
+from pydantic import PrivateAttr
 
 from job_executor.adapter.fs.models.datastore_versions import (
     DatastoreVersion,
@@ -381,63 +384,76 @@ class LanguageInfo(CamelModel):
 
 
 class MetadataAll(CamelModel):
+    """
+    The metadata of all datasets in a version of the datastore.
+
+    data_structures keeps the order of the datasets in the file, and is
+    indexed by dataset name. The Metadata objects are shared with copies
+    of this object and with the objects returned by get, so they must not
+    be modified in place. Replace them instead.
+    """
+
     data_store: DataStoreInfo
     data_structures: list[Metadata]
     languages: list[LanguageInfo]
+    _index: dict[str, Metadata] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, context: object) -> None:
+        self._index = {
+            metadata.name: metadata for metadata in self.data_structures
+        }
+
+    def __setattr__(self, name: str, value: object) -> None:
+        super().__setattr__(name, value)
+        if name == "data_structures":
+            self._index = {
+                metadata.name: metadata for metadata in self.data_structures
+            }
+
+    def __copy__(self) -> Self:
+        copied = super().__copy__()
+        copied._set_index(dict(self._index))
+        return copied
 
     def __iter__(self) -> Iterator[Metadata]:  # type: ignore
-        return iter(
-            [
-                Metadata(
-                    **data_structure.model_dump(
-                        by_alias=True, exclude_none=True
-                    )
-                )
-                for data_structure in self.data_structures
-            ]
-        )
+        return iter(list(self.data_structures))
+
+    def _set_index(self, index: dict[str, Metadata]) -> None:
+        self._index = index
+        super().__setattr__("data_structures", list(index.values()))
 
     def get(self, dataset_name: str) -> Metadata | None:
-        for metadata in self.data_structures:
-            if metadata.name == dataset_name:
-                return Metadata(
-                    **metadata.model_dump(by_alias=True, exclude_none=True)
-                )
-        return None
+        return self._index.get(dataset_name)
 
 
 class MetadataAllDraft(MetadataAll):
     def remove(self, dataset_name: str) -> None:
-        self.data_structures = [
-            metadata
-            for metadata in self.data_structures
-            if metadata.name != dataset_name
-        ]
+        if self._index.pop(dataset_name, None) is not None:
+            self._set_index(self._index)
 
     def update_one(self, dataset_name: str, metadata: Metadata) -> None:
-        self.data_structures = [
-            metadata
-            for metadata in self.data_structures
-            if metadata.name != dataset_name
-        ]
-        self.data_structures.append(metadata)
+        self._index.pop(dataset_name, None)
+        self._index.pop(metadata.name, None)
+        self._index[metadata.name] = metadata
+        self._set_index(self._index)
 
     def remove_all(self) -> None:
         self.data_structures = []
 
     def add(self, metadata: Metadata) -> None:
-        self.data_structures.append(metadata)
+        if metadata.name in self._index:
+            self.update_one(metadata.name, metadata)
+        else:
+            self._index[metadata.name] = metadata
+            self.data_structures.append(metadata)
 
     def rebuild(
         self,
         released_metadata: list[Metadata],
         draft_version: DatastoreVersion,
     ) -> None:
-        previous_data_structures = {ds.name: ds for ds in self.data_structures}
-        new_data_structures = {
-            ds.name: Metadata(**ds.model_dump(by_alias=True, exclude_none=True))
-            for ds in released_metadata
-        }
+        previous_data_structures = self._index
+        new_data_structures = {ds.name: ds for ds in released_metadata}
         for draft in draft_version:
             if draft.operation == "REMOVE":
                 del new_data_structures[draft.name]
@@ -450,4 +466,4 @@ class MetadataAllDraft(MetadataAll):
                         "metadata_all__DRAFT"
                     )
                 new_data_structures[draft.name] = draft_metadata
-        self.data_structures = list(new_data_structures.values())
+        self._set_index(new_data_structures)
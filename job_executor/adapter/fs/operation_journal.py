@@ -0,0 +1,186 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+from job_executor.adapter.fs.atomic_files import fsync_directory
+from job_executor.common.exceptions import LocalStorageError
+
+JOURNAL_FILE = "journal.jsonl"
+
+
+class OperationJournal:
+    """
+    Append-only write-ahead journal of the file changes that a job makes
+    to a datastore. Every change is recorded and flushed to disk before it
+    is made, so an interrupted job can be undone from the journal alone:
+
+    * replace - a file is replaced. The previous file is hardlinked into
+      the journal directory as its before-image. This is safe because the
+      files of the datastore are only ever replaced, never written in place.
+    * move - a file or directory is moved into the datastore.
+
+    A transaction starts with a begin record and ends with a commit or an
+    abort record, after which the journal and the before-images are
+    deleted. Only one transaction is open at a time.
+    """
+
+    path: Path
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @property
+    def journal_path(self) -> Path:
+        return self.path / JOURNAL_FILE
+
+    def _append(self, record: dict) -> None:
+        created = not self.journal_path.exists()
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            fsync_directory(self.path)
+
+    def read_records(self) -> list[dict]:
+        """
+        Returns the records of the journal. A record that was cut off by a
+        crash while it was appended is ignored, as the change it describes
+        was never started.
+        """
+        if not self.journal_path.exists():
+            return []
+        records = []
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return records
+
+    def open_transaction(self) -> dict | None:
+        """
+        Returns the begin record of the open transaction in the journal,
+        or None if there is no open transaction.
+        """
+        records = self.read_records()
+        if not records or records[-1]["type"] in ["commit", "abort"]:
+            return None
+        return records[0]
+
+    def begin(self, job_id: str, operation: str, dataset_name: str) -> None:
+        """
+        Starts a transaction for the job.
+        Raises `LocalStorageError` if a transaction is already open.
+        """
+        if self.open_transaction() is not None:
+            raise LocalStorageError("An operation journal is already open")
+        os.makedirs(self.path, exist_ok=True)
+        # Left behind if a crash interrupted the end of the last transaction
+        self._clear()
+        self._append(
+            {
+                "type": "begin",
+                "jobId": job_id,
+                "operation": operation,
+                "datasetName": dataset_name,
+            }
+        )
+
+    def _next_sequence(self) -> int:
+        records = self.read_records()
+        if not records or records[-1]["type"] in ["commit", "abort"]:
+            raise LocalStorageError("No open operation journal")
+        return len(records)
+
+    def record_replace(self, file_path: Path) -> None:
+        """
+        Records that file_path is about to be replaced, keeping the current
+        file as its before-image.
+        Raises `LocalStorageError` if no transaction is open.
+        """
+        sequence = self._next_sequence()
+        before_image = None
+        if file_path.exists():
+            before_image = f"{sequence}__{file_path.name}"
+            try:
+                os.link(file_path, self.path / before_image)
+            except OSError:
+                shutil.copyfile(file_path, self.path / before_image)
+            fsync_directory(self.path)
+        self._append(
+            {
+                "type": "replace",
+                "file": str(file_path),
+                "beforeImage": before_image,
+            }
+        )
+
+    def record_move(self, source: Path, target: Path) -> None:
+        """
+        Records that source is about to be moved to target.
+        Raises `LocalStorageError` if no transaction is open.
+        """
+        self._next_sequence()
+        self._append(
+            {"type": "move", "source": str(source), "target": str(target)}
+        )
+
+    def _clear(self) -> None:
+        for content in os.listdir(self.path):
+            os.remove(self.path / content)
+        fsync_directory(self.path)
+
+    def _close(self, record_type: str) -> None:
+        self._append({"type": record_type})
+        self._clear()
+
+    def commit(self) -> None:
+        """
+        Ends the open transaction and keeps its changes.
+        Raises `LocalStorageError` if no transaction is open.
+        """
+        self._next_sequence()
+        self._close("commit")
+
+    def _undo_record(self, record: dict) -> None:
+        if record["type"] == "replace":
+            file_path = Path(record["file"])
+            if record["beforeImage"] is None:
+                file_path.unlink(missing_ok=True)
+                return
+            before_image = self.path / record["beforeImage"]
+            # A missing before-image was restored by an earlier undo
+            if before_image.exists():
+                os.replace(before_image, file_path)
+                fsync_directory(file_path.parent)
+        elif record["type"] == "move":
+            source, target = Path(record["source"]), Path(record["target"])
+            if not target.exists():
+                return
+            if source.exists():
+                # Interrupted while the move copied across filesystems
+                if target.is_dir():
+                    shutil.rmtree(target)
+                else:
+                    os.remove(target)
+            else:
+                shutil.move(target, source)
+
+    def undo(self) -> dict | None:
+        """
+        Undoes the changes of the open transaction in reverse order and
+        ends it. Changes that were never made or were already undone are
+        skipped, so an interrupted undo can be run again.
+        Returns the begin record of the undone transaction, or None if
+        there was no open transaction.
+        """
+        records = self.read_records()
+        if not records or records[-1]["type"] in ["commit", "abort"]:
+            return None
+        for record in reversed(records[1:]):
+            self._undo_record(record)
+        self._close("abort")
+        return records[0]
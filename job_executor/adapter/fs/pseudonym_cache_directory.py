@@ -0,0 +1,139 @@
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import pyarrow
+from microdata_tools.validation.model.metadata import UnitIdType
+from pyarrow import compute, dataset, parquet
+
+CACHE_SCHEMA = pyarrow.schema(
+    [
+        pyarrow.field("identifier", pyarrow.string()),
+        pyarrow.field("pseudonym", pyarrow.int64()),
+    ]
+)
+
+
+@dataclass
+class PseudonymCacheDirectory:
+    """
+    On-disk cache of pseudonyms for one datastore, with one directory of
+    parquet segment files per unit id type. Every store appends a segment,
+    and the least recently used segments are evicted when the segments of
+    a unit id type grow beyond max_bytes on disk. Lookups only read the
+    rows of the requested identifiers, so a worker never loads the whole
+    cache, and they mark the segments they found pseudonyms in as used by
+    updating their modification time.
+
+    Pseudonym maps are as sensitive as the private keys, so the
+    directories and the files are only accessible by the owner
+    (this application).
+    """
+
+    path_with_rdn: Path
+    max_bytes: int
+
+    def _get_segments_dir(self, unit_id_type: UnitIdType) -> Path:
+        return self.path_with_rdn / unit_id_type.value
+
+    def _get_segment_paths(self, unit_id_type: UnitIdType) -> list[Path]:
+        segments_dir = self._get_segments_dir(unit_id_type)
+        if not segments_dir.is_dir():
+            return []
+        return sorted(segments_dir.glob("*.parquet"))
+
+    def _write_segment(self, segment_path: Path, table: pyarrow.Table) -> None:
+        """
+        Writes the segment to a tmp file that only the owner can read and
+        write, and renames it to the segment path when it is complete.
+        """
+        tmp_location = segment_path.with_suffix(".tmp")
+        fd = os.open(tmp_location, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                parquet.write_table(table, file)
+            os.replace(tmp_location, segment_path)
+        except Exception:
+            if tmp_location.exists():
+                os.remove(tmp_location)
+            raise
+
+    def _evict(self, unit_id_type: UnitIdType) -> None:
+        """
+        Deletes the least recently used segments of the unit id type until
+        the rest fit in max_bytes. Another worker may evict the same
+        segments, so segments that are already deleted are skipped.
+        """
+        segment_stats = []
+        for segment_path in self._get_segment_paths(unit_id_type):
+            try:
+                segment_stats.append((segment_path, segment_path.stat()))
+            except FileNotFoundError:
+                continue
+        segment_stats.sort(
+            key=lambda segment: (segment[1].st_mtime_ns, segment[0])
+        )
+        segment_sizes = [
+            (segment_path, segment_stat.st_size)
+            for segment_path, segment_stat in segment_stats
+        ]
+        total_bytes = sum(size for _, size in segment_sizes)
+        for segment_path, size in segment_sizes:
+            if total_bytes <= self.max_bytes:
+                break
+            segment_path.unlink(missing_ok=True)
+            total_bytes -= size
+
+    def lookup(
+        self, unit_id_type: UnitIdType, identifiers: pyarrow.Array
+    ) -> pyarrow.Array:
+        """
+        Returns the cached pseudonym for each identifier, at the same
+        position as the identifier. Identifiers that are not in the cache
+        get a null pseudonym. The segments that pseudonyms were found in
+        are marked as used.
+        """
+        segment_paths = self._get_segment_paths(unit_id_type)
+        if not segment_paths:
+            return pyarrow.nulls(len(identifiers), pyarrow.int64())
+        cached = dataset.dataset(
+            segment_paths, schema=CACHE_SCHEMA, format="parquet"
+        ).to_table(
+            columns=["identifier", "pseudonym", "__filename"],
+            filter=compute.field("identifier").isin(identifiers),
+        )
+        for segment_path in compute.unique(cached["__filename"]).to_pylist():
+            try:
+                os.utime(segment_path)
+            except FileNotFoundError:
+                # Evicted by another worker after it was read
+                continue
+        indices = compute.index_in(
+            identifiers, value_set=cached["identifier"].combine_chunks()
+        )
+        return compute.take(cached["pseudonym"].combine_chunks(), indices)
+
+    def store(
+        self,
+        unit_id_type: UnitIdType,
+        identifiers: pyarrow.Array,
+        pseudonyms: pyarrow.Array,
+    ) -> None:
+        """
+        Appends the identifiers and their pseudonyms to the cache as a new
+        segment. If the cache grows beyond max_bytes, the least recently
+        used segments are evicted.
+        """
+        segments_dir = self._get_segments_dir(unit_id_type)
+        os.makedirs(self.path_with_rdn, mode=0o700, exist_ok=True)
+        os.makedirs(segments_dir, mode=0o700, exist_ok=True)
+        stored = pyarrow.Table.from_arrays(
+            [identifiers, pseudonyms.cast(pyarrow.int64())],
+            schema=CACHE_SCHEMA,
+        )
+        self._write_segment(
+            segments_dir / f"{time.time_ns():020d}_{os.getpid()}.parquet",
+            stored,
+        )
+        self._evict(unit_id_type)
@@ -59,6 +59,41 @@ class WorkingDirectory:
         if os.path.isfile(metadata_path):
             os.remove(metadata_path)
 
+    def write_metrics(self, dataset_name: str, metrics: dict) -> None:
+        """
+        Writes the metrics of the worker that built the dataset as a
+        sidecar json next to the built files named:
+        {dataset_name}__DRAFT.metrics.json
+
+        * dataset_name: str - name of dataset
+        * metrics: dict - metrics to write as json
+        """
+        file_path = self.path / f"{dataset_name}__DRAFT.metrics.json"
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(metrics, f)
+
+    def get_metrics(self, dataset_name: str) -> dict | None:
+        """
+        Returns the metrics sidecar json for given dataset_name, or None
+        if the dataset was built without one.
+
+        * dataset_name: str - name of dataset
+        """
+        file_path = self.path / f"{dataset_name}__DRAFT.metrics.json"
+        if not file_path.is_file():
+            return None
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def delete_metrics(self, dataset_name: str) -> None:
+        """
+        Deletes the metrics sidecar in working directory with postfix
+        __DRAFT.metrics.json
+
+        * dataset_name: str - name of dataset
+        """
+        self.delete_file(f"{dataset_name}__DRAFT.metrics.json")
+
     def get_input_metadata(self, dataset_name: str) -> dict:
         """
         Returns the working dir metadata json file for given dataset_name.
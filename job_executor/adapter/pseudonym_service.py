@@ -1,25 +1,121 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 from microdata_tools.validation.model.metadata import UnitIdType
+from requests import RequestException
+from requests.adapters import HTTPAdapter
 
-from job_executor.common.exceptions import HttpResponseError
+from job_executor.common.exceptions import HttpRequestError, HttpResponseError
 from job_executor.config import environment, secrets
 
 PSEUDONYM_SERVICE_URL = environment.pseudonym_service_url
 PSEUDONYM_SERVICE_API_KEY = secrets.pseudonym_service_api_key
+CHUNK_SIZE = environment.pseudonym_service_chunk_size
+MAX_WORKERS = environment.pseudonym_service_max_workers
+MAX_RETRIES = environment.pseudonym_service_max_retries
+BACKOFF_FACTOR = 1.0
+# [1.0s, 2.0s, 4.0s, 8.0s, 16.0s] between retries
+RETRY_STATUS_CODES = [429, 502, 503, 504]
+REQUEST_TIMEOUT = (10, 600)  # (connect timeout, read timeout)
+
+logger = logging.getLogger()
+
+_request_count = 0
+_request_count_lock = threading.Lock()
+
+
+def get_request_count() -> int:
+    """
+    Returns the number of requests, including retries, this process has
+    sent to the pseudonym service.
+    """
+    return _request_count
+
+
+def _count_request() -> None:
+    global _request_count
+    with _request_count_lock:
+        _request_count += 1
+
+
+def _post_chunk(
+    session: requests.Session,
+    url: str,
+    chunk: list[str],
+) -> dict:
+    """
+    Posts one chunk of identifiers to the pseudonym service.
+    Retries with exponential backoff on connection errors and on
+    status codes that indicate a transient failure. The chunk is always
+    posted at least once, even if MAX_RETRIES is negative.
+    """
+    max_retries = max(MAX_RETRIES, 0)
+    for attempt in range(max_retries + 1):
+        _count_request()
+        try:
+            response = session.post(
+                url,
+                json=chunk,
+                headers={
+                    "Content-Type": "application/json",
+                    "X-API-Key": PSEUDONYM_SERVICE_API_KEY,
+                },
+                timeout=REQUEST_TIMEOUT,
+            )
+            if response.status_code == 200:
+                return response.json()
+            error: Exception = HttpResponseError(
+                f"{response.status_code}: {response.text}"
+            )
+            if response.status_code not in RETRY_STATUS_CODES:
+                raise error
+        except RequestException as e:
+            error = HttpRequestError(e)
+        if attempt < max_retries:
+            backoff = BACKOFF_FACTOR * 2**attempt
+            logger.warning(
+                f"Pseudonym service request failed ({error}), "
+                f"retrying chunk in {backoff} seconds"
+            )
+            time.sleep(backoff)
+    raise error
 
 
 def pseudonymize(
     idents: list[str], unit_id_type: UnitIdType, job_id: str
 ) -> dict:
-    response = requests.post(
-        f"{PSEUDONYM_SERVICE_URL}?unit_id_type={unit_id_type.value}&job_id={job_id}",
-        json=idents,
-        headers={
-            "Content-Type": "application/json",
-            "X-API-Key": PSEUDONYM_SERVICE_API_KEY,
-        },
-        timeout=4000,
+    """
+    Returns a dictionary from each identifier to its pseudonym.
+
+    The identifiers are sent in chunks of CHUNK_SIZE, with up to MAX_WORKERS
+    concurrent requests over a pooled session. Only the failed chunks are
+    retried, and the pseudonyms of all chunks are merged into one dictionary.
+    """
+    url = (
+        f"{PSEUDONYM_SERVICE_URL}?unit_id_type={unit_id_type.value}"
+        f"&job_id={job_id}"
     )
-    if response.status_code != 200:
-        raise HttpResponseError(f"{response.status_code}: {response.text}")
-    return response.json()
+    chunks = [
+        idents[start : start + CHUNK_SIZE]
+        for start in range(0, len(idents), CHUNK_SIZE)
+    ]
+    identifier_to_pseudonym = {}
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(_post_chunk, session, url, chunk)
+                for chunk in chunks
+            ]
+            try:
+                for future in as_completed(futures):
+                    identifier_to_pseudonym.update(future.result())
+            except Exception:
+                executor.shutdown(cancel_futures=True)
+                raise
+    return identifier_to_pseudonym
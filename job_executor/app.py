@@ -1,13 +1,19 @@
 import logging
-import time
+from pathlib import Path
 
 from job_executor.adapter import datastore_api
-from job_executor.adapter.fs import LocalStorageAdapter
+from job_executor.common import metrics
 from job_executor.common.exceptions import StartupException
 from job_executor.config import environment
 from job_executor.config.log import setup_logging
-from job_executor.domain import rollback
+from job_executor.domain import archive, rollback
+from job_executor.domain.local_storage import (
+    get_local_storage,
+    warm_local_storage_cache,
+)
 from job_executor.domain.manager import Manager
+from job_executor.domain.manager.scheduler import PollScheduler
+from job_executor.domain.worker.memory_model import WorkerMemoryModel
 
 logger = logging.getLogger()
 setup_logging()
@@ -22,10 +28,9 @@ def initialize_app() -> Manager:
     """
     try:
         rollback.fix_interrupted_jobs()
-        for rdn in datastore_api.get_datastores():
-            local_storage = LocalStorageAdapter(
-                datastore_api.get_datastore_directory(rdn), rdn
-            )
+        for rdn in warm_local_storage_cache():
+            rollback.resolve_operation_journal(rdn)
+            local_storage = get_local_storage(rdn)
             if local_storage.datastore_dir.temporary_backup_exists():
                 raise StartupException(f"tmp directory exists for {rdn}")
         return Manager(
@@ -33,18 +38,42 @@ def initialize_app() -> Manager:
             max_bytes_all_workers=(
                 environment.max_gb_all_workers * 1024**3
             ),  # Covert from GB to bytes
+            archive_retention=(
+                None
+                if environment.archive_compaction_interval_seconds is None
+                else archive.retention_from_environment()
+            ),
+            archive_compaction_interval=(
+                environment.archive_compaction_interval_seconds or 0.0
+            ),
+            memory_model=WorkerMemoryModel(
+                path=(
+                    None
+                    if environment.worker_memory_model_file is None
+                    else Path(environment.worker_memory_model_file)
+                ),
+                default_expansion=environment.worker_default_expansion,
+            ),
         )
     except Exception as e:
         raise StartupException("Exception when initializing") from e
 
 
 def main() -> None:
+    if environment.metrics_port is not None:
+        metrics.start_server(environment.metrics_port)
+        logger.info(f"Serving metrics on port {environment.metrics_port}")
     manager = initialize_app()
+    scheduler = PollScheduler(
+        min_interval=environment.poll_min_interval_seconds,
+        max_interval=environment.poll_max_interval_seconds,
+    )
     try:
         while True:
-            time.sleep(5)
+            scheduler.wait(manager.worker_sentinels())
             job_query_result = datastore_api.query_for_jobs()
-            manager.handle_jobs(job_query_result)
+            handled_jobs = manager.handle_jobs(job_query_result)
+            scheduler.record_poll(found_work=handled_jobs > 0)
     except Exception as e:
         raise e
     finally:
@@ -0,0 +1,316 @@
+"""
+Metrics of the main process, exposed in the Prometheus text format by an
+optional HTTP endpoint. Worker sub-processes keep their own copies of these
+metrics, so only what happens in the main process is exposed.
+"""
+
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+
+LabelValues = tuple[str, ...]
+
+
+class _Metric(ABC):
+    metric_type: str
+
+    def __init__(
+        self, name: str, documentation: str, label_names: tuple[str, ...]
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"Expected labels {self.label_names} for {self.name}, "
+                f"got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _format_labels(
+        self, label_values: LabelValues, extra: dict[str, str] | None = None
+    ) -> str:
+        pairs = list(zip(self.label_names, label_values)) + list(
+            (extra or {}).items()
+        )
+        if not pairs:
+            return ""
+        escaped = [f'{name}="{_escape(value)}"' for name, value in pairs]
+        return "{" + ",".join(escaped) + "}"
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        """
+        Returns the sample lines of the metric, called with the lock held.
+        """
+
+    def render(self) -> str:
+        with self._lock:
+            samples = self._samples()
+        return "\n".join(
+            [
+                f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.metric_type}",
+                *samples,
+            ]
+        )
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        label_values = self._label_values(labels)
+        with self._lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount
+            )
+
+    def get(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{self._format_labels(label_values)} {value}"
+            for label_values, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        label_values = self._label_values(labels)
+        with self._lock:
+            self._values[label_values] = value
+
+    def get(self, **labels: str) -> float | None:
+        with self._lock:
+            return self._values.get(self._label_values(labels))
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{self._format_labels(label_values)} {value}"
+            for label_values, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...],
+        label_names: tuple[str, ...] = (),
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: a count per bucket, the sum and the total count
+        self._observations: dict[LabelValues, tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        label_values = self._label_values(labels)
+        with self._lock:
+            bucket_counts, total, count = self._observations.get(
+                label_values, ([0] * len(self.buckets), 0.0, 0)
+            )
+            bucket_index = bisect.bisect_left(self.buckets, value)
+            if bucket_index < len(self.buckets):
+                bucket_counts[bucket_index] += 1
+            self._observations[label_values] = (
+                bucket_counts,
+                total + value,
+                count + 1,
+            )
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observes the seconds spent in the body of the with-statement,
+        also when it raises.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def get_count(self, **labels: str) -> int:
+        with self._lock:
+            observation = self._observations.get(self._label_values(labels))
+        return 0 if observation is None else observation[2]
+
+    def _samples(self) -> list[str]:
+        samples = []
+        for label_values, (bucket_counts, total, count) in sorted(
+            self._observations.items()
+        ):
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = self._format_labels(
+                    label_values, {"le": str(upper_bound)}
+                )
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = self._format_labels(label_values, {"le": "+Inf"})
+            samples.append(f"{self.name}_bucket{labels} {count}")
+            labels = self._format_labels(label_values)
+            samples.append(f"{self.name}_sum{labels} {total}")
+            samples.append(f"{self.name}_count{labels} {count}")
+        return samples
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+JOB_DURATION_BUCKETS = (
+    1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 14400, 28800
+)  # fmt: skip
+REQUEST_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)  # fmt: skip
+
+QUEUED_JOBS = Gauge(
+    "job_executor_queued_jobs",
+    "Jobs found in the last query for jobs, per queue",
+    ("queue",),
+)
+LIVE_WORKERS = Gauge(
+    "job_executor_live_workers", "Worker sub-processes currently alive"
+)
+MAX_WORKERS = Gauge(
+    "job_executor_max_workers", "Maximum number of concurrent workers"
+)
+WORKER_BYTES = Gauge(
+    "job_executor_worker_bytes",
+    "Memory reserved for all live workers, their predicted or sampled peaks",
+)
+MAX_WORKER_BYTES = Gauge(
+    "job_executor_max_worker_bytes",
+    "Maximum memory reserved for all live workers",
+)
+WORKER_RSS_BYTES = Gauge(
+    "job_executor_worker_rss_bytes",
+    "Sum of the last sampled RSS of all live workers",
+)
+JOB_DURATION = Histogram(
+    "job_executor_job_duration_seconds",
+    "Duration of each job phase, per operation",
+    JOB_DURATION_BUCKETS,
+    ("operation", "phase"),
+)
+DATASTORE_API_REQUEST_DURATION = Histogram(
+    "job_executor_datastore_api_request_duration_seconds",
+    "Duration of calls to the datastore api, including retries",
+    REQUEST_DURATION_BUCKETS,
+    ("endpoint",),
+)
+DATASTORE_API_ERRORS = Counter(
+    "job_executor_datastore_api_errors_total",
+    "Failed calls to the datastore api",
+    ("endpoint",),
+)
+DATASTORE_API_REQUESTS = Counter(
+    "job_executor_datastore_api_requests_total",
+    "Requests sent to the datastore api, not counting retries",
+)
+DATASTORE_API_CONNECTIONS_OPENED = Counter(
+    "job_executor_datastore_api_connections_opened_total",
+    "Connections opened to the datastore api, the other requests reused "
+    "a pooled connection",
+)
+ROLLBACKS = Counter(
+    "job_executor_rollbacks_total",
+    "Rollbacks performed, per kind of rollback and operation",
+    ("rollback", "operation"),
+)
+ARCHIVE_BYTES = Gauge(
+    "job_executor_archive_bytes",
+    "Size of the archive of each datastore after the last compaction",
+    ("datastore",),
+)
+
+ALL_METRICS: list[_Metric] = [
+    QUEUED_JOBS,
+    LIVE_WORKERS,
+    MAX_WORKERS,
+    WORKER_BYTES,
+    MAX_WORKER_BYTES,
+    WORKER_RSS_BYTES,
+    JOB_DURATION,
+    DATASTORE_API_REQUEST_DURATION,
+    DATASTORE_API_ERRORS,
+    DATASTORE_API_REQUESTS,
+    DATASTORE_API_CONNECTIONS_OPENED,
+    ROLLBACKS,
+    ARCHIVE_BYTES,
+]
+
+
+def render() -> str:
+    """
+    Returns all metrics in the Prometheus text exposition format.
+    """
+    return "\n".join(metric.render() for metric in ALL_METRICS) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+def start_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serves the metrics on http://{host}:{port}/metrics from a daemon thread.
+    Returns the server so that it can be shut down.
+
+    * port: int - port to listen on, 0 to pick a free port
+    * host: str - interface to listen on
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    )
+    thread.start()
+    return server
@@ -13,6 +13,29 @@ class Environment:
     commit_id: str
     max_gb_all_workers: int
     private_keys_dir: str
+    worker_batch_size: int
+    pseudonym_service_chunk_size: int
+    pseudonym_service_max_workers: int
+    pseudonym_service_max_retries: int
+    pseudonym_cache_dir: str | None
+    pseudonym_cache_max_bytes: int
+    partition_max_rows_per_file: int
+    partition_max_rows_per_group: int
+    partition_max_open_files: int
+    metrics_port: int | None
+    poll_min_interval_seconds: float
+    datastore_api_pool_size: int
+    datastore_api_max_retries: int
+    datastore_api_backoff_factor: float
+    poll_max_interval_seconds: float
+    archive_max_count: int | None
+    archive_max_age_days: float | None
+    archive_max_bytes: int | None
+    archive_compress_after_days: float | None
+    archive_compaction_interval_seconds: float | None
+    bump_max_workers: int
+    worker_memory_model_file: str | None
+    worker_default_expansion: float
 
 
 def _initialize_environment() -> Environment:
@@ -25,6 +48,79 @@ def _initialize_environment() -> Environment:
         commit_id=os.environ["COMMIT_ID"],
         max_gb_all_workers=int(os.environ["MAX_GB_ALL_WORKERS"]),
         private_keys_dir=os.environ["PRIVATE_KEYS_DIR"],
+        worker_batch_size=int(os.environ.get("WORKER_BATCH_SIZE", 1_000_000)),
+        pseudonym_service_chunk_size=int(
+            os.environ.get("PSEUDONYM_SERVICE_CHUNK_SIZE", 100_000)
+        ),
+        pseudonym_service_max_workers=int(
+            os.environ.get("PSEUDONYM_SERVICE_MAX_WORKERS", 4)
+        ),
+        pseudonym_service_max_retries=int(
+            os.environ.get("PSEUDONYM_SERVICE_MAX_RETRIES", 5)
+        ),
+        pseudonym_cache_dir=os.environ.get("PSEUDONYM_CACHE_DIR"),
+        pseudonym_cache_max_bytes=int(
+            os.environ.get("PSEUDONYM_CACHE_MAX_BYTES", 2 * 1024**3)
+        ),
+        partition_max_rows_per_file=int(
+            os.environ.get("PARTITION_MAX_ROWS_PER_FILE", 0)
+        ),
+        partition_max_rows_per_group=int(
+            os.environ.get("PARTITION_MAX_ROWS_PER_GROUP", 1024 * 1024)
+        ),
+        partition_max_open_files=int(
+            os.environ.get("PARTITION_MAX_OPEN_FILES", 1024)
+        ),
+        metrics_port=(
+            int(os.environ["METRICS_PORT"])
+            if os.environ.get("METRICS_PORT")
+            else None
+        ),
+        poll_min_interval_seconds=float(
+            os.environ.get("POLL_MIN_INTERVAL_SECONDS", 1.0)
+        ),
+        poll_max_interval_seconds=float(
+            os.environ.get("POLL_MAX_INTERVAL_SECONDS", 5.0)
+        ),
+        datastore_api_pool_size=int(
+            os.environ.get("DATASTORE_API_POOL_SIZE", 10)
+        ),
+        datastore_api_max_retries=int(
+            os.environ.get("DATASTORE_API_MAX_RETRIES", 6)
+        ),
+        datastore_api_backoff_factor=float(
+            os.environ.get("DATASTORE_API_BACKOFF_FACTOR", 0.5)
+        ),
+        archive_max_count=(
+            int(os.environ["ARCHIVE_MAX_COUNT"])
+            if os.environ.get("ARCHIVE_MAX_COUNT")
+            else None
+        ),
+        archive_max_age_days=(
+            float(os.environ["ARCHIVE_MAX_AGE_DAYS"])
+            if os.environ.get("ARCHIVE_MAX_AGE_DAYS")
+            else None
+        ),
+        archive_max_bytes=(
+            int(os.environ["ARCHIVE_MAX_BYTES"])
+            if os.environ.get("ARCHIVE_MAX_BYTES")
+            else None
+        ),
+        archive_compress_after_days=(
+            float(os.environ.get("ARCHIVE_COMPRESS_AFTER_DAYS", 7))
+            if os.environ.get("ARCHIVE_COMPRESS_AFTER_DAYS") != ""
+            else None
+        ),
+        archive_compaction_interval_seconds=(
+            float(os.environ.get("ARCHIVE_COMPACTION_INTERVAL_SECONDS", 3600))
+            if os.environ.get("ARCHIVE_COMPACTION_INTERVAL_SECONDS") != ""
+            else None
+        ),
+        bump_max_workers=int(os.environ.get("BUMP_MAX_WORKERS", 8)),
+        worker_memory_model_file=os.environ.get("WORKER_MEMORY_MODEL_FILE"),
+        worker_default_expansion=float(
+            os.environ.get("WORKER_DEFAULT_EXPANSION", 1.0)
+        ),
     )
 
 
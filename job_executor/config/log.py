@@ -19,26 +19,28 @@ class MicrodataJSONFormatter(logging.Formatter):
         stack_trace = ""
         if record.exc_info is not None:
             stack_trace = self.formatException(record.exc_info)
-        return json.dumps(
-            {
-                "@timestamp": datetime.datetime.fromtimestamp(
-                    record.created,
-                    tz=datetime.timezone.utc,
-                ).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
-                + "Z",
-                "command": self.command,
-                "error.stack": stack_trace,
-                "host": self.host,
-                "message": record.getMessage(),
-                "level": record.levelno,
-                "levelName": record.levelname,
-                "loggerName": record.name,
-                "schemaVersion": "v3",
-                "serviceName": "job-executor",
-                "serviceVersion": self.commit_id,
-                "thread": record.threadName,
-            }
-        )
+        log = {
+            "@timestamp": datetime.datetime.fromtimestamp(
+                record.created,
+                tz=datetime.timezone.utc,
+            ).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+            + "Z",
+            "command": self.command,
+            "error.stack": stack_trace,
+            "host": self.host,
+            "message": record.getMessage(),
+            "level": record.levelno,
+            "levelName": record.levelname,
+            "loggerName": record.name,
+            "schemaVersion": "v3",
+            "serviceName": "job-executor",
+            "serviceVersion": self.commit_id,
+            "thread": record.threadName,
+        }
+        metrics = getattr(record, "metrics", None)
+        if metrics is not None:
+            log["metrics"] = metrics
+        return json.dumps(log)
 
 
 class WorkerFilter(logging.Filter):
@@ -0,0 +1,61 @@
+import logging
+from datetime import UTC, datetime, timedelta
+
+from job_executor.adapter import datastore_api
+from job_executor.adapter.fs.archive_directory import (
+    ArchiveDirectory,
+    ArchiveRetention,
+)
+from job_executor.common import metrics
+from job_executor.config import environment
+from job_executor.domain.local_storage import get_local_storage
+
+logger = logging.getLogger()
+
+
+def retention_from_environment() -> ArchiveRetention:
+    return ArchiveRetention(
+        max_count=environment.archive_max_count,
+        max_age=(
+            None
+            if environment.archive_max_age_days is None
+            else timedelta(days=environment.archive_max_age_days)
+        ),
+        max_bytes=environment.archive_max_bytes,
+        compress_after=(
+            None
+            if environment.archive_compress_after_days is None
+            else timedelta(days=environment.archive_compress_after_days)
+        ),
+    )
+
+
+def compact_archives(retention: ArchiveRetention) -> None:
+    """
+    Compacts the archive of every datastore on this tenant. A datastore
+    that fails to compact is logged and skipped, and is compacted again
+    on the next run.
+
+    * retention: ArchiveRetention - the limits of the archives
+    """
+    now = datetime.now(UTC).replace(tzinfo=None)
+    for datastore_rdn in datastore_api.get_datastores():
+        local_storage = get_local_storage(datastore_rdn)
+        archive_dir = ArchiveDirectory(local_storage.datastore_dir.archive_dir)
+        try:
+            result = archive_dir.compact(retention, now)
+        except Exception as e:
+            logger.exception(
+                f"Failed to compact the archive of {datastore_rdn}",
+                exc_info=e,
+            )
+            continue
+        metrics.ARCHIVE_BYTES.set(result.bytes_after, datastore=datastore_rdn)
+        if result.deleted_snapshots or result.compressed_files:
+            logger.info(
+                f"Compacted the archive of {datastore_rdn} from "
+                f"{result.bytes_before} to {result.bytes_after} bytes: "
+                f"deleted {result.deleted_snapshots} snapshots and "
+                f"{result.deleted_objects} objects, compressed "
+                f"{result.compressed_files} files"
+            )
@@ -1,8 +1,11 @@
 import logging
+from dataclasses import dataclass
+from pathlib import Path
 
 from job_executor.adapter import datastore_api
-from job_executor.adapter.datastore_api.models import JobStatus
+from job_executor.adapter.datastore_api.models import JobStatus, Operation
 from job_executor.adapter.fs import LocalStorageAdapter
+from job_executor.adapter.fs.models.bump_plan import BumpPlan, ParquetRename
 from job_executor.adapter.fs.models.datastore_versions import (
     DatastoreVersions,
     DataStructureUpdate,
@@ -19,9 +22,11 @@ from job_executor.common.exceptions import (
     UnnecessaryUpdateException,
     VersioningException,
 )
+from job_executor.config import environment
 from job_executor.domain.models import JobContext
 from job_executor.domain.rollback import (
     rollback_bump,
+    rollback_draft_batch,
     rollback_manager_phase_import_job,
 )
 from job_executor.domain.rsa_keys import generate_rsa_key_pair
@@ -50,13 +55,58 @@ class Datastore:
         if self.latest_version_number is None:
             self.metadata_all_latest = None
         else:
-            self.metadata_all_latest = MetadataAll.model_validate(
+            self.metadata_all_latest = (
                 local_storage.datastore_dir.get_metadata_all(
                     self.latest_version_number
                 )
             )
 
 
+# datastore directory -> (stamp of the metadata files, datastore)
+_datastores: dict[Path, tuple[tuple, Datastore]] = {}
+
+
+def _checkout_datastore(local_storage: LocalStorageAdapter) -> Datastore:
+    """
+    Returns the cached Datastore of the local storage if none of its files
+    have changed since it was cached, otherwise reads it from file.
+
+    The datastore is taken out of the cache until it is handed back with
+    _return_datastore. A job that fails half way through never hands back
+    its datastore, so the next job reads the rolled back files instead of
+    the modified objects.
+    """
+    datastore_dir = local_storage.datastore_dir
+    cached = _datastores.pop(datastore_dir.root_dir, None)
+    if cached is not None:
+        stamp, datastore = cached
+        if stamp == datastore_dir.get_metadata_stamp(
+            datastore.latest_version_number
+        ):
+            return datastore
+    return Datastore(local_storage)
+
+
+def _return_datastore(
+    local_storage: LocalStorageAdapter, datastore: Datastore
+) -> None:
+    """
+    Caches a datastore that is consistent with the files it was written to.
+    """
+    datastore_dir = local_storage.datastore_dir
+    _datastores[datastore_dir.root_dir] = (
+        datastore_dir.get_metadata_stamp(datastore.latest_version_number),
+        datastore,
+    )
+
+
+def clear_datastore_cache() -> None:
+    """
+    Forgets all cached datastores.
+    """
+    _datastores.clear()
+
+
 def _get_release_status(datastore: Datastore, dataset_name: str) -> str | None:
     release_status = datastore.draft_version.get_dataset_release_status(
         dataset_name
@@ -76,89 +126,92 @@ def _generate_new_metadata_all(
     new_version: str,
     new_version_metadata: list[Metadata],
 ) -> None:
-    new_metadata_all_dict = datastore.metadata_all_draft.model_dump(
-        by_alias=True, exclude_none=True
+    new_metadata_all = MetadataAll(
+        data_store=datastore.metadata_all_draft.data_store,
+        data_structures=new_version_metadata,
+        languages=datastore.metadata_all_draft.languages,
     )
-    del new_metadata_all_dict["dataStructures"]
-    new_metadata_all_dict["dataStructures"] = [
-        dataset.model_dump(by_alias=True, exclude_none=True)
-        for dataset in new_version_metadata
-    ]
-    new_metadata_all = MetadataAll(**new_metadata_all_dict)
     local_storage.datastore_dir.write_metadata_all(
         new_metadata_all,
         new_version,
     )
-    datastore.metadata_all_latest = (
-        local_storage.datastore_dir.get_metadata_all(new_version)
-    )
+    datastore.metadata_all_latest = new_metadata_all
 
 
-def _version_pending_operations(
+def _plan_bump(
     datastore: Datastore,
     local_storage: LocalStorageAdapter,
     job_id: str,
     release_updates: list[DataStructureUpdate],
     new_version: str,
-) -> tuple[list[Metadata], dict]:
-    logger.info(f"{job_id}: Generating new metadata_all")
-    new_metadata_datasets = (
-        []
+    update_type: str,
+) -> tuple[BumpPlan, list[Metadata], dict]:
+    """
+    Computes every change of a BUMP before any file is changed. Returns the
+    plan of the renames and created files, with the metadata and the
+    data_versions of the new version.
+    """
+    logger.info(f"{job_id}: Planning new metadata_all and data_versions")
+    new_metadata_datasets: dict[str, Metadata] = (
+        {}
         if datastore.metadata_all_latest is None
-        else [ds for ds in datastore.metadata_all_latest]
+        else {ds.name: ds for ds in datastore.metadata_all_latest}
     )
-
-    logger.info(f"{job_id}: Generating new data_versions")
-    latest_data_versions = local_storage.datastore_dir.get_data_versions(
-        datastore.latest_version_number
+    new_data_versions = dict(
+        local_storage.datastore_dir.get_data_versions(
+            datastore.latest_version_number
+        )
     )
-    new_data_versions = {
-        dataset_name: path
-        for dataset_name, path in latest_data_versions.items()
-    }
-    logger.info(f"{job_id}: Versioning each pending operation in BUMP")
+    parquet_renames: list[ParquetRename] = []
     for release_update in release_updates:
         operation = release_update.operation
         dataset_name = release_update.name
         logger.info(
             f"{job_id}: Versioning {dataset_name} with operation {operation}"
         )
-
         if operation == "REMOVE":
-            logger.info(f"{job_id}: Removing from metadata_all")
-            new_metadata_datasets = [
-                dataset
-                for dataset in new_metadata_datasets
-                if dataset.name != dataset_name
-            ]
-            logger.info(f"{job_id}: Removing from data_versions")
+            new_metadata_datasets.pop(dataset_name, None)
             del new_data_versions[dataset_name]
-
         if operation in ["PATCH_METADATA", "CHANGE", "ADD"]:
-            logger.info(f"{job_id}: Renaming metadata file")
-            logger.info(f"{job_id}: Updating metadata into metadata_all")
-            new_metadata_datasets = [
-                dataset
-                for dataset in new_metadata_datasets
-                if dataset.name != dataset_name
-            ]
+            new_metadata_datasets.pop(dataset_name, None)
             updated_dataset = datastore.metadata_all_draft.get(dataset_name)
             if updated_dataset is None:
                 raise NoSuchDraftException(
                     f"Could not find draft metadata for {dataset_name}"
                     " when up versioning the pending operations"
                 )
-            new_metadata_datasets.append(updated_dataset)
+            new_metadata_datasets[dataset_name] = updated_dataset
         if operation in ["ADD", "CHANGE"]:
-            logger.info(
-                f"{job_id}: Renaming data file and updating data_versions"
-            )
-            new_data_versions[dataset_name] = (
-                local_storage.datastore_dir.rename_parquet_draft_to_release(
-                    dataset_name, new_version
-                )
+            parquet_rename = local_storage.datastore_dir.plan_parquet_release(
+                dataset_name, new_version
             )
-    return new_metadata_datasets, new_data_versions
+            parquet_renames.append(parquet_rename)
+            new_data_versions[dataset_name] = parquet_rename.release_name
+    created_files = [
+        local_storage.datastore_dir.get_metadata_all_path(new_version).name
+    ]
+    if update_type in ["MINOR", "MAJOR"]:
+        created_files.append(
+            local_storage.datastore_dir.get_data_versions_path(new_version).name
+        )
+    bump_plan = BumpPlan(
+        version=new_version,
+        update_type=update_type,
+        renames=parquet_renames,
+        created_files=created_files,
+    )
+    return bump_plan, list(new_metadata_datasets.values()), new_data_versions
+
+
+def _delete_working_dir_parquet(
+    local_storage: LocalStorageAdapter, dataset_name: str
+) -> None:
+    """
+    Deletes the built parquet of a failed import, which the rollback has
+    moved back to the working directory.
+    """
+    local_storage.working_dir.delete_file(f"{dataset_name}__DRAFT.parquet")
+    local_storage.working_dir.delete_sub_directory(f"{dataset_name}__DRAFT")
 
 
 def patch_metadata(job_context: JobContext) -> None:
@@ -170,14 +223,15 @@ def patch_metadata(job_context: JobContext) -> None:
     local_storage = job_context.local_storage
     dataset_name = job_context.job.parameters.target
     description = job_context.job.parameters.description
-    datastore = Datastore(local_storage)
+    datastore = _checkout_datastore(local_storage)
     assert description is not None
     if datastore.metadata_all_latest is None:
         raise NoSuchDraftException("There are no released versions to patch")
-    logger.info(f"{job_id}: Saving temporary backup")
-    local_storage.datastore_dir.save_temporary_backup()
-
+    journal = local_storage.datastore_dir.journal
     try:
+        logger.info(f"{job_id}: Opening operation journal")
+        journal.begin(job_id, "PATCH_METADATA", dataset_name)
+
         logger.info(f"{job_id}: importing")
         datastore_api.update_job_status(job_id, JobStatus.IMPORTING)
         dataset_release_status = _get_release_status(datastore, dataset_name)
@@ -194,6 +248,9 @@ def patch_metadata(job_context: JobContext) -> None:
             )
         patched_metadata = released_metadata.patch(draft_metadata)
         datastore.metadata_all_draft.update_one(dataset_name, patched_metadata)
+        journal.record_replace(
+            local_storage.datastore_dir.draft_metadata_all_path
+        )
         local_storage.datastore_dir.write_metadata_all_draft(
             datastore.metadata_all_draft
         )
@@ -205,12 +262,15 @@ def patch_metadata(job_context: JobContext) -> None:
                 release_status="DRAFT",
             )
         )
+        journal.record_replace(local_storage.datastore_dir.draft_version_path)
         local_storage.datastore_dir.write_draft_version(datastore.draft_version)
         logger.info(f"{job_id}: completed")
         datastore_api.update_job_status(job_id, JobStatus.COMPLETED)
-        logger.info(f"{job_id}: Deleting temporary backup")
-        local_storage.datastore_dir.delete_temporary_backup()
+        _return_datastore(local_storage, datastore)
+        logger.info(f"{job_id}: Committing operation journal")
+        journal.commit()
         local_storage.working_dir.delete_metadata(dataset_name)
+        local_storage.working_dir.delete_metrics(dataset_name)
         local_storage.input_dir.delete_archived_importable(dataset_name)
     except PatchingError as e:
         logger.error(f"{job_id}: Patching error occured")
@@ -237,12 +297,14 @@ def add(job_context: JobContext) -> None:
     local_storage = job_context.local_storage
     dataset_name = job_context.job.parameters.target
     description = job_context.job.parameters.description
-    datastore = Datastore(local_storage)
+    datastore = _checkout_datastore(local_storage)
     assert description is not None
 
-    logger.info(f"{job_id}: Saving temporary backup")
-    local_storage.datastore_dir.save_temporary_backup()
+    journal = local_storage.datastore_dir.journal
     try:
+        logger.info(f"{job_id}: Opening operation journal")
+        journal.begin(job_id, "ADD", dataset_name)
+
         logger.info(f"{job_id}: importing")
         datastore_api.update_job_status(job_id, JobStatus.IMPORTING)
         dataset_release_status = _get_release_status(datastore, dataset_name)
@@ -258,24 +320,32 @@ def add(job_context: JobContext) -> None:
                 release_status="DRAFT",
             )
         )
+        journal.record_replace(local_storage.datastore_dir.draft_version_path)
         local_storage.datastore_dir.write_draft_version(datastore.draft_version)
         draft_metadata = local_storage.working_dir.get_metadata(dataset_name)
         local_storage.datastore_dir.make_dataset_dir(dataset_name)
         datastore.metadata_all_draft.add(draft_metadata)
+        journal.record_replace(
+            local_storage.datastore_dir.draft_metadata_all_path
+        )
         local_storage.datastore_dir.write_metadata_all_draft(
             datastore.metadata_all_draft
         )
+        journal.record_move(*local_storage.get_parquet_move_paths(dataset_name))
         local_storage.move_working_dir_parquet_to_datastore(dataset_name)
         logger.info(f"{job_id}: completed")
         datastore_api.update_job_status(job_id, JobStatus.COMPLETED)
-        logger.info(f"{job_id}: Deleting temporary backup")
-        local_storage.datastore_dir.delete_temporary_backup()
+        _return_datastore(local_storage, datastore)
+        logger.info(f"{job_id}: Committing operation journal")
+        journal.commit()
         local_storage.working_dir.delete_metadata(dataset_name)
+        local_storage.working_dir.delete_metrics(dataset_name)
         local_storage.input_dir.delete_archived_importable(dataset_name)
     except Exception as e:
         logger.error(f"{job_id}: An unexpected error occured")
         logger.exception(f"{job_id}: {str(e)}", exc_info=e)
         rollback_manager_phase_import_job(job_context.job, "ADD", dataset_name)
+        _delete_working_dir_parquet(local_storage, dataset_name)
         datastore_api.update_job_status(job_id, JobStatus.FAILED)
 
 
@@ -291,11 +361,12 @@ def change(
     local_storage = job_context.local_storage
     dataset_name = job_context.job.parameters.target
     description = job_context.job.parameters.description
-    datastore = Datastore(local_storage)
+    datastore = _checkout_datastore(local_storage)
     assert description is not None
+    journal = local_storage.datastore_dir.journal
     try:
-        logger.info(f"{job_id}: Saving temporary backup")
-        local_storage.datastore_dir.save_temporary_backup()
+        logger.info(f"{job_id}: Opening operation journal")
+        journal.begin(job_id, "CHANGE", dataset_name)
 
         logger.info(f"{job_id}: importing")
         datastore_api.update_job_status(job_id, JobStatus.IMPORTING)
@@ -307,6 +378,9 @@ def change(
             )
         draft_metadata = local_storage.working_dir.get_metadata(dataset_name)
         datastore.metadata_all_draft.update_one(dataset_name, draft_metadata)
+        journal.record_replace(
+            local_storage.datastore_dir.draft_metadata_all_path
+        )
         local_storage.datastore_dir.write_metadata_all_draft(
             datastore.metadata_all_draft
         )
@@ -318,13 +392,17 @@ def change(
                 release_status="DRAFT",
             )
         )
+        journal.record_replace(local_storage.datastore_dir.draft_version_path)
         local_storage.datastore_dir.write_draft_version(datastore.draft_version)
+        journal.record_move(*local_storage.get_parquet_move_paths(dataset_name))
         local_storage.move_working_dir_parquet_to_datastore(dataset_name)
         logger.info(f"{job_id}: completed")
         datastore_api.update_job_status(job_id, JobStatus.COMPLETED)
-        logger.info(f"{job_id}: Deleting temporary backup")
-        local_storage.datastore_dir.delete_temporary_backup()
+        _return_datastore(local_storage, datastore)
+        logger.info(f"{job_id}: Committing operation journal")
+        journal.commit()
         local_storage.working_dir.delete_metadata(dataset_name)
+        local_storage.working_dir.delete_metrics(dataset_name)
         local_storage.input_dir.delete_archived_importable(dataset_name)
     except Exception as e:
         logger.error(f"{job_id}: An unexpected error occured")
@@ -332,6 +410,7 @@ def change(
         rollback_manager_phase_import_job(
             job_context.job, "CHANGE", dataset_name
         )
+        _delete_working_dir_parquet(local_storage, dataset_name)
         datastore_api.update_job_status(job_id, JobStatus.FAILED)
 
 
@@ -346,7 +425,7 @@ def remove(
     local_storage = job_context.local_storage
     dataset_name = job_context.job.parameters.target
     description = job_context.job.parameters.description
-    datastore = Datastore(local_storage)
+    datastore = _checkout_datastore(local_storage)
     assert description is not None
     logger.info(f"{job_id}: initiated")
     datastore_api.update_job_status(job_id, JobStatus.INITIATED)
@@ -388,20 +467,35 @@ def remove(
         local_storage.datastore_dir.write_draft_version(datastore.draft_version)
         datastore_api.update_job_status(job_id, JobStatus.COMPLETED)
         logger.info(f"{job_id}: completed")
+    _return_datastore(local_storage, datastore)
 
 
-def delete_draft(
-    job_context: JobContext, rollback_remove: bool = False
-) -> None:
+@dataclass
+class _DraftJobResult:
+    status: JobStatus
+    log: str | None = None
+    changed_draft_version: bool = False
+    changed_metadata_all_draft: bool = False
+    parquet_draft_to_delete: str | None = None
+
+
+def _report_draft_job_result(job_id: str, result: _DraftJobResult) -> None:
+    if result.log is None:
+        datastore_api.update_job_status(job_id, result.status)
+    else:
+        datastore_api.update_job_status(job_id, result.status, result.log)
+
+
+def _delete_draft_from_datastore(
+    datastore: Datastore,
+    job_id: str,
+    dataset_name: str,
+    rollback_remove: bool,
+) -> _DraftJobResult:
     """
-    Delete a dataset from the draft version of the datastore.
+    Deletes the draft of a dataset from the datastore objects without
+    writing them to file.
     """
-    job_id = job_context.job.job_id
-    local_storage = job_context.local_storage
-    dataset_name = job_context.job.parameters.target
-    datastore = Datastore(local_storage)
-    logger.info(f"{job_id}: initiated")
-    datastore_api.update_job_status(job_id, JobStatus.INITIATED)
     dataset_is_draft = datastore.draft_version.contains(dataset_name)
     dataset_operation = datastore.draft_version.get_dataset_operation(
         dataset_name
@@ -409,15 +503,13 @@ def delete_draft(
     if dataset_operation != "REMOVE" and rollback_remove:
         log_message = f"{dataset_name} is not scheduled for removal"
         logger.error(f"{job_id}: {log_message}")
-        datastore_api.update_job_status(job_id, JobStatus.FAILED, log_message)
-        return
+        return _DraftJobResult(JobStatus.FAILED, log_message)
     if (not dataset_is_draft) or (
         dataset_operation == "REMOVE" and not rollback_remove
     ):
         log_message = f'Draft not found for dataset name: "{dataset_name}"'
         logger.error(f"{job_id}: {log_message}")
-        datastore_api.update_job_status(job_id, JobStatus.FAILED, log_message)
-        return
+        return _DraftJobResult(JobStatus.FAILED, log_message)
     # If dataset has previously released data/metadata that needs to
     # be restored
     if dataset_operation in ["CHANGE", "PATCH_METADATA", "REMOVE"]:
@@ -433,19 +525,84 @@ def delete_draft(
             raise VersioningException(log_message)
         datastore.metadata_all_draft.remove(dataset_name)
         datastore.metadata_all_draft.add(released_metadata)
-        local_storage.datastore_dir.write_metadata_all_draft(
-            datastore.metadata_all_draft
-        )
     if dataset_operation == "ADD":
         datastore.metadata_all_draft.remove(dataset_name)
+    datastore.draft_version.delete_draft(dataset_name)
+    return _DraftJobResult(
+        JobStatus.COMPLETED,
+        changed_draft_version=True,
+        changed_metadata_all_draft=True,
+        parquet_draft_to_delete=(
+            dataset_name if dataset_operation in ["ADD", "CHANGE"] else None
+        ),
+    )
+
+
+def _set_release_status_in_datastore(
+    datastore: Datastore, job_id: str, dataset_name: str, new_status: str
+) -> _DraftJobResult:
+    """
+    Sets the release status of a draft in the datastore objects without
+    writing them to file.
+    """
+    try:
+        datastore.draft_version.set_draft_release_status(
+            dataset_name, new_status
+        )
+        return _DraftJobResult(JobStatus.COMPLETED, changed_draft_version=True)
+    except UnnecessaryUpdateException as e:
+        logger.exception(f"{job_id}: {str(e)}", exc_info=e)
+        return _DraftJobResult(JobStatus.COMPLETED, f"{e}")
+    except NoSuchDraftException as e:
+        logger.exception(f"{job_id}: {str(e)}", exc_info=e)
+        return _DraftJobResult(JobStatus.FAILED, f"{e}")
+
+
+def _apply_draft_job(
+    datastore: Datastore, job_context: JobContext
+) -> _DraftJobResult:
+    job = job_context.job
+    operation = job.parameters.operation
+    if operation == Operation.SET_STATUS:
+        assert job.parameters.release_status is not None
+        return _set_release_status_in_datastore(
+            datastore,
+            job.job_id,
+            job.parameters.target,
+            job.parameters.release_status,
+        )
+    return _delete_draft_from_datastore(
+        datastore,
+        job.job_id,
+        job.parameters.target,
+        rollback_remove=operation == Operation.ROLLBACK_REMOVE,
+    )
+
+
+def delete_draft(
+    job_context: JobContext, rollback_remove: bool = False
+) -> None:
+    """
+    Delete a dataset from the draft version of the datastore.
+    """
+    job_id = job_context.job.job_id
+    local_storage = job_context.local_storage
+    dataset_name = job_context.job.parameters.target
+    datastore = _checkout_datastore(local_storage)
+    logger.info(f"{job_id}: initiated")
+    datastore_api.update_job_status(job_id, JobStatus.INITIATED)
+    result = _delete_draft_from_datastore(
+        datastore, job_id, dataset_name, rollback_remove
+    )
+    if result.status == JobStatus.COMPLETED:
         local_storage.datastore_dir.write_metadata_all_draft(
             datastore.metadata_all_draft
         )
-    if dataset_operation in ["ADD", "CHANGE"]:
-        local_storage.datastore_dir.delete_parquet_draft(dataset_name)
-    datastore.draft_version.delete_draft(dataset_name)
-    local_storage.datastore_dir.write_draft_version(datastore.draft_version)
-    datastore_api.update_job_status(job_id, JobStatus.COMPLETED)
+        if result.parquet_draft_to_delete is not None:
+            local_storage.datastore_dir.delete_parquet_draft(dataset_name)
+        local_storage.datastore_dir.write_draft_version(datastore.draft_version)
+    _report_draft_job_result(job_id, result)
+    _return_datastore(local_storage, datastore)
 
 
 def set_draft_release_status(job_context: JobContext) -> None:
@@ -456,24 +613,110 @@ def set_draft_release_status(job_context: JobContext) -> None:
     local_storage = job_context.local_storage
     new_status = job_context.job.parameters.release_status
     dataset_name = job_context.job.parameters.target
-    datastore = Datastore(local_storage)
+    datastore = _checkout_datastore(local_storage)
     assert new_status is not None
-    try:
-        logger.info(f"{job_id}: initiated")
-        datastore_api.update_job_status(job_id, JobStatus.INITIATED)
-        datastore.draft_version.set_draft_release_status(
-            dataset_name, new_status
-        )
+    logger.info(f"{job_id}: initiated")
+    datastore_api.update_job_status(job_id, JobStatus.INITIATED)
+    result = _set_release_status_in_datastore(
+        datastore, job_id, dataset_name, new_status
+    )
+    if result.changed_draft_version:
         local_storage.datastore_dir.write_draft_version(datastore.draft_version)
-        datastore_api.update_job_status(job_id, JobStatus.COMPLETED)
-        logger.info(f"{job_id}: completed")
-    except UnnecessaryUpdateException as e:
-        datastore_api.update_job_status(job_id, JobStatus.COMPLETED, f"{e}")
-        logger.exception(f"{job_id}: {str(e)}", exc_info=e)
+    _report_draft_job_result(job_id, result)
+    if result.status == JobStatus.COMPLETED:
         logger.info(f"{job_id}: completed")
-    except NoSuchDraftException as e:
-        logger.exception(f"{job_id}: {str(e)}", exc_info=e)
-        datastore_api.update_job_status(job_id, JobStatus.FAILED, f"{e}")
+    _return_datastore(local_storage, datastore)
+
+
+BATCHED_OPERATIONS = [
+    Operation.SET_STATUS,
+    Operation.DELETE_DRAFT,
+    Operation.ROLLBACK_REMOVE,
+]
+
+
+def run_draft_batch(job_contexts: list[JobContext]) -> None:
+    """
+    Runs a batch of queued SET_STATUS, DELETE_DRAFT and ROLLBACK_REMOVE
+    jobs for the same datastore. The jobs are applied in order to one
+    Datastore, the draft files are written once and the status of each
+    job is reported after the batch is written. Every job reports
+    INITIATED before its final status, as when it runs on its own.
+
+    If a job in the batch raises, nothing has been written yet, and the
+    jobs are run one at a time instead. If writing the batch fails, the
+    draft files are restored from the temporary backup and every job in
+    the batch fails.
+    """
+    local_storage = job_contexts[0].local_storage
+    job_ids = [job_context.job.job_id for job_context in job_contexts]
+    datastore = _checkout_datastore(local_storage)
+    logger.info(f"Running {len(job_contexts)} jobs in batch: {job_ids}")
+    results: list[_DraftJobResult] = []
+    try:
+        for job_context in job_contexts:
+            results.append(_apply_draft_job(datastore, job_context))
+    except Exception as e:
+        logger.exception(
+            "Could not run jobs in batch, running them one at a time",
+            exc_info=e,
+        )
+        for job_context in job_contexts:
+            if job_context.job.parameters.operation == Operation.SET_STATUS:
+                set_draft_release_status(job_context)
+            else:
+                delete_draft(
+                    job_context,
+                    rollback_remove=(
+                        job_context.job.parameters.operation
+                        == Operation.ROLLBACK_REMOVE
+                    ),
+                )
+        return
+
+    # Reported once the batch can run, as the jobs that are run one at a
+    # time report it themselves
+    for job_id in job_ids:
+        logger.info(f"{job_id}: initiated in batch")
+        datastore_api.update_job_status(job_id, JobStatus.INITIATED)
+    changed_draft_version = any(r.changed_draft_version for r in results)
+    changed_metadata_all_draft = any(
+        r.changed_metadata_all_draft for r in results
+    )
+    if changed_draft_version or changed_metadata_all_draft:
+        logger.info("Saving temporary backup for batch")
+        local_storage.datastore_dir.save_temporary_backup()
+        try:
+            if changed_metadata_all_draft:
+                local_storage.datastore_dir.write_metadata_all_draft(
+                    datastore.metadata_all_draft
+                )
+            if changed_draft_version:
+                local_storage.datastore_dir.write_draft_version(
+                    datastore.draft_version
+                )
+        except Exception as e:
+            logger.error(f"Failed to write batch of jobs {job_ids}")
+            logger.exception(e)
+            rollback_draft_batch(
+                [job_context.job for job_context in job_contexts]
+            )
+            for job_id in job_ids:
+                datastore_api.update_job_status(
+                    job_id, JobStatus.FAILED, "Failed to write batch of jobs"
+                )
+            return
+        logger.info("Deleting temporary backup for batch")
+        local_storage.datastore_dir.delete_temporary_backup()
+        for result in results:
+            if result.parquet_draft_to_delete is not None:
+                local_storage.datastore_dir.delete_parquet_draft(
+                    result.parquet_draft_to_delete
+                )
+    for job_id, result in zip(job_ids, results):
+        _report_draft_job_result(job_id, result)
+        logger.info(f"{job_id}: completed in batch")
+    _return_datastore(local_storage, datastore)
 
 
 def bump_version(job_context: JobContext) -> None:
@@ -485,7 +728,7 @@ def bump_version(job_context: JobContext) -> None:
     bump_manifesto = job_context.job.parameters.bump_manifesto
     local_storage = job_context.local_storage
     description = job_context.job.parameters.description
-    datastore = Datastore(local_storage)
+    datastore = _checkout_datastore(local_storage)
     assert bump_manifesto is not None
     assert description is not None
     logger.info(f"{job_id}: Saving temporary backup")
@@ -504,6 +747,7 @@ def bump_version(job_context: JobContext) -> None:
             datastore_api.update_job_status(
                 job_id, JobStatus.FAILED, log_message
             )
+            _return_datastore(local_storage, datastore)
             logger.info(f"{job_id}: Archiving temporary backup")
             local_storage.datastore_dir.archive_temporary_backup()
             return
@@ -515,26 +759,37 @@ def bump_version(job_context: JobContext) -> None:
 
         logger.info(f"{job_id}: Release pending operations from draft_version")
         release_updates, update_type = datastore.draft_version.release_pending()
-        local_storage.datastore_dir.write_draft_version(datastore.draft_version)
         # If there are no released versions update type is MAJOR
         if datastore.metadata_all_latest is None:
             update_type = "MAJOR"
         new_version = datastore.datastore_versions.add_new_release_version(
             release_updates, description, update_type
         )
-        local_storage.datastore_dir.write_datastore_versions(
-            datastore.datastore_versions
-        )
         logger.info(
             f"{job_id}: "
             f"Bumping from {datastore.latest_version_number} => {new_version}"
             f"({update_type})",
         )
-        (
-            new_metadata_datasets,
-            new_data_versions,
-        ) = _version_pending_operations(
-            datastore, local_storage, job_id, release_updates, new_version
+        bump_plan, new_metadata_datasets, new_data_versions = _plan_bump(
+            datastore,
+            local_storage,
+            job_id,
+            release_updates,
+            new_version,
+            update_type,
+        )
+        logger.info(f"{job_id}: Journaling bump plan")
+        local_storage.datastore_dir.write_bump_plan(bump_plan)
+
+        local_storage.datastore_dir.write_draft_version(datastore.draft_version)
+        local_storage.datastore_dir.write_datastore_versions(
+            datastore.datastore_versions
+        )
+        logger.info(
+            f"{job_id}: Releasing {len(bump_plan.renames)} parquet drafts"
+        )
+        local_storage.datastore_dir.release_parquet_drafts(
+            bump_plan.renames, environment.bump_max_workers
         )
         if update_type in ["MINOR", "MAJOR"]:
             logger.info(f"{job_id}: Writing new data_versions to file")
@@ -559,6 +814,7 @@ def bump_version(job_context: JobContext) -> None:
         )
         logger.info(f"{job_id}: completed BUMP")
         datastore_api.update_job_status(job_id, JobStatus.COMPLETED)
+        _return_datastore(local_storage, datastore)
         logger.info(f"{job_id}: Archiving temporary backup")
         local_storage.datastore_dir.archive_temporary_backup()
     except Exception as e:
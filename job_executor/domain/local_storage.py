@@ -0,0 +1,66 @@
+import logging
+import threading
+from time import monotonic
+
+from job_executor.adapter import datastore_api
+from job_executor.adapter.fs import LocalStorageAdapter
+
+LOCAL_STORAGE_TTL = 3600.0  # seconds to reuse a datastore directory
+
+logger = logging.getLogger()
+
+# datastore rdn -> (time of lookup, local storage of the datastore)
+_local_storages: dict[str, tuple[float, LocalStorageAdapter]] = {}
+_lock = threading.Lock()
+
+
+def get_local_storage(datastore_rdn: str) -> LocalStorageAdapter:
+    """
+    Returns the local storage of the datastore with the given rdn. The
+    directory of the datastore is looked up in the datastore api, and
+    reused for LOCAL_STORAGE_TTL seconds, until it is invalidated or until
+    the directory no longer exists.
+
+    * datastore_rdn: str - rdn of the datastore
+    """
+    with _lock:
+        cached = _local_storages.get(datastore_rdn)
+    if cached is not None and monotonic() - cached[0] < LOCAL_STORAGE_TTL:
+        if cached[1].datastore_dir.root_dir.is_dir():
+            return cached[1]
+        logger.info(
+            f"Directory of datastore {datastore_rdn} is gone, "
+            "looking it up again"
+        )
+    local_storage = LocalStorageAdapter(
+        datastore_api.get_datastore_directory(datastore_rdn), datastore_rdn
+    )
+    with _lock:
+        _local_storages[datastore_rdn] = (monotonic(), local_storage)
+    return local_storage
+
+
+def invalidate_local_storage(datastore_rdn: str | None = None) -> None:
+    """
+    Forgets the cached local storage of the datastore with the given rdn,
+    or of all datastores if no rdn is given.
+
+    * datastore_rdn: str | None - rdn of the datastore
+    """
+    with _lock:
+        if datastore_rdn is None:
+            _local_storages.clear()
+        else:
+            _local_storages.pop(datastore_rdn, None)
+
+
+def warm_local_storage_cache() -> list[str]:
+    """
+    Looks up the local storage of every datastore on this tenant.
+    Returns the rdns of the datastores.
+    """
+    datastore_rdns = datastore_api.get_datastores()
+    for datastore_rdn in datastore_rdns:
+        get_local_storage(datastore_rdn)
+    logger.info(f"Cached the directories of {len(datastore_rdns)} datastores")
+    return datastore_rdns
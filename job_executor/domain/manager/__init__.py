@@ -1,6 +1,7 @@
 import logging
 from multiprocessing import Process, Queue
 from threading import Thread
+from time import monotonic, perf_counter
 
 from job_executor.adapter import datastore_api
 from job_executor.adapter.datastore_api.models import (
@@ -8,13 +9,22 @@ from job_executor.adapter.datastore_api.models import (
     JobStatus,
     Operation,
 )
+from job_executor.adapter.fs.archive_directory import ArchiveRetention
+from job_executor.common import metrics
 from job_executor.config.log import initialize_logging_thread
-from job_executor.domain import datastores, rollback
+from job_executor.domain import archive, datastores, rollback
+from job_executor.domain.local_storage import get_local_storage
 from job_executor.domain.models import JobContext, build_job_context
 from job_executor.domain.worker import (
     build_dataset_worker,
     build_metadata_worker,
 )
+from job_executor.domain.worker.memory_model import (
+    JobFeatures,
+    WorkerMemoryModel,
+    get_job_features,
+)
+from job_executor.domain.worker.metrics import WorkerMetrics
 from job_executor.domain.worker.models import Worker
 
 logger = logging.getLogger()
@@ -27,35 +37,57 @@ class Manager:
     can be done in parallel, or by making changes to the datastore directly.
 
     It ensures that the common workload of the application does not exceed
-    memory limits, and makes sure that the sub-process workers lifetimes
-    are handled appropriately and that their logs are piped to the main
-    process.
+    memory limits, by reserving the peak memory that the memory model
+    predicts for each worker, and makes sure that the sub-process workers
+    lifetimes are handled appropriately and that their logs are piped to
+    the main process.
     """
 
     max_workers: int
     max_bytes_all_workers: int
     logging_queue: Queue
     logging_thread: Thread
+    archive_retention: ArchiveRetention | None
+    archive_compaction_interval: float
+    archive_compaction_thread: Thread | None
+    archive_compaction_started_at: float | None
+    memory_model: WorkerMemoryModel
 
     def __init__(
         self,
         max_workers: int,
         max_bytes_all_workers: int,
+        archive_retention: ArchiveRetention | None = None,
+        archive_compaction_interval: float = 3600.0,
+        memory_model: WorkerMemoryModel | None = None,
     ) -> None:
         """
         :param default_max_workers: The maximum number of workers
         :param max_gb_all_workers: Threshold in GB (50) for when the number
         of workers are reduced
+        :param archive_retention: Limits of the datastore archives, the
+        archives are not compacted if None
+        :param archive_compaction_interval: Seconds between the start of
+        each compaction of the datastore archives
+        :param memory_model: Predicts the peak memory of each worker, a
+        model that only learns in memory is used if None
         """
         self.max_workers = max_workers
         self.max_bytes_all_workers = max_bytes_all_workers
+        self.memory_model = memory_model or WorkerMemoryModel()
+        self.archive_retention = archive_retention
+        self.archive_compaction_interval = archive_compaction_interval
+        self.archive_compaction_thread = None
+        self.archive_compaction_started_at = None
         self.workers: list[Worker] = []
         self.logging_queue, self.log_thread = initialize_logging_thread()
+        metrics.MAX_WORKERS.set(max_workers)
+        metrics.MAX_WORKER_BYTES.set(max_bytes_all_workers)
 
     @property
     def current_total_size(self) -> int:
         return sum(
-            worker.job_size
+            worker.reserved_bytes
             for worker in self.workers
             if worker and worker.is_alive()
         )
@@ -63,18 +95,96 @@ class Manager:
     def can_spawn_new_worker(self, new_job_size: int) -> bool:
         """
         Called to check if a new worker can be spawned.
+
+        :param new_job_size: The predicted peak memory of the new worker
         """
         alive_workers = [worker for worker in self.workers if worker.is_alive()]
         if len(alive_workers) >= self.max_workers:
             return False
-        if self.current_total_size + new_job_size >= self.max_bytes_all_workers:
+        if self.current_total_size + new_job_size > self.max_bytes_all_workers:
             return False
         return True
 
+    def sample_worker_rss(self) -> None:
+        """
+        Samples the RSS of the live workers through /proc. A worker that
+        has outgrown its predicted peak reserves its sampled peak instead.
+        """
+        rss_bytes = [
+            worker.sample_rss() for worker in self.workers if worker.is_alive()
+        ]
+        metrics.WORKER_RSS_BYTES.set(
+            sum(sample for sample in rss_bytes if sample is not None)
+        )
+
+    def predict_peak_bytes(self, job_context: JobContext) -> JobFeatures:
+        """
+        Predicts the peak memory of a worker for the job, and sets it on
+        the job context. A prediction above the memory of all workers is
+        capped, so that the job can still run alone.
+        """
+        features = get_job_features(job_context)
+        job_context.predicted_peak_bytes = min(
+            self.memory_model.predict(features), self.max_bytes_all_workers
+        )
+        return features
+
+    def _record_worker_peak(self, worker: Worker) -> None:
+        """
+        Teaches the memory model the peak of a worker that built its
+        dataset. The peak is read from the metrics the worker wrote, as the
+        sampled RSS may have missed it. Workers that failed do not write
+        metrics, and are only recorded if they were killed by a signal.
+        Their sampled RSS is then recorded as a lower bound of their peak.
+        """
+        if worker.features is None:
+            return
+        local_storage = get_local_storage(worker.datastore_rdn)
+        worker_metrics = local_storage.working_dir.get_metrics(
+            worker.dataset_name
+        )
+        if worker_metrics is not None:
+            self.memory_model.record_peak(
+                worker.job_id,
+                worker.features,
+                worker.predicted_peak_bytes,
+                max(
+                    WorkerMetrics.model_validate(worker_metrics).peak_rss_bytes
+                    or 0,
+                    worker.peak_rss_bytes,
+                ),
+            )
+            return
+        exitcode = worker.process.exitcode
+        if exitcode is not None and exitcode < 0 and worker.peak_rss_bytes:
+            self.memory_model.record_peak(
+                worker.job_id,
+                worker.features,
+                worker.predicted_peak_bytes,
+                worker.peak_rss_bytes,
+                lower_bound=True,
+            )
+
+    def worker_sentinels(self) -> list[int]:
+        """
+        Returns the sentinels of the registered worker processes. A sentinel
+        becomes ready when its process exits.
+        """
+        return [worker.sentinel for worker in self.workers]
+
     def unregister_worker(self, job_id: str) -> None:
         """
         Called when a worker finishes or fails.
         """
+        for worker in self.workers:
+            if worker.job_id == job_id:
+                try:
+                    self._record_worker_peak(worker)
+                except Exception as e:
+                    logger.exception(
+                        f"{job_id} Failed to record the peak of its worker",
+                        exc_info=e,
+                    )
         self.workers = [
             worker for worker in self.workers if worker.job_id != job_id
         ]
@@ -99,9 +209,51 @@ class Manager:
                         f"Worker died and did not finish job {job.job_id}"
                     )
                     rollback.fix_interrupted_job(job)
+                if dead_worker.started_at is not None:
+                    metrics.JOB_DURATION.observe(
+                        perf_counter() - dead_worker.started_at,
+                        operation=dead_worker.operation,
+                        phase="worker",
+                    )
                 self.unregister_worker(dead_worker.job_id)
 
-    def _handle_worker_job(self, job_context: JobContext) -> None:
+    def compact_archives_in_background(self) -> None:
+        """
+        Starts a compaction of the datastore archives in a background
+        thread, unless one is still running or the last one started less
+        than archive_compaction_interval seconds ago. The compaction only
+        touches archived files, so jobs are handled while it runs.
+        """
+        if self.archive_retention is None:
+            return
+        if (
+            self.archive_compaction_thread is not None
+            and self.archive_compaction_thread.is_alive()
+        ):
+            return
+        if (
+            self.archive_compaction_started_at is not None
+            and monotonic() - self.archive_compaction_started_at
+            < self.archive_compaction_interval
+        ):
+            return
+        self.archive_compaction_started_at = monotonic()
+        self.archive_compaction_thread = Thread(
+            target=archive.compact_archives,
+            args=(self.archive_retention,),
+            name="archive-compaction",
+            daemon=True,
+        )
+        self.archive_compaction_thread.start()
+
+    def _update_worker_metrics(self) -> None:
+        alive_workers = [worker for worker in self.workers if worker.is_alive()]
+        metrics.LIVE_WORKERS.set(len(alive_workers))
+        metrics.WORKER_BYTES.set(self.current_total_size)
+
+    def _handle_worker_job(
+        self, job_context: JobContext, features: JobFeatures | None = None
+    ) -> None:
         job_id = job_context.job.job_id
         operation = job_context.job.parameters.operation
         assert job_context.job_size is not None
@@ -116,6 +268,11 @@ class Manager:
                 ),
                 job_id=job_id,
                 job_size=job_context.job_size,
+                operation=operation,
+                dataset_name=job_context.job.parameters.target,
+                datastore_rdn=job_context.job.datastore_rdn,
+                features=features,
+                predicted_peak_bytes=job_context.predicted_peak_bytes,
             )
             self.workers.append(worker)
             datastore_api.update_job_status(job_id, JobStatus.INITIATED)
@@ -131,6 +288,11 @@ class Manager:
                 ),
                 job_id=job_id,
                 job_size=job_context.job_size,
+                operation=operation,
+                dataset_name=job_context.job.parameters.target,
+                datastore_rdn=job_context.job.datastore_rdn,
+                features=features,
+                predicted_peak_bytes=job_context.predicted_peak_bytes,
             )
             self.workers.append(worker)
             datastore_api.update_job_status(job_id, JobStatus.INITIATED)
@@ -176,8 +338,23 @@ class Manager:
                 log="Unknown operation for job",
             )
 
-    def handle_jobs(self, job_query_result: JobQueryResult) -> None:
+    def handle_jobs(self, job_query_result: JobQueryResult) -> int:
+        """
+        Handles the jobs of a query for jobs. Returns the number of jobs
+        that were handled, failed or handed off to a worker. Queued worker
+        jobs that wait for a free worker are not counted.
+        """
+        handled_jobs = 0
         self.clean_up_after_dead_workers()
+        self.sample_worker_rss()
+        self.compact_archives_in_background()
+        metrics.QUEUED_JOBS.set(
+            len(job_query_result.queued_worker_jobs), queue="worker"
+        )
+        metrics.QUEUED_JOBS.set(len(job_query_result.built_jobs), queue="built")
+        metrics.QUEUED_JOBS.set(
+            len(job_query_result.queued_manager_jobs), queue="manager"
+        )
         if job_query_result.available_jobs_count:
             logger.info(
                 f"Found {len(job_query_result.queued_worker_jobs)}"
@@ -196,6 +373,7 @@ class Manager:
                     JobStatus.FAILED,
                     log="No such dataset available for import",
                 )
+                handled_jobs += 1
                 continue  # skip futher processing of this job
             if job_context.job_size > self.max_bytes_all_workers:
                 logger.warning(
@@ -206,23 +384,61 @@ class Manager:
                     JobStatus.FAILED,
                     log="Dataset too large for import",
                 )
+                handled_jobs += 1
                 continue  # skip futher processing of this job
-            if self.can_spawn_new_worker(job_context.job_size):
-                self._handle_worker_job(job_context)
+            features = self.predict_peak_bytes(job_context)
+            assert job_context.predicted_peak_bytes is not None
+            if self.can_spawn_new_worker(job_context.predicted_peak_bytes):
+                self._handle_worker_job(job_context, features)
+                handled_jobs += 1
+        self._update_worker_metrics()
 
+        # Batchable jobs are held back per datastore until a job that can
+        # not be batched is found for the same datastore, so that the jobs
+        # of each datastore still run in the order they were queued.
+        batches: dict[str, list[JobContext]] = {}
         for job in job_query_result.queued_manager_and_built_jobs():
             job_context = build_job_context(job, "manager")
-            try:
-                self._handle_manager_job(job_context)
-            except Exception as exc:
-                # All exceptions that occur during the handling of a job
-                # are resolved by rolling back. The exceptions that
-                # reach here are exceptions raised by the rollback.
-                logger.exception(
-                    f"{job.job_id} failed and could not roll back",
-                    exc_info=exc,
-                )
-                raise exc
+            if job.parameters.operation in datastores.BATCHED_OPERATIONS:
+                batches.setdefault(job.datastore_rdn, []).append(job_context)
+                continue
+            batch = batches.pop(job.datastore_rdn, [])
+            if batch:
+                handled_jobs += self._handle_manager_batch(batch)
+            handled_jobs += self._handle_manager_batch([job_context])
+        for batch in batches.values():
+            handled_jobs += self._handle_manager_batch(batch)
+        return handled_jobs
+
+    def _handle_manager_batch(self, job_contexts: list[JobContext]) -> int:
+        """
+        Handles a single manager job, or a batch of jobs for the same
+        datastore. Returns the number of jobs that were handled.
+        """
+        first_job = job_contexts[0].job
+        operation = (
+            first_job.parameters.operation
+            if len(job_contexts) == 1
+            else "BATCH"
+        )
+        try:
+            with metrics.JOB_DURATION.time(
+                operation=operation, phase="manager"
+            ):
+                if len(job_contexts) == 1:
+                    self._handle_manager_job(job_contexts[0])
+                else:
+                    datastores.run_draft_batch(job_contexts)
+            return len(job_contexts)
+        except Exception as exc:
+            # All exceptions that occur during the handling of a job
+            # are resolved by rolling back. The exceptions that
+            # reach here are exceptions raised by the rollback.
+            logger.exception(
+                f"{first_job.job_id} failed and could not roll back",
+                exc_info=exc,
+            )
+            raise exc
 
     def close_logging_thread(self) -> None:
         if self.logging_queue is not None:
@@ -0,0 +1,45 @@
+from multiprocessing.connection import wait
+
+
+class PollScheduler:
+    """
+    Decides how long the main loop waits between each query for jobs.
+
+    The interval starts at min_interval and is doubled for every poll that
+    found no work, up to max_interval. It is reset to min_interval as soon
+    as a poll finds work. A worker process that exits ends the wait early,
+    so that its built job is picked up without waiting out the interval.
+    """
+
+    min_interval: float
+    max_interval: float
+    interval: float
+
+    def __init__(self, min_interval: float, max_interval: float) -> None:
+        """
+        :param min_interval: Seconds to wait between polls while busy
+        :param max_interval: Maximum seconds to wait between polls while idle
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = min_interval
+
+    def wait(self, worker_sentinels: list[int]) -> bool:
+        """
+        Waits for the current interval, or until one of the worker processes
+        exits. Returns True if the wait was ended by a worker exiting.
+
+        :param worker_sentinels: sentinels of the running worker processes
+        """
+        return len(wait(worker_sentinels, timeout=self.interval)) > 0
+
+    def record_poll(self, found_work: bool) -> None:
+        """
+        Adjusts the interval after a poll.
+
+        :param found_work: True if the poll started or handled any jobs
+        """
+        if found_work:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
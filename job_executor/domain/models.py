@@ -1,9 +1,9 @@
 from dataclasses import dataclass
 from typing import Literal
 
-from job_executor.adapter import datastore_api
 from job_executor.adapter.datastore_api.models import Job
 from job_executor.adapter.fs import LocalStorageAdapter
+from job_executor.domain.local_storage import get_local_storage
 
 handler_type = Literal["worker"] | Literal["manager"]
 
@@ -14,13 +14,11 @@ class JobContext:
     handler: handler_type
     local_storage: LocalStorageAdapter
     job_size: int | None = None
+    predicted_peak_bytes: int | None = None
 
 
 def build_job_context(job: Job, handler: handler_type) -> JobContext:
-    local_storage = LocalStorageAdapter(
-        datastore_api.get_datastore_directory(job.datastore_rdn),
-        job.datastore_rdn,
-    )
+    local_storage = get_local_storage(job.datastore_rdn)
     job_size = (
         local_storage.input_dir.get_importable_tar_size_in_bytes(
             job.parameters.target
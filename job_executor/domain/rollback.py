@@ -10,6 +10,7 @@ from job_executor.adapter.datastore_api.models import (
     JobStatus,
 )
 from job_executor.adapter.fs import LocalStorageAdapter
+from job_executor.adapter.fs.models.bump_plan import BumpPlan
 from job_executor.adapter.fs.models.datastore_versions import (
     bump_dotted_version_number,
     dotted_to_underscored_version,
@@ -20,109 +21,146 @@ from job_executor.common.exceptions import (
     RollbackException,
     StartupException,
 )
+from job_executor.common.metrics import ROLLBACKS
 from job_executor.config import environment
+from job_executor.domain.local_storage import get_local_storage
 
 logger = logging.getLogger()
 
 
-def rollback_bump(job: Job, bump_manifesto: DatastoreVersion) -> None:
-    job_id = job.job_id
-    local_storage = LocalStorageAdapter(
-        datastore_api.get_datastore_directory(job.datastore_rdn),
-        job.datastore_rdn,
+def _rollback_bump_plan(
+    job_id: str, local_storage: LocalStorageAdapter, bump_plan: BumpPlan
+) -> None:
+    """
+    Reverts the renames and created files in the journaled plan of a BUMP.
+    Only what the plan lists is touched, and changes that were never made
+    or are already reverted are skipped, so this can run again if the
+    rollback itself is interrupted.
+    """
+    logger.info(
+        f"{job_id}: Reverting {len(bump_plan.renames)} parquet files "
+        f"released in bump to {bump_plan.version}"
     )
-    try:
-        logger.info(f"{job_id}: Restoring files from temporary backup")
-        restored_version_number = (
-            local_storage.datastore_dir.restore_from_temporary_backup()
-        )
-        bumped_version_number = "1.0.0.0"
-        update_type = bump_manifesto.update_type
-        if restored_version_number is not None:
-            assert update_type is not None
-            bumped_version_number = bump_dotted_version_number(
-                underscored_to_dotted_version(restored_version_number),
-                update_type,
-            )
-        else:
-            update_type = "MAJOR"
-        logger.warning(
-            f"{job_id}: Rolling back to {restored_version_number} "
-            f"from bump to {bumped_version_number}"
-        )
-        bumped_version_metadata = dotted_to_underscored_version(
-            bumped_version_number
+    local_storage.datastore_dir.revert_parquet_releases(
+        bump_plan.renames, environment.bump_max_workers
+    )
+    for file_name in bump_plan.created_files:
+        file_path = local_storage.datastore_dir.metadata_dir / file_name
+        if file_path.exists():
+            logger.info(f"{job_id}: Deleting {file_path}")
+            os.remove(file_path)
+
+
+def _rollback_bump_from_manifesto(
+    job_id: str,
+    local_storage: LocalStorageAdapter,
+    bump_manifesto: DatastoreVersion,
+    restored_version_number: str | None,
+) -> None:
+    """
+    Reverts a BUMP that was interrupted before its plan was journaled, by
+    deriving the file names it may have created from the bump manifesto.
+    """
+    bumped_version_number = "1.0.0.0"
+    update_type = bump_manifesto.update_type
+    if restored_version_number is not None:
+        assert update_type is not None
+        bumped_version_number = bump_dotted_version_number(
+            underscored_to_dotted_version(restored_version_number),
+            update_type,
         )
-        bumped_version_data = "_".join(bumped_version_metadata.split("_")[:-1])
-        manifesto_datasets = [
-            dataset.name
-            for dataset in bump_manifesto.data_structure_updates
-            if dataset.release_status != "DRAFT"
-        ]
+    else:
+        update_type = "MAJOR"
+    logger.warning(
+        f"{job_id}: Rolling back to {restored_version_number} "
+        f"from bump to {bumped_version_number}"
+    )
+    bumped_version_metadata = dotted_to_underscored_version(
+        bumped_version_number
+    )
+    bumped_version_data = "_".join(bumped_version_metadata.split("_")[:-1])
+    manifesto_datasets = [
+        dataset.name
+        for dataset in bump_manifesto.data_structure_updates
+        if dataset.release_status != "DRAFT"
+    ]
+    logger.info(
+        f"{job_id}: Found {len(manifesto_datasets)}  datasets in bump_manifesto"
+    )
+
+    logger.info(f"{job_id}: Removing generated datastore files")
+    datastore_info_dir = local_storage.datastore_dir.metadata_dir
+
+    # No new data version has been built if update type was PATCH
+    if update_type in ["MAJOR", "MINOR"]:
         logger.info(
-            f"{job_id}: Found {len(manifesto_datasets)} "
-            " datasets in bump_manifesto"
+            f"{job_id}: Update type was {update_type}: "
+            f"Deleting data_versions__{bumped_version_data}"
         )
+        data_versions_path = (
+            datastore_info_dir / f"data_versions__{bumped_version_data}.json"
+        )
+        if data_versions_path.exists():
+            logger.info(f"{job_id}: Deleting {data_versions_path}")
+            os.remove(data_versions_path)
 
-        logger.info(f"{job_id}: Removing generated datastore files")
-        datastore_info_dir = local_storage.datastore_dir.metadata_dir
+    metadata_all_path = (
+        datastore_info_dir / f"metadata_all__{bumped_version_metadata}.json"
+    )
+    if metadata_all_path.exists():
+        logger.info(f"{job_id}: Deleting {metadata_all_path}")
+        os.remove(metadata_all_path)
 
-        # No new data version has been built if update type was PATCH
+    logger.info(f"{job_id}: Reverting back to DRAFT for dataset files")
+    for dataset in manifesto_datasets:
         if update_type in ["MAJOR", "MINOR"]:
             logger.info(
-                f"{job_id}: Update type was {update_type}: "
-                f"Deleting data_versions__{bumped_version_data}"
+                f"{job_id}: Update type is {update_type}. "
+                f"Reverting {dataset} data file to DRAFT"
             )
-            data_versions_path = (
-                datastore_info_dir
-                / f"data_versions__{bumped_version_data}.json"
+            dataset_data_dir: Path = (
+                local_storage.datastore_dir.data_dir / dataset
             )
-            if data_versions_path.exists():
-                logger.info(f"{job_id}: Deleting {data_versions_path}")
-                os.remove(data_versions_path)
-
-        metadata_all_path = (
-            datastore_info_dir / f"metadata_all__{bumped_version_metadata}.json"
-        )
-        if metadata_all_path.exists():
-            logger.info(f"{job_id}: Deleting {metadata_all_path}")
-            os.remove(metadata_all_path)
-
-        logger.info(f"{job_id}: Reverting back to DRAFT for dataset files")
-        for dataset in manifesto_datasets:
-            if update_type in ["MAJOR", "MINOR"]:
+            partitioned_data_path: Path = (
+                dataset_data_dir / f"{dataset}__{bumped_version_data}"
+            )
+            if partitioned_data_path.exists():
                 logger.info(
-                    f"{job_id}: Update type is {update_type}. "
-                    f"Reverting {dataset} data file to DRAFT"
+                    f"{job_id}: Renaming {partitioned_data_path} back to draft"
                 )
-                dataset_data_dir: Path = (
-                    local_storage.datastore_dir.data_dir / dataset
+                shutil.move(
+                    partitioned_data_path,
+                    dataset_data_dir / f"{dataset}__DRAFT",
                 )
-                partitioned_data_path: Path = (
-                    dataset_data_dir / f"{dataset}__{bumped_version_data}"
+            else:
+                data_path = (
+                    dataset_data_dir
+                    / f"{dataset}__{bumped_version_data}.parquet"
                 )
-                if partitioned_data_path.exists():
-                    logger.info(
-                        f"{job_id}: Renaming {partitioned_data_path} "
-                        "back to draft"
-                    )
+                if data_path.exists():
+                    logger.info(f"{job_id}: Renaming {data_path} back to draft")
                     shutil.move(
-                        partitioned_data_path,
-                        dataset_data_dir / f"{dataset}__DRAFT",
-                    )
-                else:
-                    data_path = (
-                        dataset_data_dir
-                        / f"{dataset}__{bumped_version_data}.parquet"
+                        data_path,
+                        dataset_data_dir / f"{dataset}__DRAFT.parquet",
                     )
-                    if data_path.exists():
-                        logger.info(
-                            f"{job_id}: Renaming {data_path} back to draft"
-                        )
-                        shutil.move(
-                            data_path,
-                            dataset_data_dir / f"{dataset}__DRAFT.parquet",
-                        )
+
+
+def rollback_bump(job: Job, bump_manifesto: DatastoreVersion) -> None:
+    job_id = job.job_id
+    ROLLBACKS.inc(rollback="bump", operation="BUMP")
+    local_storage = get_local_storage(job.datastore_rdn)
+    try:
+        bump_plan = local_storage.datastore_dir.get_bump_plan()
+        if bump_plan is not None:
+            _rollback_bump_plan(job_id, local_storage, bump_plan)
+        logger.info(f"{job_id}: Restoring files from temporary backup")
+        restored_version_number = (
+            local_storage.datastore_dir.restore_from_temporary_backup()
+        )
+        if bump_plan is None:
+            _rollback_bump_from_manifesto(
+                job_id, local_storage, bump_manifesto, restored_version_number
+            )
         logger.info(f"{job_id}: Deleting temporary backup")
         local_storage.datastore_dir.archive_temporary_backup()
     except LocalStorageError as e:
@@ -138,10 +176,8 @@ def rollback_worker_phase_import_job(
     job: Job, operation: str, dataset_name: str
 ) -> None:
     job_id = job.job_id
-    local_storage = LocalStorageAdapter(
-        datastore_api.get_datastore_directory(job.datastore_rdn),
-        job.datastore_rdn,
-    )
+    local_storage = get_local_storage(job.datastore_rdn)
+    ROLLBACKS.inc(rollback="worker_phase", operation=operation)
     logger.warning(
         f"{job_id}: Rolling back worker job "
         f'with target: "{dataset_name}" and operation "{operation}"'
@@ -149,6 +185,7 @@ def rollback_worker_phase_import_job(
     generated_metadata_files = [
         f"{dataset_name}.json",
         f"{dataset_name}__DRAFT.json",
+        f"{dataset_name}__DRAFT.metrics.json",
     ]
     generated_data_files = [
         f"{dataset_name}.db",
@@ -195,24 +232,65 @@ def rollback_manager_phase_import_job(
     if a rollback fails.
     """
     job_id = job.job_id
-    local_storage = LocalStorageAdapter(
-        datastore_api.get_datastore_directory(job.datastore_rdn),
-        job.datastore_rdn,
-    )
+    local_storage = get_local_storage(job.datastore_rdn)
+    ROLLBACKS.inc(rollback="manager_phase", operation=operation)
     logger.warning(
         f"{job_id}: Rolling back import job "
         f'with target: "{dataset_name}" and operation "{operation}"'
     )
-    logger.info(f"{job_id}: Restoring files from temporary backup")
-    local_storage.datastore_dir.restore_from_temporary_backup()
+    datastore_dir = local_storage.datastore_dir
+    open_transaction = datastore_dir.journal.open_transaction()
+    if open_transaction is not None and open_transaction["jobId"] == job_id:
+        logger.info(f"{job_id}: Undoing file changes from operation journal")
+        datastore_dir.undo_journal()
+    elif open_transaction is None and datastore_dir.temporary_backup_exists():
+        # Imports that were interrupted before they were journaled. The
+        # backup is not from this job if another job has an open journal
+        logger.info(f"{job_id}: Restoring files from temporary backup")
+        datastore_dir.restore_from_temporary_backup()
+        if operation in ["ADD", "CHANGE"]:
+            logger.info(f"{job_id}: Deleting data file/directory")
+            datastore_dir.delete_parquet_draft(dataset_name)
+        logger.info(f"{job_id}: Deleting temporary backup")
+        datastore_dir.archive_temporary_backup()
+    else:
+        logger.info(f"{job_id}: No file changes to roll back")
 
-    if operation in ["ADD", "CHANGE"]:
-        logger.info(f"{job_id}: Deleting data file/directory")
-        local_storage.datastore_dir.delete_parquet_draft(dataset_name)
-    logger.info(f"{job_id}: Deleting temporary backup")
+
+def rollback_draft_batch(jobs: list[Job]) -> None:
+    """
+    Rolls back a batch of draft jobs that failed while writing the draft
+    files. Exceptions are not handled here on purpose. It is a catastrophic
+    thing if a rollback fails.
+    """
+    job_ids = [job.job_id for job in jobs]
+    local_storage = get_local_storage(jobs[0].datastore_rdn)
+    ROLLBACKS.inc(rollback="draft_batch", operation="BATCH")
+    logger.warning(f"Rolling back batch of jobs {job_ids}")
+    logger.info("Restoring files from temporary backup")
+    local_storage.datastore_dir.restore_from_temporary_backup()
+    logger.info("Deleting temporary backup")
     local_storage.datastore_dir.archive_temporary_backup()
 
 
+def resolve_operation_journal(datastore_rdn: str) -> None:
+    """
+    Resolves a transaction that was left open in the operation journal of
+    the datastore. Runs at startup after fix_interrupted_jobs, which undoes
+    the transactions of the jobs that were interrupted. A transaction that
+    is still open belongs to a job that was reported as completed before
+    its transaction was committed, so it is committed.
+    """
+    journal = get_local_storage(datastore_rdn).datastore_dir.journal
+    open_transaction = journal.open_transaction()
+    if open_transaction is not None:
+        logger.warning(
+            f"{open_transaction['jobId']}: Committing operation journal of "
+            f"completed {open_transaction['operation']} job"
+        )
+        journal.commit()
+
+
 def fix_interrupted_jobs() -> None:
     logger.info("Querying for interrupted jobs")
     in_progress_jobs = datastore_api.get_jobs(ignore_completed=True)
@@ -313,6 +391,7 @@ def fix_interrupted_job(job: Job) -> None:
 
 
 def rollback_generate_rsa_keys_job(job: Job) -> None:
+    ROLLBACKS.inc(rollback="rsa_keys", operation="GENERATE_RSA_KEYS")
     rdn = job.datastore_rdn
     target_dir = Path(environment.private_keys_dir) / rdn
     private_key_location = target_dir / "microdata_private_key.pem"
@@ -4,13 +4,16 @@ from multiprocessing import Queue
 from pathlib import Path
 from time import perf_counter
 
-from job_executor.adapter import datastore_api
+from pyarrow import dataset
+
 from job_executor.adapter.datastore_api.models import JobStatus
 from job_executor.adapter.fs import LocalStorageAdapter
 from job_executor.common.exceptions import BuilderStepError, HttpResponseError
 from job_executor.config import environment
 from job_executor.config.log import configure_worker_logger
 from job_executor.domain.models import JobContext
+from job_executor.domain.worker.metrics import WorkerMetrics
+from job_executor.domain.worker.status_reporter import StatusReporter
 from job_executor.domain.worker.steps import (
     dataset_decryptor,
     dataset_partitioner,
@@ -29,6 +32,13 @@ def _clean_working_dir(
         f"{dataset_name}_pseudonymized.parquet"
     )
     local_storage.working_dir.delete_sub_directory(dataset_name)
+    local_storage.working_dir.delete_file(f"{dataset_name}__DRAFT.parquet")
+    local_storage.working_dir.delete_sub_directory(f"{dataset_name}__DRAFT")
+    local_storage.working_dir.delete_metrics(dataset_name)
+
+
+def _count_rows(parquet_path: Path) -> int:
+    return dataset.dataset(parquet_path).count_rows()
 
 
 def _dataset_requires_pseudonymization(input_metadata: dict) -> bool:
@@ -51,6 +61,12 @@ def run_worker(job_context: JobContext, logging_queue: Queue) -> None:
     local_storage = job_context.local_storage
     dataset_name = job_context.job.parameters.target
     datastore_rdn = job_context.job.datastore_rdn
+    metrics = WorkerMetrics(
+        job_id=job_id,
+        dataset_name=dataset_name,
+        predicted_peak_rss_bytes=job_context.predicted_peak_bytes,
+    )
+    status_reporter = StatusReporter(job_id)
     try:
         configure_worker_logger(logging_queue, job_id)
         logger.info(
@@ -58,77 +74,96 @@ def run_worker(job_context: JobContext, logging_queue: Queue) -> None:
             f"{dataset_name} and job {job_id}"
         )
         local_storage.input_dir.archive_importable(dataset_name)
-        datastore_api.update_job_status(job_id, JobStatus.DECRYPTING)
-        dataset_decryptor.unpackage(
-            dataset_name,
-            local_storage.input_dir.path,
-            local_storage.working_dir.path,
-            Path(environment.private_keys_dir) / datastore_rdn,
-        )
-        datastore_api.update_job_status(job_id, JobStatus.VALIDATING)
-        (data_file_name, _) = dataset_validator.run_for_dataset(
-            dataset_name, local_storage.working_dir.path
-        )
+        status_reporter.update_status(JobStatus.DECRYPTING)
+        with metrics.measure("decrypt"):
+            dataset_decryptor.unpackage(
+                dataset_name,
+                local_storage.input_dir.path,
+                local_storage.working_dir.path,
+                Path(environment.private_keys_dir) / datastore_rdn,
+            )
+        status_reporter.update_status(JobStatus.VALIDATING)
+        with metrics.measure("validate") as step_metrics:
+            (data_file_name, _) = dataset_validator.run_for_dataset(
+                dataset_name, local_storage.working_dir.path
+            )
+            step_metrics.row_count = _count_rows(
+                local_storage.working_dir.path / data_file_name
+            )
         input_metadata = local_storage.working_dir.get_input_metadata(
             dataset_name
         )
         description = input_metadata["dataRevision"]["description"][0]["value"]
-        datastore_api.update_description(job_id, description)
+        status_reporter.update_description(description)
 
         local_storage.working_dir.delete_sub_directory(dataset_name)
-        datastore_api.update_job_status(job_id, JobStatus.TRANSFORMING)
-        transformed_metadata = dataset_transformer.run(input_metadata)
-        local_storage.working_dir.write_metadata(
-            dataset_name, transformed_metadata
-        )
+        status_reporter.update_status(JobStatus.TRANSFORMING)
+        with metrics.measure("transform"):
+            transformed_metadata = dataset_transformer.run(input_metadata)
+            local_storage.working_dir.write_metadata(
+                dataset_name, transformed_metadata
+            )
         local_storage.working_dir.delete_input_metadata(dataset_name)
 
         temporality_type = transformed_metadata.temporality
+        partitioned = temporality_type in ["STATUS", "ACCUMULATED"]
+        draft_path = local_storage.working_dir.path / (
+            f"{dataset_name}__DRAFT"
+            if partitioned
+            else f"{dataset_name}__DRAFT.parquet"
+        )
         if _dataset_requires_pseudonymization(input_metadata):
-            datastore_api.update_job_status(job_id, JobStatus.PSEUDONYMIZING)
-            pre_pseudo_data_file_name = data_file_name
-            data_file_name = dataset_pseudonymizer.run(
-                local_storage.working_dir.path / data_file_name,
-                transformed_metadata,
-                job_id,
-            )
-            local_storage.working_dir.delete_file(pre_pseudo_data_file_name)
-
-        datastore_api.update_job_status(job_id, JobStatus.PARTITIONING)
-        if temporality_type in ["STATUS", "ACCUMULATED"]:
-            dataset_partitioner.run(
-                local_storage.working_dir.path / data_file_name, dataset_name
-            )
+            # Pseudonymizes and partitions in a single rewrite of the data
+            status_reporter.update_status(JobStatus.PSEUDONYMIZING)
+            with metrics.measure("pseudonymize") as step_metrics:
+                dataset_pseudonymizer.run(
+                    local_storage.working_dir.path / data_file_name,
+                    transformed_metadata,
+                    job_id,
+                    pseudonym_cache=local_storage.pseudonym_cache_dir,
+                    output_path=draft_path,
+                    partitioned=partitioned,
+                )
+                step_metrics.row_count = _count_rows(draft_path)
             local_storage.working_dir.delete_file(data_file_name)
         else:
-            target_path = (
-                local_storage.working_dir.path
-                / f"{dataset_name}__DRAFT.parquet"
-            )
-            os.rename(
-                local_storage.working_dir.path / data_file_name,
-                target_path,
-            )
+            status_reporter.update_status(JobStatus.PARTITIONING)
+            if partitioned:
+                with metrics.measure("partition") as step_metrics:
+                    dataset_partitioner.run(
+                        local_storage.working_dir.path / data_file_name,
+                        dataset_name,
+                    )
+                    step_metrics.row_count = _count_rows(draft_path)
+                local_storage.working_dir.delete_file(data_file_name)
+            else:
+                with metrics.measure("move") as step_metrics:
+                    os.rename(
+                        local_storage.working_dir.path / data_file_name,
+                        draft_path,
+                    )
+                    step_metrics.row_count = _count_rows(draft_path)
+        local_storage.working_dir.write_metrics(
+            dataset_name, metrics.model_dump(by_alias=True)
+        )
         local_storage.input_dir.delete_archived_importable(dataset_name)
-        datastore_api.update_job_status(job_id, JobStatus.BUILT)
+        status_reporter.update_status(JobStatus.BUILT)
         logger.info("Dataset built successfully")
     except BuilderStepError as e:
         logger.error(str(e))
         _clean_working_dir(local_storage, dataset_name)
-        datastore_api.update_job_status(job_id, JobStatus.FAILED, log=str(e))
+        status_reporter.update_status(JobStatus.FAILED, log=str(e))
     except HttpResponseError as e:
         logger.error(str(e))
         _clean_working_dir(local_storage, dataset_name)
-        datastore_api.update_job_status(
-            job_id,
+        status_reporter.update_status(
             JobStatus.FAILED,
             log="Failed due to communication errors in platform",
         )
     except Exception as e:
         logger.exception(e)
         _clean_working_dir(local_storage, dataset_name)
-        datastore_api.update_job_status(
-            job_id,
+        status_reporter.update_status(
             JobStatus.FAILED,
             log="Unexpected error when building dataset",
         )
@@ -139,3 +174,4 @@ def run_worker(job_context: JobContext, logging_queue: Queue) -> None:
             f"{dataset_name} and job {job_id} "
             f"done in {delta:.2f} seconds"
         )
+        status_reporter.close()
@@ -3,13 +3,14 @@ from multiprocessing import Queue
 from pathlib import Path
 from time import perf_counter
 
-from job_executor.adapter import datastore_api
 from job_executor.adapter.datastore_api.models import JobStatus
 from job_executor.adapter.fs import LocalStorageAdapter
 from job_executor.common.exceptions import BuilderStepError, HttpResponseError
 from job_executor.config import environment
 from job_executor.config.log import configure_worker_logger
 from job_executor.domain.models import JobContext
+from job_executor.domain.worker.metrics import WorkerMetrics
+from job_executor.domain.worker.status_reporter import StatusReporter
 from job_executor.domain.worker.steps import (
     dataset_decryptor,
     dataset_transformer,
@@ -23,6 +24,7 @@ def _clean_working_dir(
     local_storage.working_dir.delete_metadata(dataset_name)
     local_storage.working_dir.delete_sub_directory(dataset_name)
     local_storage.working_dir.delete_file(dataset_name)
+    local_storage.working_dir.delete_metrics(dataset_name)
 
 
 def run_worker(job_context: JobContext, logging_queue: Queue) -> None:
@@ -32,6 +34,12 @@ def run_worker(job_context: JobContext, logging_queue: Queue) -> None:
     local_storage = job_context.local_storage
     dataset_name = job_context.job.parameters.target
     datastore_rdn = job_context.job.datastore_rdn
+    metrics = WorkerMetrics(
+        job_id=job_id,
+        dataset_name=dataset_name,
+        predicted_peak_rss_bytes=job_context.predicted_peak_bytes,
+    )
+    status_reporter = StatusReporter(job_id)
     try:
         configure_worker_logger(logging_queue, job_id)
         logger.info(
@@ -39,45 +47,50 @@ def run_worker(job_context: JobContext, logging_queue: Queue) -> None:
             f"{dataset_name} and job {job_id}"
         )
         local_storage.input_dir.archive_importable(dataset_name)
-        datastore_api.update_job_status(job_id, JobStatus.DECRYPTING)
-        dataset_decryptor.unpackage(
-            dataset_name,
-            local_storage.input_dir.path,
-            local_storage.working_dir.path,
-            Path(environment.private_keys_dir) / datastore_rdn,
-        )
-        datastore_api.update_job_status(job_id, JobStatus.VALIDATING)
-        dataset_validator.run_for_metadata(
-            dataset_name,
-            local_storage.working_dir.path,
-        )
+        status_reporter.update_status(JobStatus.DECRYPTING)
+        with metrics.measure("decrypt"):
+            dataset_decryptor.unpackage(
+                dataset_name,
+                local_storage.input_dir.path,
+                local_storage.working_dir.path,
+                Path(environment.private_keys_dir) / datastore_rdn,
+            )
+        status_reporter.update_status(JobStatus.VALIDATING)
+        with metrics.measure("validate"):
+            dataset_validator.run_for_metadata(
+                dataset_name,
+                local_storage.working_dir.path,
+            )
         input_metadata = local_storage.working_dir.get_input_metadata(
             dataset_name
         )
 
         description = input_metadata["dataRevision"]["description"][0]["value"]
-        datastore_api.update_description(job_id, description)
+        status_reporter.update_description(description)
         local_storage.working_dir.delete_sub_directory(dataset_name)
 
-        datastore_api.update_job_status(job_id, JobStatus.TRANSFORMING)
-        transformed_metadata_json = dataset_transformer.run(input_metadata)
-        local_storage.working_dir.write_metadata(
-            dataset_name, transformed_metadata_json
-        )
+        status_reporter.update_status(JobStatus.TRANSFORMING)
+        with metrics.measure("transform"):
+            transformed_metadata_json = dataset_transformer.run(input_metadata)
+            local_storage.working_dir.write_metadata(
+                dataset_name, transformed_metadata_json
+            )
 
         local_storage.working_dir.delete_input_metadata(dataset_name)
+        local_storage.working_dir.write_metrics(
+            dataset_name, metrics.model_dump(by_alias=True)
+        )
         local_storage.input_dir.delete_archived_importable(dataset_name)
-        datastore_api.update_job_status(job_id, JobStatus.BUILT)
+        status_reporter.update_status(JobStatus.BUILT)
     except BuilderStepError as e:
         error_message = "Failed during building metdata"
         logger.exception(error_message, exc_info=e)
         _clean_working_dir(local_storage, dataset_name)
-        datastore_api.update_job_status(job_id, JobStatus.FAILED, log=str(e))
+        status_reporter.update_status(JobStatus.FAILED, log=str(e))
     except HttpResponseError as e:
         logger.exception(e)
         _clean_working_dir(local_storage, dataset_name)
-        datastore_api.update_job_status(
-            job_id,
+        status_reporter.update_status(
             JobStatus.FAILED,
             log="Failed due to communication errors in platform",
         )
@@ -85,8 +98,7 @@ def run_worker(job_context: JobContext, logging_queue: Queue) -> None:
         error_message = "Unknown error when building metadata"
         logger.exception(error_message, exc_info=e)
         _clean_working_dir(local_storage, dataset_name)
-        datastore_api.update_job_status(
-            job_id,
+        status_reporter.update_status(
             JobStatus.FAILED,
             log="Unexpected exception when building dataset",
         )
@@ -96,3 +108,4 @@ def run_worker(job_context: JobContext, logging_queue: Queue) -> None:
             f"Metadata worker for dataset {dataset_name} and job {job_id}"
             f" done in {delta:.2f} seconds"
         )
+        status_reporter.close()
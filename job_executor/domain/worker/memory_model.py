@@ -0,0 +1,258 @@
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from job_executor.adapter.fs.atomic_files import write_atomic
+from job_executor.common.models import CamelModel
+from job_executor.domain.models import JobContext
+
+logger = logging.getLogger()
+
+MAX_OBSERVATIONS_PER_KEY = 20
+# Jobs with less input than this do not determine the expansion
+MIN_EXPANSION_INPUT_BYTES = 64 * 1024**2
+
+
+@dataclass(frozen=True)
+class JobFeatures:
+    """
+    What is known about a worker job before it starts, used to predict
+    the peak memory of its worker. The column count and temporality are
+    None if the input metadata could not be read.
+    """
+
+    operation: str
+    input_bytes: int
+    column_count: int | None = None
+    temporality: str | None = None
+
+    @property
+    def keys(self) -> list[str]:
+        """
+        The keys that observations of the job are recorded under, from the
+        most to the least specific. Column counts are bucketed by powers of
+        two, so that similar datasets share their observations.
+        """
+        keys = [self.operation]
+        if self.temporality is not None:
+            keys.insert(0, f"{self.operation}/{self.temporality}")
+            if self.column_count is not None:
+                keys.insert(
+                    0,
+                    f"{self.operation}/{self.temporality}"
+                    f"/{self.column_count.bit_length()}",
+                )
+        return keys
+
+
+def get_job_features(job_context: JobContext) -> JobFeatures:
+    """
+    Returns the features of a worker job from the size of its input tar
+    and the input metadata that is packaged unencrypted in the tar.
+    """
+    dataset_name = job_context.job.parameters.target
+    input_dir = job_context.local_storage.input_dir
+    metadata = input_dir.get_importable_metadata(dataset_name)
+    column_count = None
+    temporality = None
+    if metadata is not None:
+        column_count = sum(
+            len(metadata.get(variables) or [])
+            for variables in [
+                "identifierVariables",
+                "measureVariables",
+                "attributeVariables",
+            ]
+        )
+        temporality = metadata.get("temporalityType")
+    return JobFeatures(
+        operation=job_context.job.parameters.operation,
+        input_bytes=job_context.job_size or 0,
+        column_count=column_count,
+        temporality=temporality,
+    )
+
+
+def _least_squares_slope(points: list[tuple[int, int]]) -> float:
+    """
+    Returns the slope of the least squares line through the points. The
+    points must have at least two different x values.
+    """
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / sum(
+        (x - mean_x) ** 2 for x, _ in points
+    )
+
+
+class PeakObservation(CamelModel):
+    job_id: str
+    input_bytes: int
+    predicted_peak_bytes: int
+    peak_rss_bytes: int
+    lower_bound: bool = False
+
+
+class MemoryModelState(CamelModel):
+    observations: dict[str, list[PeakObservation]] = {}
+
+
+class WorkerMemoryModel:
+    """
+    Predicts the peak RSS of a worker from the peaks of earlier workers.
+
+    A peak is modelled as a base footprint plus an expansion of the input
+    bytes, fitted to the observations of the most specific key of the job
+    features that has observations. The expansion is fitted by least
+    squares to the observations with at least MIN_EXPANSION_INPUT_BYTES
+    of input, if they have different input sizes. Otherwise it is the
+    highest expansion above the lowest peak of the smaller jobs, or
+    default_expansion if there are no larger jobs. The base is the lowest
+    that covers every observed peak with that expansion. Observations
+    that are only a lower bound of the peak, from workers that were
+    killed, can raise the expansion but not the base. A prediction is
+    never lower than the input bytes.
+
+    Each observation keeps the prediction next to the measured peak. The
+    last MAX_OBSERVATIONS_PER_KEY observations of every key are kept in
+    the json file at path, or only in memory if path is None.
+    """
+
+    path: Path | None
+    default_expansion: float
+    state: MemoryModelState
+
+    def __init__(
+        self, path: Path | None = None, default_expansion: float = 1.0
+    ) -> None:
+        """
+        :param path: The json file to keep the observations in
+        :param default_expansion: The expansion of jobs with no observations
+        """
+        self.path = path
+        self.default_expansion = default_expansion
+        self.state = MemoryModelState()
+        if path is not None and path.is_file():
+            try:
+                self.state = MemoryModelState.model_validate_json(
+                    path.read_bytes()
+                )
+            except (OSError, ValidationError) as e:
+                logger.warning(
+                    f"Ignoring unreadable worker memory model {path}: {e}"
+                )
+
+    def _fit(self, observations: list[PeakObservation]) -> tuple[int, float]:
+        """
+        Returns the base bytes and the expansion fitted to the observations
+        of a key.
+        """
+        measured = [
+            (observation.input_bytes, observation.peak_rss_bytes)
+            for observation in observations
+            if not observation.lower_bound
+        ]
+        large = [
+            (input_bytes, peak_bytes)
+            for input_bytes, peak_bytes in measured
+            if input_bytes >= MIN_EXPANSION_INPUT_BYTES
+        ]
+        if len({input_bytes for input_bytes, _ in large}) > 1:
+            expansion = _least_squares_slope(large)
+        elif large:
+            small_base_bytes = min(
+                (
+                    peak_bytes
+                    for input_bytes, peak_bytes in measured
+                    if input_bytes < MIN_EXPANSION_INPUT_BYTES
+                ),
+                default=0,
+            )
+            expansion = max(
+                (peak_bytes - small_base_bytes) / input_bytes
+                for input_bytes, peak_bytes in large
+            )
+        else:
+            expansion = self.default_expansion
+        expansion = max(expansion, 0.0)
+        base_bytes = max(
+            [
+                peak_bytes - int(expansion * input_bytes)
+                for input_bytes, peak_bytes in measured
+            ]
+            + [0]
+        )
+        for observation in observations:
+            if observation.lower_bound and (
+                base_bytes + int(expansion * observation.input_bytes)
+                < observation.peak_rss_bytes
+            ):
+                expansion = (observation.peak_rss_bytes - base_bytes) / max(
+                    observation.input_bytes, MIN_EXPANSION_INPUT_BYTES
+                )
+        return base_bytes, expansion
+
+    def predict(self, features: JobFeatures) -> int:
+        """
+        Returns the predicted peak RSS in bytes of a worker for the job.
+        """
+        base_bytes = 0
+        expansion = self.default_expansion
+        for key in features.keys:
+            observations = self.state.observations.get(key)
+            if observations:
+                base_bytes, expansion = self._fit(observations)
+                break
+        return max(
+            base_bytes + int(expansion * features.input_bytes),
+            features.input_bytes,
+        )
+
+    def record_peak(
+        self,
+        job_id: str,
+        features: JobFeatures,
+        predicted_peak_bytes: int,
+        peak_rss_bytes: int,
+        lower_bound: bool = False,
+    ) -> None:
+        """
+        Records the measured peak RSS of a worker next to its prediction,
+        and saves the observations if the model has a path. If lower_bound
+        is True, the worker was killed and peaked at least that high.
+        """
+        observation = PeakObservation(
+            job_id=job_id,
+            input_bytes=features.input_bytes,
+            predicted_peak_bytes=predicted_peak_bytes,
+            peak_rss_bytes=peak_rss_bytes,
+            lower_bound=lower_bound,
+        )
+        for key in features.keys:
+            observations = self.state.observations.setdefault(key, [])
+            observations.append(observation)
+            del observations[:-MAX_OBSERVATIONS_PER_KEY]
+        logger.info(
+            f"{job_id}: Worker peaked at {peak_rss_bytes} bytes"
+            f"{' before it was killed' if lower_bound else ''}, "
+            f"predicted {predicted_peak_bytes} bytes",
+            extra={
+                "metrics": {
+                    "operation": features.operation,
+                    "columnCount": features.column_count,
+                    "temporality": features.temporality,
+                    **observation.model_dump(by_alias=True),
+                }
+            },
+        )
+        if self.path is not None:
+            try:
+                write_atomic(
+                    self.path, self.state.model_dump_json(by_alias=True)
+                )
+            except OSError as e:
+                logger.warning(
+                    f"Failed to save worker memory model {self.path}: {e}"
+                )
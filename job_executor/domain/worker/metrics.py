@@ -0,0 +1,126 @@
+import logging
+import os
+import resource
+from collections.abc import Iterator
+from contextlib import contextmanager
+from time import perf_counter
+
+from job_executor.adapter import pseudonym_service
+from job_executor.common.models import CamelModel
+
+logger = logging.getLogger()
+
+
+class StepMetrics(CamelModel):
+    step: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_bytes: int | None = None
+    bytes_read: int | None = None
+    bytes_written: int | None = None
+    row_count: int | None = None
+    pseudonym_service_requests: int = 0
+
+
+class WorkerMetrics(CamelModel):
+    job_id: str
+    dataset_name: str
+    predicted_peak_rss_bytes: int | None = None
+    steps: list[StepMetrics] = []
+
+    @property
+    def wall_seconds(self) -> float:
+        return sum(step.wall_seconds for step in self.steps)
+
+    @property
+    def peak_rss_bytes(self) -> int | None:
+        peaks = [
+            step.peak_rss_bytes
+            for step in self.steps
+            if step.peak_rss_bytes is not None
+        ]
+        return max(peaks) if peaks else None
+
+    @contextmanager
+    def measure(self, step: str) -> Iterator[StepMetrics]:
+        """
+        Measures the resources used by the worker process while running
+        the body of the with-statement, and logs them as a structured
+        record when it exits. The row count can be set on the yielded
+        StepMetrics by the caller.
+
+        * step: str - name of the step being measured
+        """
+        step_metrics = StepMetrics(step=step)
+        _reset_peak_rss()
+        io_before = _read_process_io()
+        requests_before = pseudonym_service.get_request_count()
+        cpu_before = _cpu_seconds()
+        start = perf_counter()
+        try:
+            yield step_metrics
+        finally:
+            step_metrics.wall_seconds = perf_counter() - start
+            step_metrics.cpu_seconds = _cpu_seconds() - cpu_before
+            step_metrics.peak_rss_bytes = _peak_rss_bytes()
+            step_metrics.pseudonym_service_requests = (
+                pseudonym_service.get_request_count() - requests_before
+            )
+            io_after = _read_process_io()
+            if io_before is not None and io_after is not None:
+                step_metrics.bytes_read = io_after["rchar"] - io_before["rchar"]
+                step_metrics.bytes_written = (
+                    io_after["wchar"] - io_before["wchar"]
+                )
+            self.steps.append(step_metrics)
+            logger.info(
+                f"Step {step} done in {step_metrics.wall_seconds:.2f} seconds",
+                extra={"metrics": step_metrics.model_dump(by_alias=True)},
+            )
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return (
+        times.user + times.system + times.children_user + times.children_system
+    )
+
+
+def _read_process_io() -> dict[str, int] | None:
+    """
+    Returns the I/O counters of this process, or None where /proc is
+    unavailable. rchar and wchar count all bytes passed through read and
+    write calls, whether or not they were served from the page cache.
+    """
+    try:
+        with open("/proc/self/io", encoding="utf-8") as f:
+            return {
+                key: int(value)
+                for key, value in (line.split(":") for line in f)
+            }
+    except OSError:
+        return None
+
+
+def _reset_peak_rss() -> None:
+    """
+    Resets the peak RSS of this process to its current RSS, so that the
+    peak can be attributed to a single step. If this is not permitted the
+    peak will be that of the process lifetime.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="utf-8") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_bytes() -> int:
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
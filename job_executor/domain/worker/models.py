@@ -1,18 +1,87 @@
 from multiprocessing import Process
+from time import perf_counter
+
+from job_executor.domain.worker.memory_model import JobFeatures
+
+
+def _read_rss_bytes(pid: int) -> int | None:
+    """
+    Returns the current RSS of the process, or None if the process has
+    exited or /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
 
 
 class Worker:
     job_id: str
     job_size: int
     process: Process
+    operation: str
+    started_at: float | None
+    dataset_name: str
+    datastore_rdn: str
+    features: JobFeatures | None
+    predicted_peak_bytes: int
+    peak_rss_bytes: int
 
-    def __init__(self, process: Process, job_id: str, job_size: int) -> None:
+    def __init__(
+        self,
+        process: Process,
+        job_id: str,
+        job_size: int,
+        operation: str = "",
+        dataset_name: str = "",
+        datastore_rdn: str = "",
+        features: JobFeatures | None = None,
+        predicted_peak_bytes: int | None = None,
+    ) -> None:
         self.process = process
         self.job_id = job_id
         self.job_size = job_size
+        self.operation = operation
+        self.started_at = None
+        self.dataset_name = dataset_name
+        self.datastore_rdn = datastore_rdn
+        self.features = features
+        self.predicted_peak_bytes = (
+            job_size if predicted_peak_bytes is None else predicted_peak_bytes
+        )
+        self.peak_rss_bytes = 0
+
+    @property
+    def sentinel(self) -> int:
+        return self.process.sentinel
+
+    @property
+    def reserved_bytes(self) -> int:
+        """
+        The memory reserved for the worker. This is its predicted peak,
+        or the highest RSS sampled so far if it has outgrown the prediction.
+        """
+        return max(self.predicted_peak_bytes, self.peak_rss_bytes)
 
     def is_alive(self) -> bool:
         return self.process.is_alive()
 
     def start(self) -> None:
+        self.started_at = perf_counter()
         self.process.start()
+
+    def sample_rss(self) -> int | None:
+        """
+        Samples the current RSS of the worker process and keeps the highest
+        sample. Returns the sample, or None if the process is not running.
+        """
+        if self.process.pid is None:
+            return None
+        rss_bytes = _read_rss_bytes(self.process.pid)
+        if rss_bytes is not None:
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss_bytes)
+        return rss_bytes
@@ -0,0 +1,126 @@
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+from job_executor.adapter import datastore_api
+from job_executor.adapter.datastore_api.models import JobStatus
+
+logger = logging.getLogger()
+
+FINAL_STATUSES = [JobStatus.BUILT, JobStatus.FAILED]
+
+
+@dataclass
+class _StatusUpdate:
+    status: JobStatus
+    log: str | None = None
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def send(self, job_id: str) -> None:
+        if self.log is None:
+            datastore_api.update_job_status(job_id, self.status)
+        else:
+            datastore_api.update_job_status(job_id, self.status, log=self.log)
+
+
+@dataclass
+class _DescriptionUpdate:
+    description: str
+
+    @property
+    def is_final(self) -> bool:
+        return False
+
+    def send(self, job_id: str) -> None:
+        datastore_api.update_description(job_id, self.description)
+
+
+class StatusReporter:
+    """
+    Reports the progress of a worker job to the datastore api from a
+    background thread, so that the steps of the worker never wait on the
+    network.
+
+    Updates are sent one at a time in the order they were reported. A status
+    that is still waiting to be sent when the next status is reported is
+    obsolete, and is replaced by the new status. A status with a log and the
+    final statuses BUILT and FAILED are never replaced.
+
+    If an update could not be delivered, the error is raised by the next
+    call that reports an update that is not final. The final status is
+    always attempted, and close() raises if it could not be delivered.
+    """
+
+    job_id: str
+
+    def __init__(self, job_id: str) -> None:
+        self.job_id = job_id
+        self._pending: deque[_StatusUpdate | _DescriptionUpdate] = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._delivery_error: Exception | None = None
+        self._final_delivery_error: Exception | None = None
+        self._thread = threading.Thread(
+            target=self._send_pending, name="status-reporter", daemon=True
+        )
+        self._thread.start()
+
+    def update_status(self, status: JobStatus, log: str | None = None) -> None:
+        update = _StatusUpdate(status, log)
+        with self._condition:
+            if not update.is_final:
+                self._raise_delivery_error()
+            if (
+                self._pending
+                and isinstance(self._pending[-1], _StatusUpdate)
+                and not self._pending[-1].is_final
+                and self._pending[-1].log is None
+            ):
+                self._pending.pop()
+            self._pending.append(update)
+            self._condition.notify()
+
+    def update_description(self, description: str) -> None:
+        with self._condition:
+            self._raise_delivery_error()
+            self._pending.append(_DescriptionUpdate(description))
+            self._condition.notify()
+
+    def close(self) -> None:
+        """
+        Sends the pending updates and stops the background thread.
+        Raises the error if the final status could not be delivered.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self._final_delivery_error is not None:
+            raise self._final_delivery_error
+
+    def _raise_delivery_error(self) -> None:
+        if self._delivery_error is not None:
+            error, self._delivery_error = self._delivery_error, None
+            raise error
+
+    def _send_pending(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                update = self._pending.popleft()
+            try:
+                update.send(self.job_id)
+            except Exception as e:
+                logger.warning(f"Failed to report {update}: {e}")
+                with self._condition:
+                    if update.is_final:
+                        self._final_delivery_error = e
+                    elif self._delivery_error is None:
+                        self._delivery_error = e
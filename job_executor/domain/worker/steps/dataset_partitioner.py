@@ -1,25 +1,76 @@
 import logging
+import shutil
 from pathlib import Path
 
-from pyarrow import dataset, parquet
+from pyarrow import dataset
 
 from job_executor.common.exceptions import BuilderStepError
+from job_executor.config import environment
 
 logger = logging.getLogger()
 
+WORKER_BATCH_SIZE = environment.worker_batch_size
+MAX_ROWS_PER_FILE = environment.partition_max_rows_per_file
+MAX_ROWS_PER_GROUP = environment.partition_max_rows_per_group
+MAX_OPEN_FILES = environment.partition_max_open_files
 
-def run(data_path: Path, dataset_name: str) -> None:
+
+def write_partitioned(
+    data: dataset.Dataset | dataset.Scanner,
+    output_dir: Path,
+    max_rows_per_file: int = MAX_ROWS_PER_FILE,
+    max_rows_per_group: int = MAX_ROWS_PER_GROUP,
+    max_open_files: int = MAX_OPEN_FILES,
+) -> None:
+    """
+    Writes the data to output_dir as a hive partitioned parquet dataset,
+    with one 'start_year=<year>' sub directory for each start year.
+    The data is written one record batch at a time as it is scanned.
+    A previous output_dir, left behind by an interrupted or failed build,
+    is deleted first so that none of its partitions are kept.
+
+    * max_rows_per_file: int - rows in each file before a new file is
+      started, 0 for no limit
+    * max_rows_per_group: int - maximum number of rows in a row group
+    * max_open_files: int - files open at the same time. If more partitions
+      are written to, the file with the most rows is closed and a new file
+      is started the next time there are rows for that partition
+    """
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    dataset.write_dataset(
+        data,
+        base_dir=output_dir,
+        format="parquet",
+        basename_template="part-{i}.parquet",
+        partitioning=["start_year"],
+        partitioning_flavor="hive",
+        max_rows_per_file=max_rows_per_file,
+        max_rows_per_group=max_rows_per_group,
+        max_open_files=max_open_files,
+    )
+
+
+def run(
+    data_path: Path,
+    dataset_name: str,
+    batch_size: int = WORKER_BATCH_SIZE,
+    max_rows_per_file: int = MAX_ROWS_PER_FILE,
+    max_rows_per_group: int = MAX_ROWS_PER_GROUP,
+    max_open_files: int = MAX_OPEN_FILES,
+) -> None:
     """
     Partitions the given dataset by the 'start_year' column.
 
-    This function reads the dataset from the specified path and writes
-    a partitioned version of it based on the 'start_year' column to a
-    new directory named '<dataset_name>__DRAFT' at the parent level of
-    the given path.
+    This function scans the dataset from the specified path in record
+    batches of batch_size rows and writes a partitioned version of it
+    based on the 'start_year' column to a new directory named
+    '<dataset_name>__DRAFT' at the parent level of the given path.
+    The dataset is never loaded into memory as a whole.
 
     Raises:
-    - ValueError: If the 'start_year' column is not found in the dataset.
-    - BuilderStepError: If there's an error during the partitioning process.
+    - BuilderStepError: If the 'start_year' column is not found in the
+      dataset, or if there's an error during the partitioning process.
     """
     try:
         ds = dataset.dataset(data_path)
@@ -31,12 +82,18 @@ def run(data_path: Path, dataset_name: str) -> None:
                 "Column 'start_year' not found in the dataset"
             )
 
-        table = ds.to_table()
-
         output_dir = data_path.parent / f"{dataset_name}__DRAFT"
 
-        parquet.write_to_dataset(
-            table, root_path=output_dir, partition_cols=["start_year"]
+        write_partitioned(
+            ds.scanner(
+                batch_size=batch_size,
+                batch_readahead=1,
+                fragment_readahead=1,
+            ),
+            output_dir,
+            max_rows_per_file=max_rows_per_file,
+            max_rows_per_group=max_rows_per_group,
+            max_open_files=max_open_files,
         )
     except Exception as e:
         logger.error(f"Error during partitioning: {str(e)}")
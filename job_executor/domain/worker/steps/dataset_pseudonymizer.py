@@ -1,4 +1,5 @@
 import logging
+from dataclasses import dataclass
 from pathlib import Path
 
 import microdata_tools
@@ -9,10 +10,17 @@ from pyarrow import compute, dataset, parquet
 
 from job_executor.adapter import pseudonym_service
 from job_executor.adapter.fs.models.metadata import Metadata
+from job_executor.adapter.fs.pseudonym_cache_directory import (
+    PseudonymCacheDirectory,
+)
 from job_executor.common.exceptions import BuilderStepError
+from job_executor.config import environment
+from job_executor.domain.worker.steps import dataset_partitioner
 
 logger = logging.getLogger()
 
+WORKER_BATCH_SIZE = environment.worker_batch_size
+
 
 def _get_unit_types(
     metadata: Metadata,
@@ -26,115 +34,326 @@ def _get_unit_types(
     )
 
 
-def _fetch_column_pseudonyms(
-    input_dataset: dataset.FileSystemDataset,
-    column_name: str,
-    unit_id_type: UnitIdType | None,
-    job_id: str,
-) -> list[str] | None:
+def _map_to_pseudonyms(
+    identifiers: pyarrow.Array | pyarrow.ChunkedArray,
+    unique_identifiers: pyarrow.Array,
+    pseudonyms: pyarrow.Array,
+) -> pyarrow.Array | pyarrow.ChunkedArray:
     """
-    Pseudonymizes a column if a pseudonymizable unit ID type is provided.
-    Returns None otherwise.
+    Replaces every identifier with its pseudonym without leaving Arrow.
+    The position of each identifier in unique_identifiers is looked up with
+    index_in, and the pseudonym at that position is taken from pseudonyms.
     """
-    if not unit_id_type:
-        return None
+    indices = compute.index_in(identifiers, value_set=unique_identifiers)
+    return compute.take(pseudonyms, indices)
 
-    identifiers_table = input_dataset.to_table(columns=[column_name])
 
-    string_identifiers = identifiers_table[column_name].cast(pyarrow.string())
-    unique_identifiers = compute.unique(string_identifiers).to_pylist()  # type: ignore
+def _collect_unique_identifiers(
+    input_dataset: dataset.FileSystemDataset,
+    column_names: list[str],
+    batch_size: int,
+) -> pyarrow.Array:
+    """
+    Collects the unique values of the given columns combined, as strings.
+    The columns are read one record batch at a time, and the unique values
+    of each batch are kept until they outnumber the unique values collected
+    so far, and are then merged into them. This keeps the total cost of
+    merging linear in the number of values read.
+    """
+    unique_identifiers = pyarrow.array([], type=pyarrow.string())
+    batch_uniques: list[pyarrow.Array] = []
+    batch_uniques_length = 0
+    for batch in input_dataset.to_batches(
+        columns=column_names,
+        batch_size=batch_size,
+        batch_readahead=1,
+        fragment_readahead=1,
+    ):
+        batch_identifiers = pyarrow.chunked_array(
+            [column.cast(pyarrow.string()) for column in batch.columns]
+        )
+        batch_unique_identifiers = compute.unique(batch_identifiers)
+        batch_uniques.append(batch_unique_identifiers)
+        batch_uniques_length += len(batch_unique_identifiers)
+        if batch_uniques_length > max(len(unique_identifiers), batch_size):
+            unique_identifiers = compute.unique(
+                pyarrow.chunked_array([unique_identifiers, *batch_uniques])
+            )
+            batch_uniques = []
+            batch_uniques_length = 0
+    if batch_uniques:
+        unique_identifiers = compute.unique(
+            pyarrow.chunked_array([unique_identifiers, *batch_uniques])
+        )
+    return unique_identifiers
 
+
+def _fetch_pseudonyms_from_service(
+    unique_identifiers: pyarrow.Array,
+    unit_id_type: UnitIdType,
+    job_id: str,
+) -> pyarrow.Array:
+    """
+    Fetches the pseudonyms for the unique identifiers from the pseudonym
+    service. Returns an int64 array where each pseudonym is at the same
+    position as its identifier in unique_identifiers.
+    """
+    unique_identifiers_list = unique_identifiers.to_pylist()
     identifier_to_pseudonym = pseudonym_service.pseudonymize(
-        unique_identifiers, unit_id_type, job_id
+        unique_identifiers_list, unit_id_type, job_id
+    )
+    return pyarrow.array(
+        [
+            identifier_to_pseudonym[identifier]
+            for identifier in unique_identifiers_list
+        ],
+        type=pyarrow.int64(),
     )
-
-    identifiers_list = string_identifiers.to_pylist()
-    pseudonymized_data = [
-        identifier_to_pseudonym[identifier] for identifier in identifiers_list
-    ]
-
-    return pseudonymized_data
 
 
-def _get_column_pseudonyms_array(
-    input_dataset: dataset.FileSystemDataset,
-    column_name: str,
-    unit_id_type: UnitIdType | None,
+def _fetch_pseudonyms(
+    unique_identifiers: pyarrow.Array,
+    unit_id_type: UnitIdType,
     job_id: str,
+    pseudonym_cache: PseudonymCacheDirectory | None,
 ) -> pyarrow.Array:
     """
-    Pseudonymizes a column if a pseudonymizable unit ID type is provided.
-    Returns the original column otherwise.
+    Returns an int64 array where each pseudonym is at the same position as
+    its identifier in unique_identifiers. If a pseudonym cache is given,
+    only the identifiers missing from the cache are sent to the pseudonym
+    service, and their pseudonyms are added to the cache afterwards. The
+    cache is only an optimization, so errors when reading or writing it
+    are logged and otherwise ignored.
     """
-    pseudonyms = _fetch_column_pseudonyms(
-        input_dataset, column_name, unit_id_type, job_id
+    if pseudonym_cache is None:
+        return _fetch_pseudonyms_from_service(
+            unique_identifiers, unit_id_type, job_id
+        )
+    try:
+        cached_pseudonyms = pseudonym_cache.lookup(
+            unit_id_type, unique_identifiers
+        )
+    except Exception as e:
+        logger.warning(f"Could not read pseudonym cache: {str(e)}")
+        cached_pseudonyms = pyarrow.nulls(
+            len(unique_identifiers), pyarrow.int64()
+        )
+    missing_identifiers = unique_identifiers.filter(
+        compute.is_null(cached_pseudonyms)
+    )
+    logger.info(
+        f"Found {len(unique_identifiers) - len(missing_identifiers)} of "
+        f"{len(unique_identifiers)} {unit_id_type.value} pseudonyms in cache"
+    )
+    fetched_pseudonyms = _fetch_pseudonyms_from_service(
+        missing_identifiers, unit_id_type, job_id
+    )
+    pseudonyms = compute.coalesce(
+        cached_pseudonyms,
+        _map_to_pseudonyms(
+            unique_identifiers, missing_identifiers, fetched_pseudonyms
+        ),
     )
+    if len(missing_identifiers) == 0:
+        return pseudonyms
+    try:
+        pseudonym_cache.store(
+            unit_id_type, missing_identifiers, fetched_pseudonyms
+        )
+    except Exception as e:
+        logger.warning(f"Could not update pseudonym cache: {str(e)}")
+    return pseudonyms
 
-    if pseudonyms:
-        return pyarrow.array(pseudonyms).cast(pyarrow.int64())
-    else:
-        # get logical type of column
-        column_type = input_dataset.schema.field(column_name).type
-        # cast column to logical type - just to be safe
-        return input_dataset.to_table(columns=[column_name])[column_name].cast(
-            column_type
+
+@dataclass
+class PseudonymLookup:
+    """
+    Pseudonyms for every unique identifier found in the columns that share
+    a unit id type. Each pseudonym is at the same position as its
+    identifier in unique_identifiers.
+    """
+
+    column_names: list[str]
+    unique_identifiers: pyarrow.Array
+    pseudonyms: pyarrow.Array
+
+    def apply(self, batch: pyarrow.RecordBatch) -> dict[str, pyarrow.Array]:
+        """
+        Returns the pseudonymized columns of the record batch. The columns
+        are looked up together, so the unique identifiers are only hashed
+        once per batch.
+        """
+        identifiers = pyarrow.chunked_array(
+            [
+                batch.column(column_name).cast(pyarrow.string())
+                for column_name in self.column_names
+            ],
+            type=pyarrow.string(),
+        )
+        pseudonyms = _map_to_pseudonyms(
+            identifiers, self.unique_identifiers, self.pseudonyms
         )
+        return {
+            column_name: pseudonyms.slice(
+                index * batch.num_rows, batch.num_rows
+            ).combine_chunks()
+            for index, column_name in enumerate(self.column_names)
+        }
 
 
-def _get_regular_column(
+def _get_pseudonym_lookups(
     input_dataset: dataset.FileSystemDataset,
-    column_name: str,
-    arrow_type: pyarrow.DataType,
-) -> pyarrow.Array:
+    identifier_unit_id_type: UnitIdType | None,
+    measure_unit_id_type: UnitIdType | None,
+    job_id: str,
+    batch_size: int,
+    pseudonym_cache: PseudonymCacheDirectory | None,
+) -> list[PseudonymLookup]:
     """
-    Returns a column as is, casting it to the provided arrow type.
+    Creates one pseudonym lookup per unit id type. When the identifier and
+    the measure have the same unit id type, their unique identifiers are
+    collected together and pseudonymized in a single request.
     """
-    return input_dataset.to_table(columns=[column_name])[column_name].cast(
-        arrow_type
-    )
+    column_names_by_unit_id_type: dict[UnitIdType, list[str]] = {}
+    for column_name, unit_id_type in [
+        ("unit_id", identifier_unit_id_type),
+        ("value", measure_unit_id_type),
+    ]:
+        if unit_id_type:
+            column_names_by_unit_id_type.setdefault(unit_id_type, []).append(
+                column_name
+            )
+    pseudonym_lookups = []
+    for unit_id_type, column_names in column_names_by_unit_id_type.items():
+        unique_identifiers = _collect_unique_identifiers(
+            input_dataset, column_names, batch_size
+        )
+        pseudonym_lookups.append(
+            PseudonymLookup(
+                column_names=column_names,
+                unique_identifiers=unique_identifiers,
+                pseudonyms=_fetch_pseudonyms(
+                    unique_identifiers, unit_id_type, job_id, pseudonym_cache
+                ),
+            )
+        )
+    return pseudonym_lookups
+
+
+def _get_output_schema(
+    input_schema: pyarrow.Schema, pseudonym_lookups: list[PseudonymLookup]
+) -> pyarrow.Schema:
+    """
+    Returns the schema of the pseudonymized dataset. Pseudonymized columns
+    are int64, the other unit_id and value columns keep their logical type.
+    """
+    pseudonymized_columns = [
+        column_name
+        for pseudonym_lookup in pseudonym_lookups
+        for column_name in pseudonym_lookup.column_names
+    ]
+    fields = [
+        pyarrow.field(
+            column_name,
+            pyarrow.int64()
+            if column_name in pseudonymized_columns
+            else input_schema.field(column_name).type,
+        )
+        for column_name in ["unit_id", "value"]
+    ]
+    fields.append(pyarrow.field("start_epoch_days", pyarrow.int16()))
+    fields.append(pyarrow.field("stop_epoch_days", pyarrow.int16()))
+    if "start_year" in input_schema.names:
+        fields.append(pyarrow.field("start_year", pyarrow.string()))
+    return pyarrow.schema(fields)
+
+
+def _pseudonymize_batch(
+    batch: pyarrow.RecordBatch,
+    output_schema: pyarrow.Schema,
+    pseudonym_lookups: list[PseudonymLookup],
+) -> pyarrow.RecordBatch:
+    """
+    Replaces the pseudonymized columns of a record batch with pseudonyms,
+    and casts the remaining columns to the output schema.
+    """
+    pseudonymized_columns = {}
+    for pseudonym_lookup in pseudonym_lookups:
+        pseudonymized_columns.update(pseudonym_lookup.apply(batch))
+    columns = [
+        pseudonymized_columns[field.name]
+        if field.name in pseudonymized_columns
+        else batch.column(field.name).cast(field.type)
+        for field in output_schema
+    ]
+    return pyarrow.RecordBatch.from_arrays(columns, schema=output_schema)
 
 
 def _pseudonymize(
     input_parquet_path: Path,
+    output_path: Path,
+    partitioned: bool,
     identifier_unit_id_type: UnitIdType | None,
     measure_unit_id_type: UnitIdType | None,
     job_id: str,
-) -> pyarrow.Table:
+    batch_size: int,
+    pseudonym_cache: PseudonymCacheDirectory | None,
+) -> None:
+    """
+    Writes a pseudonymized copy of the input parquet file to output_path,
+    either as a single parquet file or partitioned by start_year.
+
+    The unique identifiers of the pseudonymized columns are collected and
+    pseudonymized first, once per unit id type. The dataset is then
+    streamed to the output one record batch at a time, so the memory used
+    is set by batch_size and the number of unique identifiers, not by the
+    number of rows.
+    """
     input_dataset = dataset.dataset(input_parquet_path)
-    columns = []
-
-    # Handle potential pseudonymized columns
-    columns.append(
-        _get_column_pseudonyms_array(
-            input_dataset, "unit_id", identifier_unit_id_type, job_id
-        )
+    pseudonym_lookups = _get_pseudonym_lookups(
+        input_dataset,
+        identifier_unit_id_type,
+        measure_unit_id_type,
+        job_id,
+        batch_size,
+        pseudonym_cache,
     )
-    columns.append(
-        _get_column_pseudonyms_array(
-            input_dataset, "value", measure_unit_id_type, job_id
+    output_schema = _get_output_schema(input_dataset.schema, pseudonym_lookups)
+    pseudonymized_batches = (
+        _pseudonymize_batch(batch, output_schema, pseudonym_lookups)
+        for batch in input_dataset.to_batches(
+            columns=output_schema.names,
+            batch_size=batch_size,
+            batch_readahead=1,
+            fragment_readahead=1,
         )
     )
-
-    # Handle regular columns
-    columns.append(
-        _get_regular_column(input_dataset, "start_epoch_days", pyarrow.int16())
-    )
-    columns.append(
-        _get_regular_column(input_dataset, "stop_epoch_days", pyarrow.int16())
-    )
-    if "start_year" in input_dataset.schema.names:
-        columns.append(
-            _get_regular_column(input_dataset, "start_year", pyarrow.string())
+    if partitioned:
+        if "start_year" not in output_schema.names:
+            raise BuilderStepError(
+                "Column 'start_year' not found in the dataset"
+            )
+        dataset_partitioner.write_partitioned(
+            dataset.Scanner.from_batches(
+                pseudonymized_batches, schema=output_schema
+            ),
+            output_path,
         )
-
-    pseudonymized_table = pyarrow.Table.from_arrays(
-        columns, input_dataset.schema.names
-    )
-
-    return pseudonymized_table
+    else:
+        with parquet.ParquetWriter(output_path, output_schema) as writer:
+            for batch in pseudonymized_batches:
+                writer.write_batch(batch)
 
 
-def run(input_parquet_path: Path, metadata: Metadata, job_id: str) -> str:
+def run(
+    input_parquet_path: Path,
+    metadata: Metadata,
+    job_id: str,
+    batch_size: int = WORKER_BATCH_SIZE,
+    pseudonym_cache: PseudonymCacheDirectory | None = None,
+    output_path: Path | None = None,
+    partitioned: bool = False,
+) -> str:
     """
     Pseudonymizes the identifier & measure column of the dataset if.
 
@@ -143,10 +362,18 @@ def run(input_parquet_path: Path, metadata: Metadata, job_id: str) -> str:
 
     If valid unit types are provided, the unique values in the identifier &
     measure column are extracted and pseudonymized using the external
-    pseudonym service.
+    pseudonym service. Pseudonyms found in the pseudonym cache, if one is
+    given, are not requested from the service.
 
     Finally all values in the identifier & measure column are replaced with
-    the pseudonyms.
+    the pseudonyms, reading and writing batch_size rows at a time.
+
+    The output is written to output_path if given, and otherwise to
+    '<input file name>_pseudonymized.parquet' next to the input file.
+    If partitioned is True, the output is written as a directory
+    partitioned by the 'start_year' column, so pseudonymization and
+    partitioning are done in a single rewrite of the dataset.
+    Returns the file or directory name of the output.
     """
     try:
         logger.info(f"Pseudonymizing data {input_parquet_path}")
@@ -166,19 +393,24 @@ def run(input_parquet_path: Path, metadata: Metadata, job_id: str) -> str:
                 UnitType(measure_unit_type)
             )
         )
-        pseudonymized_table = _pseudonymize(
+        if output_path is None:
+            output_path = (
+                input_parquet_path.parent
+                / f"{input_parquet_path.stem}_pseudonymized.parquet"
+            )
+        _pseudonymize(
             input_parquet_path,
+            output_path,
+            partitioned,
             identifier_unit_id_type,
             measure_unit_id_type,
             job_id,
+            batch_size,
+            pseudonym_cache,
         )
-        output_file_name = f"{input_parquet_path.stem}_pseudonymized.parquet"
-        output_path = input_parquet_path.parent / output_file_name
-
-        parquet.write_table(pseudonymized_table, output_path)
 
         logger.info(f"Pseudonymization step done {output_path}")
-        return output_file_name
+        return output_path.name
     except UnregisteredUnitTypeError as e:
         raise BuilderStepError(
             f"Failed to pseudonymize, UnregisteredUnitType: {str(e)}"
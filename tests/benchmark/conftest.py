@@ -0,0 +1,21 @@
+from collections.abc import Callable
+
+import pytest
+
+_reports: list[str] = []
+
+
+@pytest.fixture
+def benchmark_report() -> Callable[[str], None]:
+    """
+    Returns a function that adds a line to the benchmark summary that
+    is written at the end of the test run.
+    """
+    return _reports.append
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter) -> None:
+    if _reports:
+        terminalreporter.section("benchmarks")
+        for report in _reports:
+            terminalreporter.write_line(report)
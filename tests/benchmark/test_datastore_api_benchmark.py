@@ -0,0 +1,47 @@
+from time import perf_counter
+
+import pytest
+import requests
+
+from job_executor.adapter import datastore_api
+from job_executor.adapter.datastore_api.models import JobStatus
+from tests.stub_servers import DatastoreApiStub
+
+pytestmark = pytest.mark.benchmark
+
+REQUEST_COUNT = 500
+
+
+def _unpooled_update_job_status(url: str) -> None:
+    # How every status update was sent before the pooled session
+    response = requests.request(
+        method="PUT",
+        url=f"{url}/jobs/benchmark",
+        json={"status": str(JobStatus.VALIDATING)},
+        timeout=datastore_api.DEFAULT_REQUESTS_TIMEOUT,
+    )
+    assert response.status_code == 200
+
+
+def test_benchmark_datastore_api_session(monkeypatch, benchmark_report):
+    with DatastoreApiStub() as stub:
+        monkeypatch.setattr(datastore_api, "DATASTORE_API_URL", stub.url)
+        start = perf_counter()
+        for _ in range(REQUEST_COUNT):
+            _unpooled_update_job_status(stub.url)
+        unpooled = REQUEST_COUNT / (perf_counter() - start)
+        unpooled_connections = stub.connection_count
+
+        start = perf_counter()
+        for _ in range(REQUEST_COUNT):
+            datastore_api.update_job_status("benchmark", JobStatus.VALIDATING)
+        pooled = REQUEST_COUNT / (perf_counter() - start)
+        pooled_connections = stub.connection_count - unpooled_connections
+    assert pooled_connections < unpooled_connections
+    benchmark_report(
+        f"datastore api with {REQUEST_COUNT} status updates: "
+        f"unpooled {unpooled:,.0f} requests/sec "
+        f"({unpooled_connections} connections), "
+        f"pooled {pooled:,.0f} requests/sec "
+        f"({pooled_connections} connections)"
+    )
@@ -0,0 +1,70 @@
+import json
+import os
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+
+from job_executor.adapter.fs.datastore_files import DatastoreDirectory
+from job_executor.adapter.fs.models.metadata import MetadataAllDraft
+
+METADATA_ALL_PATH = (
+    "tests/unit/resources/adapter/fs/model/metadata/metadata_all.json"
+)
+pytestmark = pytest.mark.benchmark
+
+DATASET_COUNT = 5_000
+
+
+def _generate_metadata_all() -> MetadataAllDraft:
+    with open(METADATA_ALL_PATH, encoding="utf-8") as f:
+        metadata_all = json.load(f)
+    templates = metadata_all["dataStructures"]
+    metadata_all["dataStructures"] = [
+        {**templates[i % len(templates)], "name": f"DATASET_{i}"}
+        for i in range(DATASET_COUNT)
+    ]
+    return MetadataAllDraft.model_validate(metadata_all)
+
+
+def test_benchmark_metadata_all_draft_files(tmp_path: Path, benchmark_report):
+    os.makedirs(tmp_path / "datastore")
+    datastore_dir = DatastoreDirectory(tmp_path)
+    metadata_all = _generate_metadata_all()
+    previous_path = tmp_path / "previous.json"
+
+    # How the file was written and read before
+    start = perf_counter()
+    with open(previous_path, "w", encoding="utf-8") as f:
+        json.dump(
+            metadata_all.model_dump(by_alias=True, exclude_none=True),
+            f,
+            indent=2,
+        )
+    previous_write = perf_counter() - start
+    start = perf_counter()
+    with open(previous_path, "r") as f:
+        MetadataAllDraft.model_validate(json.load(f))
+    previous_read = perf_counter() - start
+
+    datastore_dir.draft_metadata_all_path.touch()
+    start = perf_counter()
+    datastore_dir.write_metadata_all_draft(metadata_all)
+    write = perf_counter() - start
+    start = perf_counter()
+    read_metadata_all = datastore_dir.get_metadata_all_draft()
+    read = perf_counter() - start
+
+    assert read_metadata_all == metadata_all
+    assert (
+        datastore_dir.draft_metadata_all_path.read_bytes()
+        == previous_path.read_bytes()
+    )
+    size_mb = previous_path.stat().st_size / 1024**2
+    benchmark_report(
+        f"metadata_all__DRAFT.json with {DATASET_COUNT} datasets "
+        f"({size_mb:.0f} MB): "
+        f"write {previous_write * 1000:.0f}ms before, {write * 1000:.0f}ms "
+        f"now; read {previous_read * 1000:.0f}ms before, "
+        f"{read * 1000:.0f}ms now"
+    )
@@ -0,0 +1,120 @@
+import json
+from collections.abc import Callable
+from time import perf_counter
+
+import pytest
+
+from job_executor.adapter.fs.models.datastore_versions import (
+    DataStructureUpdate,
+    DraftVersion,
+)
+from job_executor.adapter.fs.models.metadata import Metadata, MetadataAllDraft
+
+METADATA_ALL_PATH = (
+    "tests/unit/resources/adapter/fs/model/metadata/metadata_all.json"
+)
+pytestmark = pytest.mark.benchmark
+
+DATASET_COUNT = 5_000
+LOOKUP_COUNT = 500
+
+
+def _generate_metadata_all() -> MetadataAllDraft:
+    with open(METADATA_ALL_PATH, encoding="utf-8") as f:
+        metadata_all = json.load(f)
+    template = metadata_all["dataStructures"][0]
+    metadata_all["dataStructures"] = [
+        {**template, "name": f"DATASET_{i}"} for i in range(DATASET_COUNT)
+    ]
+    return MetadataAllDraft.model_validate(metadata_all)
+
+
+def _revalidated_copy(metadata: Metadata) -> Metadata:
+    # How every dataset was copied before
+    return Metadata(**metadata.model_dump(by_alias=True, exclude_none=True))
+
+
+def _revalidated_get(
+    metadata_all: MetadataAllDraft, dataset_name: str
+) -> Metadata | None:
+    for metadata in metadata_all.data_structures:
+        if metadata.name == dataset_name:
+            return _revalidated_copy(metadata)
+    return None
+
+
+def _timed(function: Callable[[], object]) -> float:
+    start = perf_counter()
+    function()
+    return perf_counter() - start
+
+
+def test_benchmark_metadata_all(benchmark_report):
+    metadata_all = _generate_metadata_all()
+    names = [f"DATASET_{i}" for i in range(0, DATASET_COUNT, 10)]
+    assert len(names) == LOOKUP_COUNT
+
+    revalidated_iter = _timed(
+        lambda: [_revalidated_copy(ds) for ds in metadata_all.data_structures]
+    )
+    shared_iter = _timed(lambda: list(metadata_all))
+    revalidated_get = _timed(
+        lambda: [_revalidated_get(metadata_all, name) for name in names]
+    )
+    indexed_get = _timed(lambda: [metadata_all.get(name) for name in names])
+    update_one = _timed(
+        lambda: [
+            metadata_all.update_one(name, metadata_all.get(name))
+            for name in names
+        ]
+    )
+    assert len(metadata_all.data_structures) == DATASET_COUNT
+    assert [metadata_all.get(name) for name in names] == [
+        _revalidated_get(metadata_all, name) for name in names
+    ]
+    benchmark_report(
+        f"metadata_all with {DATASET_COUNT} datasets: "
+        f"iterate {revalidated_iter * 1000:.1f}ms revalidated, "
+        f"{shared_iter * 1000:.2f}ms shared; "
+        f"{LOOKUP_COUNT} gets {revalidated_get * 1000:.1f}ms revalidated, "
+        f"{indexed_get * 1000:.2f}ms indexed; "
+        f"{LOOKUP_COUNT} update_one {update_one * 1000:.1f}ms"
+    )
+
+
+def _update(name: str) -> DataStructureUpdate:
+    return DataStructureUpdate(
+        name=name,
+        description="benchmark",
+        operation="ADD",
+        release_status="DRAFT",
+    )
+
+
+def test_benchmark_draft_version(benchmark_report):
+    draft_version = DraftVersion(
+        version="1.0.0.0",
+        description="benchmark",
+        release_time=0,
+        language_code="no",
+        update_type=None,
+        data_structure_updates=[
+            _update(f"DATASET_{i}") for i in range(DATASET_COUNT)
+        ],
+    )
+    add = _timed(
+        lambda: [
+            draft_version.add(_update(f"NEW_DATASET_{i}"))
+            for i in range(LOOKUP_COUNT)
+        ]
+    )
+    iterate = _timed(lambda: list(draft_version))
+    assert (
+        len(draft_version.data_structure_updates)
+        == DATASET_COUNT + LOOKUP_COUNT
+    )
+    benchmark_report(
+        f"draft_version with {DATASET_COUNT} updates: "
+        f"{LOOKUP_COUNT} adds {add * 1000:.1f}ms, "
+        f"iterate {iterate * 1000:.1f}ms"
+    )
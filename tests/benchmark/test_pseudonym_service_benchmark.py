@@ -0,0 +1,48 @@
+from time import perf_counter
+
+import pytest
+from microdata_tools.validation.model.metadata import UnitIdType
+
+from job_executor.adapter import pseudonym_service
+from tests.stub_servers import PseudonymServiceStub
+
+pytestmark = pytest.mark.benchmark
+
+IDENTIFIER_COUNT = 200_000
+# Simulates a service that needs 5 seconds per million identifiers
+SECONDS_PER_IDENTIFIER = 0.000005
+
+
+def _identifiers_per_second(
+    mocker, identifiers: list[str], chunk_size: int, max_workers: int
+) -> float:
+    mocker.patch.object(pseudonym_service, "CHUNK_SIZE", chunk_size)
+    mocker.patch.object(pseudonym_service, "MAX_WORKERS", max_workers)
+    with PseudonymServiceStub(
+        latency_seconds=0.01, seconds_per_identifier=SECONDS_PER_IDENTIFIER
+    ) as stub:
+        mocker.patch.object(
+            pseudonym_service, "PSEUDONYM_SERVICE_URL", stub.url
+        )
+        start = perf_counter()
+        pseudonyms = pseudonym_service.pseudonymize(
+            identifiers, UnitIdType.FNR, "benchmark"
+        )
+        seconds = perf_counter() - start
+    assert len(pseudonyms) == IDENTIFIER_COUNT
+    return IDENTIFIER_COUNT / seconds
+
+
+def test_benchmark_pseudonym_service_client(mocker, benchmark_report):
+    identifiers = [f"{count:011d}" for count in range(IDENTIFIER_COUNT)]
+    single_request = _identifiers_per_second(
+        mocker, identifiers, chunk_size=IDENTIFIER_COUNT, max_workers=1
+    )
+    chunked = _identifiers_per_second(
+        mocker, identifiers, chunk_size=20_000, max_workers=4
+    )
+    benchmark_report(
+        f"pseudonym service client with {IDENTIFIER_COUNT} identifiers: "
+        f"single request {single_request:,.0f} identifiers/sec, "
+        f"4 concurrent chunks {chunked:,.0f} identifiers/sec"
+    )
@@ -0,0 +1,79 @@
+from time import perf_counter
+
+import pyarrow
+import pytest
+from pyarrow import compute
+
+from job_executor.domain.worker.steps import dataset_pseudonymizer
+
+pytestmark = pytest.mark.benchmark
+
+ROW_COUNT = 1_000_000
+UNIQUE_COUNT = 100_000
+
+
+@pytest.fixture
+def identifiers() -> pyarrow.ChunkedArray:
+    return pyarrow.chunked_array(
+        [
+            pyarrow.array(
+                [
+                    f"{(count * 7919) % UNIQUE_COUNT:011d}"
+                    for count in range(start, start + ROW_COUNT // 4)
+                ]
+            )
+            for start in range(0, ROW_COUNT, ROW_COUNT // 4)
+        ]
+    )
+
+
+@pytest.fixture
+def pseudonym_dict() -> dict[str, int]:
+    return {f"{count:011d}": count for count in range(UNIQUE_COUNT)}
+
+
+def _per_row_dict_lookup(
+    identifiers: pyarrow.ChunkedArray, pseudonym_dict: dict[str, int]
+) -> pyarrow.Array:
+    """
+    The substitution as it was done before it was vectorized.
+    """
+    return pyarrow.array(
+        [pseudonym_dict[identifier] for identifier in identifiers.to_pylist()]
+    ).cast(pyarrow.int64())
+
+
+def _vectorized_lookup(
+    identifiers: pyarrow.ChunkedArray, pseudonym_dict: dict[str, int]
+) -> pyarrow.ChunkedArray:
+    unique_identifiers = compute.unique(identifiers)
+    pseudonyms = pyarrow.array(
+        [
+            pseudonym_dict[identifier]
+            for identifier in unique_identifiers.to_pylist()
+        ],
+        type=pyarrow.int64(),
+    )
+    return dataset_pseudonymizer._map_to_pseudonyms(
+        identifiers, unique_identifiers, pseudonyms
+    )
+
+
+def test_benchmark_pseudonym_substitution(
+    identifiers, pseudonym_dict, benchmark_report
+):
+    start = perf_counter()
+    expected = _per_row_dict_lookup(identifiers, pseudonym_dict)
+    per_row_seconds = perf_counter() - start
+
+    start = perf_counter()
+    actual = _vectorized_lookup(identifiers, pseudonym_dict)
+    vectorized_seconds = perf_counter() - start
+
+    assert actual.to_pylist() == expected.to_pylist()
+    benchmark_report(
+        f"pseudonym substitution of {ROW_COUNT} rows "
+        f"({UNIQUE_COUNT} unique): "
+        f"per row {ROW_COUNT / per_row_seconds:,.0f} rows/sec, "
+        f"vectorized {ROW_COUNT / vectorized_seconds:,.0f} rows/sec"
+    )
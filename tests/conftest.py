@@ -8,3 +8,27 @@ os.environ["DOCKER_HOST_NAME"] = "localhost"
 os.environ["COMMIT_ID"] = "abc123"
 os.environ["MAX_GB_ALL_WORKERS"] = "50"
 os.environ["PRIVATE_KEYS_DIR"] = "tests/integration/resources/private_keys"
+
+
+import pytest  # noqa: E402
+
+from job_executor.domain.datastores import clear_datastore_cache  # noqa: E402
+from job_executor.domain.local_storage import (  # noqa: E402
+    invalidate_local_storage,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_local_storage_cache():
+    # Tests point the same datastore rdn to different directories
+    invalidate_local_storage()
+    yield
+    invalidate_local_storage()
+
+
+@pytest.fixture(autouse=True)
+def clear_datastore_caches():
+    # Tests copy fresh datastore files to the same directories
+    clear_datastore_cache()
+    yield
+    clear_datastore_cache()
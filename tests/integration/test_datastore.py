@@ -18,7 +18,7 @@ from job_executor.adapter.fs import LocalStorageAdapter
 from job_executor.adapter.fs.models.datastore_versions import DatastoreVersion
 from job_executor.adapter.fs.models.metadata import Metadata
 from job_executor.common.exceptions import HttpResponseError
-from job_executor.domain import datastores
+from job_executor.domain import datastores, rollback
 from job_executor.domain.models import JobContext
 from tests.integration.common import (
     PRIVATE_KEYS_DIR,
@@ -199,6 +199,143 @@ def test_import_built_change(mocked_datastore_api: MockedDatastoreApi):
     )
 
 
+def _read_draft_files(datastore_dir_path: Path) -> list[bytes]:
+    return [
+        (datastore_dir_path / "datastore" / file_name).read_bytes()
+        for file_name in ["draft_version.json", "metadata_all__DRAFT.json"]
+    ]
+
+
+def test_failed_import_is_undone_from_journal(
+    mocker, mocked_datastore_api: MockedDatastoreApi
+):
+    DATASET_NAME = "BUILT_CHANGE"
+    mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        return_value=DATASTORE_DIR,
+    )
+    job_context = generate_job_context(
+        operation=Operation.CHANGE,
+        target=DATASET_NAME,
+    )
+    local_storage = job_context.local_storage
+    working_parquet, datastore_parquet = local_storage.get_parquet_move_paths(
+        DATASET_NAME
+    )
+    draft_files = _read_draft_files(DATASTORE_DIR)
+
+    def update_job_status(job_id, status, log=None):
+        if status == JobStatus.COMPLETED:
+            raise HttpResponseError("Service unavailable")
+
+    mocked_datastore_api.update_job_status.side_effect = update_job_status
+    datastores.change(job_context)
+    mocked_datastore_api.update_job_status.assert_called_with(
+        "1", JobStatus.FAILED
+    )
+    assert _read_draft_files(DATASTORE_DIR) == draft_files
+    assert not working_parquet.exists()
+    assert not datastore_parquet.exists()
+    assert local_storage.datastore_dir.journal.open_transaction() is None
+    assert os.listdir(local_storage.datastore_dir.journal.path) == []
+    assert not local_storage.datastore_dir.temporary_backup_exists()
+
+
+def test_import_fails_while_another_journal_is_open(
+    mocker, mocked_datastore_api: MockedDatastoreApi
+):
+    mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        return_value=DATASTORE_DIR,
+    )
+    job_context = generate_job_context(
+        operation=Operation.ADD,
+        target="BUILT_ADD",
+    )
+    journal = job_context.local_storage.datastore_dir.journal
+    journal.begin("OTHER_JOB", "CHANGE", "BUILT_CHANGE")
+    draft_files = _read_draft_files(DATASTORE_DIR)
+
+    datastores.add(job_context)
+    mocked_datastore_api.update_job_status.assert_called_with(
+        "1", JobStatus.FAILED
+    )
+    assert _read_draft_files(DATASTORE_DIR) == draft_files
+    open_transaction = journal.open_transaction()
+    assert open_transaction is not None
+    assert open_transaction["jobId"] == "OTHER_JOB"
+
+
+def test_interrupted_import_is_undone_and_retried(
+    mocker, mocked_datastore_api: MockedDatastoreApi
+):
+    DATASET_NAME = "BUILT_ADD"
+    mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        return_value=DATASTORE_DIR,
+    )
+    job_context = generate_job_context(
+        operation=Operation.ADD,
+        target=DATASET_NAME,
+    )
+    draft_files = _read_draft_files(DATASTORE_DIR)
+
+    # The process stops after all files are changed, before the job is
+    # reported as completed
+    def update_job_status(job_id, status, log=None):
+        if status == JobStatus.COMPLETED:
+            raise SystemExit(1)
+
+    mocked_datastore_api.update_job_status.side_effect = update_job_status
+    with pytest.raises(SystemExit):
+        datastores.add(job_context)
+    journal = job_context.local_storage.datastore_dir.journal
+    assert journal.open_transaction() is not None
+
+    mocked_datastore_api.update_job_status.side_effect = None
+    job_context.job.status = JobStatus.IMPORTING
+    rollback.fix_interrupted_job(job_context.job)
+    mocked_datastore_api.update_job_status.assert_called_with(
+        "1",
+        JobStatus.BUILT,
+        "Reset to built status will be due to unexpected interruption",
+    )
+    assert _read_draft_files(DATASTORE_DIR) == draft_files
+    assert journal.open_transaction() is None
+
+    datastores.clear_datastore_cache()
+    datastores.add(job_context)
+    mocked_datastore_api.update_job_status.assert_called_with(
+        "1", JobStatus.COMPLETED
+    )
+    assert _get_metadata_from_draft(job_context, DATASET_NAME)
+
+
+def test_open_journal_of_completed_import_is_committed(
+    mocker, mocked_datastore_api: MockedDatastoreApi
+):
+    mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        return_value=DATASTORE_DIR,
+    )
+    job_context = generate_job_context(
+        operation=Operation.ADD,
+        target="BUILT_ADD",
+    )
+    journal = job_context.local_storage.datastore_dir.journal
+    commit = mocker.patch.object(journal, "commit", side_effect=SystemExit(1))
+    with pytest.raises(SystemExit):
+        datastores.add(job_context)
+    mocker.stop(commit)
+    assert journal.open_transaction() is not None
+    draft_files = _read_draft_files(DATASTORE_DIR)
+
+    rollback.resolve_operation_journal("TEST_DATASTORE")
+    assert journal.open_transaction() is None
+    assert _read_draft_files(DATASTORE_DIR) == draft_files
+    assert _get_metadata_from_draft(job_context, "BUILT_ADD")
+
+
 def test_bump_patch(mocked_datastore_api: MockedDatastoreApi):
     DATASET_NAME = "DRAFT_PATCH_METADATA"
     set_status_job_context = generate_job_context(
@@ -289,6 +426,55 @@ def test_bump_major(mocked_datastore_api: MockedDatastoreApi):
     )
 
 
+def test_failed_bump_rolls_back_plan(
+    mocker, mocked_datastore_api: MockedDatastoreApi
+):
+    DATASET_NAME = "DRAFT_ADD"
+    mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        return_value=DATASTORE_DIR,
+    )
+    set_status_job_context = generate_job_context(
+        operation=Operation.SET_STATUS,
+        target=DATASET_NAME,
+        release_status=ReleaseStatus.PENDING_RELEASE,
+    )
+    datastores.set_draft_release_status(set_status_job_context)
+    datastore_dir = set_status_job_context.local_storage.datastore_dir
+    draft_version = datastore_dir.get_draft_version()
+    datastore_versions = datastore_dir.datastore_versions_path.read_bytes()
+    mocker.patch.object(
+        datastore_dir.__class__,
+        "write_metadata_all",
+        side_effect=OSError("No space left on device"),
+    )
+    bump_job_context = generate_job_context(
+        operation=Operation.BUMP,
+        target="DATASTORE",
+        bump_manifesto=draft_version,
+    )
+    datastores.bump_version(bump_job_context)
+    mocked_datastore_api.update_job_status.assert_called_with(
+        "1", JobStatus.FAILED
+    )
+    data_dir = DATASTORE_DIR / "data" / DATASET_NAME
+    assert os.listdir(data_dir) == [f"{DATASET_NAME}__DRAFT.parquet"]
+    metadata_dir = DATASTORE_DIR / "datastore"
+    assert not os.path.exists(metadata_dir / "data_versions__1_1.json")
+    assert not os.path.exists(metadata_dir / "tmp")
+    assert datastore_dir.datastore_versions_path.read_bytes() == (
+        datastore_versions
+    )
+    archived_backup = next(
+        content
+        for content in os.listdir(DATASTORE_DIR / "archive")
+        if content.startswith("tmp_")
+    )
+    assert os.path.isfile(
+        DATASTORE_DIR / "archive" / archived_backup / "bump_plan.json"
+    )
+
+
 def test_delete_draft(mocked_datastore_api: MockedDatastoreApi):
     DATASET_NAME = "DRAFT_CHANGE"
     delete_draft_job_context = generate_job_context(
@@ -345,3 +531,178 @@ def test_generate_rsa_keys_cleanup_on_post_public_key_failure(
         / "microdata_private_key.pem"
     )
     assert not private_key_path.exists()
+
+
+def test_datastore_is_reused_between_jobs(
+    mocker, mocked_datastore_api: MockedDatastoreApi
+):
+    read_datastore = mocker.spy(datastores, "Datastore")
+    DATASET_NAME = "DRAFT_PATCH_METADATA"
+    set_status_job_context = generate_job_context(
+        operation=Operation.SET_STATUS,
+        target=DATASET_NAME,
+        release_status=ReleaseStatus.PENDING_RELEASE,
+    )
+    local_storage = set_status_job_context.local_storage
+    datastores.set_draft_release_status(set_status_job_context)
+    bump_job_context = generate_job_context(
+        operation=Operation.BUMP,
+        target="DATASTORE",
+        bump_manifesto=local_storage.datastore_dir.get_draft_version(),
+    )
+    bump_job_context.local_storage = local_storage
+    datastores.bump_version(bump_job_context)
+    assert read_datastore.call_count == 1
+
+    cached = datastores._checkout_datastore(local_storage)
+    assert read_datastore.call_count == 1
+    from_file = datastores.Datastore(local_storage)
+    assert cached.latest_version_number == "1_0_1"
+    assert cached.draft_version == from_file.draft_version
+    assert cached.datastore_versions == from_file.datastore_versions
+    assert cached.metadata_all_draft == from_file.metadata_all_draft
+    assert cached.metadata_all_latest == from_file.metadata_all_latest
+
+
+def test_datastore_is_read_after_files_change(
+    mocker, mocked_datastore_api: MockedDatastoreApi
+):
+    read_datastore = mocker.spy(datastores, "Datastore")
+    job_context = generate_job_context(
+        operation=Operation.DELETE_DRAFT,
+        target="DRAFT_CHANGE",
+    )
+    datastores.delete_draft(job_context)
+    assert read_datastore.call_count == 1
+    datastore_dir = LocalStorageAdapter(
+        DATASTORE_DIR, "TEST_DATASTORE"
+    ).datastore_dir
+    draft_version = datastore_dir.get_draft_version()
+    draft_version.version = "9.9.9.1"
+    datastore_dir.write_draft_version(draft_version)
+    datastore = datastores._checkout_datastore(job_context.local_storage)
+    assert read_datastore.call_count == 2
+    assert datastore.draft_version.version == "9.9.9.1"
+
+
+def test_datastore_is_read_after_failed_job(
+    mocker, mocked_datastore_api: MockedDatastoreApi
+):
+    mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        return_value=DATASTORE_DIR,
+    )
+    read_datastore = mocker.spy(datastores, "Datastore")
+    job_context = generate_job_context(
+        operation=Operation.ADD,
+        target="BUILT_ADD",
+    )
+    mocker.patch.object(
+        job_context.local_storage,
+        "move_working_dir_parquet_to_datastore",
+        side_effect=OSError("disk full"),
+    )
+    datastores.add(job_context)
+    mocked_datastore_api.update_job_status.assert_called_with(
+        "1", JobStatus.FAILED
+    )
+    datastore = datastores._checkout_datastore(job_context.local_storage)
+    assert read_datastore.call_count == 2
+    assert not datastore.draft_version.contains("BUILT_ADD")
+
+
+def _generate_batch_job_contexts() -> list[JobContext]:
+    job_contexts = [
+        generate_job_context(
+            operation=Operation.SET_STATUS,
+            target="DRAFT_PATCH_METADATA",
+            release_status=ReleaseStatus.PENDING_RELEASE,
+        ),
+        generate_job_context(
+            operation=Operation.DELETE_DRAFT,
+            target="DRAFT_ADD",
+        ),
+        generate_job_context(
+            operation=Operation.SET_STATUS,
+            target="DRAFT_ADD",
+            release_status=ReleaseStatus.PENDING_RELEASE,
+        ),
+        generate_job_context(
+            operation=Operation.SET_STATUS,
+            target="DRAFT_PATCH_METADATA",
+            release_status=ReleaseStatus.PENDING_RELEASE,
+        ),
+    ]
+    local_storage = job_contexts[0].local_storage
+    for job_id, job_context in enumerate(job_contexts):
+        job_context.job.job_id = str(job_id)
+        job_context.local_storage = local_storage
+    return job_contexts
+
+
+def test_run_draft_batch(mocker, mocked_datastore_api: MockedDatastoreApi):
+    job_contexts = _generate_batch_job_contexts()
+    datastore_dir = job_contexts[0].local_storage.datastore_dir
+    write_draft_version = mocker.spy(datastore_dir, "write_draft_version")
+    write_metadata_all_draft = mocker.spy(
+        datastore_dir, "write_metadata_all_draft"
+    )
+    datastores.run_draft_batch(job_contexts)
+
+    assert write_draft_version.call_count == 1
+    assert write_metadata_all_draft.call_count == 1
+    assert [
+        call.args
+        for call in mocked_datastore_api.update_job_status.call_args_list
+    ] == [
+        *[(str(job_id), JobStatus.INITIATED) for job_id in range(4)],
+        ("0", JobStatus.COMPLETED),
+        ("1", JobStatus.COMPLETED),
+        ("2", JobStatus.FAILED, "No draft for dataset DRAFT_ADD"),
+        ("3", JobStatus.COMPLETED, "Status already set to PENDING_RELEASE"),
+    ]
+    draft_version = datastore_dir.get_draft_version()
+    assert not draft_version.contains("DRAFT_ADD")
+    assert (
+        draft_version.get_dataset_release_status("DRAFT_PATCH_METADATA")
+        == "PENDING_RELEASE"
+    )
+    metadata_all_draft = datastore_dir.get_metadata_all_draft()
+    assert metadata_all_draft.get("DRAFT_ADD") is None
+    assert not os.path.exists(DATASTORE_DIR / "data/DRAFT_ADD/DRAFT_ADD__DRAFT")
+    assert not os.path.exists(
+        DATASTORE_DIR / "data/DRAFT_ADD/DRAFT_ADD__DRAFT.parquet"
+    )
+    assert not datastore_dir.temporary_backup_exists()
+
+
+def test_run_draft_batch_rolls_back_failed_write(
+    mocker, mocked_datastore_api: MockedDatastoreApi
+):
+    mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        return_value=DATASTORE_DIR,
+    )
+    job_contexts = _generate_batch_job_contexts()
+    datastore_dir = job_contexts[0].local_storage.datastore_dir
+    draft_version_before = datastore_dir.get_draft_version()
+    metadata_all_draft_before = datastore_dir.get_metadata_all_draft()
+    mocker.patch.object(
+        datastore_dir, "write_draft_version", side_effect=OSError("disk full")
+    )
+    datastores.run_draft_batch(job_contexts)
+
+    assert [
+        call.args
+        for call in mocked_datastore_api.update_job_status.call_args_list
+    ] == [
+        *[(str(job_id), JobStatus.INITIATED) for job_id in range(4)],
+        *[
+            (str(job_id), JobStatus.FAILED, "Failed to write batch of jobs")
+            for job_id in range(4)
+        ],
+    ]
+    assert datastore_dir.get_draft_version() == draft_version_before
+    assert datastore_dir.get_metadata_all_draft() == metadata_all_draft_before
+    assert os.path.exists(DATASTORE_DIR / "data/DRAFT_ADD")
+    assert not datastore_dir.temporary_backup_exists()
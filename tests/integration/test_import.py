@@ -1,3 +1,4 @@
+import json
 import os
 from dataclasses import dataclass
 from datetime import UTC, datetime
@@ -32,6 +33,28 @@ WORKING_DIR = RESOURCES_DIR / "TEST_DATASTORE_working"
 INPUT_DIR = RESOURCES_DIR / "TEST_DATASTORE_input"
 
 
+def read_metrics_steps(dataset_name: str) -> list[str]:
+    metrics_path = WORKING_DIR / f"{dataset_name}__DRAFT.metrics.json"
+    with open(metrics_path, encoding="utf-8") as f:
+        metrics = json.load(f)
+    assert metrics["datasetName"] == dataset_name
+    return [step["step"] for step in metrics["steps"]]
+
+
+def assert_reported_statuses(
+    update_job_status: MagicMock, expected_statuses: list[JobStatus]
+) -> None:
+    """
+    Intermediate statuses may be coalesced by the status reporter, so the
+    reported statuses must be the expected statuses in order, ending with
+    the same final status.
+    """
+    reported = [call.args[1] for call in update_job_status.call_args_list]
+    assert reported[-1] == expected_statuses[-1]
+    remaining = iter(expected_statuses)
+    assert all(status in remaining for status in reported)
+
+
 @dataclass
 class MockedDatastoreApi:
     update_job_status: MagicMock
@@ -113,9 +136,22 @@ def test_import_patch(mocked_datastore_api: MockedDatastoreApi):
         target=DATASET_NAME,
     )
     build_metadata_worker.run_worker(patch_metadata_context, Queue())
-    assert mocked_datastore_api.update_job_status.call_count == 4
+    assert_reported_statuses(
+        mocked_datastore_api.update_job_status,
+        [
+            JobStatus.DECRYPTING,
+            JobStatus.VALIDATING,
+            JobStatus.TRANSFORMING,
+            JobStatus.BUILT,
+        ],
+    )
     assert mocked_datastore_api.update_description.call_count == 1
     assert os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT.json")
+    assert read_metrics_steps(DATASET_NAME) == [
+        "decrypt",
+        "validate",
+        "transform",
+    ]
 
 
 def test_import_add(mocked_datastore_api: MockedDatastoreApi):
@@ -125,10 +161,25 @@ def test_import_add(mocked_datastore_api: MockedDatastoreApi):
         target=DATASET_NAME,
     )
     build_dataset_worker.run_worker(add_context, Queue())
-    assert mocked_datastore_api.update_job_status.call_count == 6
+    assert_reported_statuses(
+        mocked_datastore_api.update_job_status,
+        [
+            JobStatus.DECRYPTING,
+            JobStatus.VALIDATING,
+            JobStatus.TRANSFORMING,
+            JobStatus.PSEUDONYMIZING,
+            JobStatus.BUILT,
+        ],
+    )
     assert mocked_datastore_api.update_description.call_count == 1
     assert os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT.json")
     assert os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT.parquet")
+    assert read_metrics_steps(DATASET_NAME) == [
+        "decrypt",
+        "validate",
+        "transform",
+        "pseudonymize",
+    ]
 
 
 def test_import_change(mocked_datastore_api: MockedDatastoreApi):
@@ -138,7 +189,16 @@ def test_import_change(mocked_datastore_api: MockedDatastoreApi):
         target=DATASET_NAME,
     )
     build_dataset_worker.run_worker(change_context, Queue())
-    assert mocked_datastore_api.update_job_status.call_count == 6
+    assert_reported_statuses(
+        mocked_datastore_api.update_job_status,
+        [
+            JobStatus.DECRYPTING,
+            JobStatus.VALIDATING,
+            JobStatus.TRANSFORMING,
+            JobStatus.PSEUDONYMIZING,
+            JobStatus.BUILT,
+        ],
+    )
     assert mocked_datastore_api.update_description.call_count == 1
     assert os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT.json")
     assert os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT.parquet")
@@ -154,11 +214,26 @@ def test_import_add_no_pseudo(
         target=DATASET_NAME,
     )
     build_dataset_worker.run_worker(add_no_pseudo_context, Queue())
-    assert mocked_datastore_api.update_job_status.call_count == 5
+    assert_reported_statuses(
+        mocked_datastore_api.update_job_status,
+        [
+            JobStatus.DECRYPTING,
+            JobStatus.VALIDATING,
+            JobStatus.TRANSFORMING,
+            JobStatus.PARTITIONING,
+            JobStatus.BUILT,
+        ],
+    )
     assert mocked_datastore_api.update_description.call_count == 1
     assert mocked_pseudonym_service.pseudonymize.call_count == 0
     assert os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT.json")
     assert os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT.parquet")
+    assert read_metrics_steps(DATASET_NAME) == [
+        "decrypt",
+        "validate",
+        "transform",
+        "move",
+    ]
 
 
 def test_import_add_partitioned(mocked_datastore_api: MockedDatastoreApi):
@@ -168,10 +243,23 @@ def test_import_add_partitioned(mocked_datastore_api: MockedDatastoreApi):
         target=DATASET_NAME,
     )
     build_dataset_worker.run_worker(add_partitioned_context, Queue())
-    assert mocked_datastore_api.update_job_status.call_count == 6
+    assert_reported_statuses(
+        mocked_datastore_api.update_job_status,
+        [
+            JobStatus.DECRYPTING,
+            JobStatus.VALIDATING,
+            JobStatus.TRANSFORMING,
+            JobStatus.PSEUDONYMIZING,
+            JobStatus.BUILT,
+        ],
+    )
     assert mocked_datastore_api.update_description.call_count == 1
     assert os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT.json")
     assert os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT")
+    assert not os.path.exists(WORKING_DIR / f"{DATASET_NAME}.parquet")
+    assert not os.path.exists(
+        WORKING_DIR / f"{DATASET_NAME}_pseudonymized.parquet"
+    )
 
 
 def test_import_add_invalid(mocked_datastore_api: MockedDatastoreApi):
@@ -181,11 +269,17 @@ def test_import_add_invalid(mocked_datastore_api: MockedDatastoreApi):
         target=DATASET_NAME,
     )
     build_dataset_worker.run_worker(add_invalid_context, Queue())
-    assert mocked_datastore_api.update_job_status.call_count == 3
+    assert_reported_statuses(
+        mocked_datastore_api.update_job_status,
+        [JobStatus.DECRYPTING, JobStatus.VALIDATING, JobStatus.FAILED],
+    )
     assert mocked_datastore_api.update_description.call_count == 0
     assert os.path.exists(INPUT_DIR / f"archive/{DATASET_NAME}.tar")
     assert not os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT.json")
     assert not os.path.exists(WORKING_DIR / f"{DATASET_NAME}__DRAFT")
+    assert not os.path.exists(
+        WORKING_DIR / f"{DATASET_NAME}__DRAFT.metrics.json"
+    )
 
 
 @pytest.fixture
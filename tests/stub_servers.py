@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_pseudonym(identifier: str) -> int:
+    return zlib.crc32(identifier.encode("utf-8"))
+
+
+class PseudonymServiceStub:
+    """
+    Local HTTP stand-in for the pseudonym service. Every POSTed list of
+    identifiers is answered with a pseudonym for each identifier.
+
+    * latency_seconds: float - time to wait before answering each request
+    * seconds_per_identifier: float - additional time to wait for each
+      identifier in the request
+    * failures: dict - maps an identifier to the number of times a chunk
+      containing it should be answered with failure_status_code
+    * failure_status_code: int - status code of the injected failures
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        seconds_per_identifier: float = 0.0,
+        failures: dict[str, int] | None = None,
+        failure_status_code: int = 502,
+    ):
+        self.latency_seconds = latency_seconds
+        self.seconds_per_identifier = seconds_per_identifier
+        self.failures = dict(failures or {})
+        self.failure_status_code = failure_status_code
+        self.received_chunks: list[list[str]] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), self._create_handler()
+        )
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _should_fail(self, chunk: list[str]) -> bool:
+        with self._lock:
+            self.received_chunks.append(chunk)
+            for identifier in chunk:
+                if self.failures.get(identifier, 0) > 0:
+                    self.failures[identifier] -= 1
+                    return True
+        return False
+
+    def _create_handler(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers["Content-Length"])
+                chunk = json.loads(self.rfile.read(length))
+                time.sleep(
+                    stub.latency_seconds
+                    + stub.seconds_per_identifier * len(chunk)
+                )
+                if stub._should_fail(chunk):
+                    self._respond(stub.failure_status_code, b"stub failure")
+                    return
+                body = json.dumps(
+                    {
+                        identifier: stub_pseudonym(identifier)
+                        for identifier in chunk
+                    }
+                ).encode("utf-8")
+                self._respond(200, body)
+
+            def _respond(self, status_code: int, body: bytes):
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # noqa: A002
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "PseudonymServiceStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class DatastoreApiStub:
+    """
+    Local HTTP stand-in for the datastore api that answers every request
+    with {"message": "OK"} over keep-alive connections. Counts the requests
+    and the client connections it has served.
+    """
+
+    def __init__(self) -> None:
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), self._create_handler()
+        )
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _create_handler(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connection_count += 1
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                with stub._lock:
+                    stub.request_count += 1
+                body = b'{"message": "OK"}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_PUT = do_POST = _respond
+
+            def log_message(self, format, *args):  # noqa: A002
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "DatastoreApiStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -1,3 +1,4 @@
+import copy
 import json
 import os
 import shutil
@@ -5,6 +6,7 @@ import shutil
 from job_executor.adapter.fs.models.metadata import (
     Metadata,
     MetadataAll,
+    MetadataAllDraft,
 )
 
 
@@ -52,6 +54,34 @@ def test_metadata_all():
     ) == load_json(METADATA_ALL_PATH)
 
 
+def test_metadata_all_draft_index():
+    metadata_all = MetadataAllDraft(**load_json(METADATA_ALL_PATH))
+    kjoenn = metadata_all.get("KJOENN")
+    assert kjoenn is not None
+    assert kjoenn.name == "KJOENN"
+    assert metadata_all.get("NO_SUCH_DATASET") is None
+
+    metadata_all.remove("INNTEKT")
+    metadata_all.update_one("KJOENN", kjoenn)
+    assert metadata_all.get("INNTEKT") is None
+    assert [ds.name for ds in metadata_all.data_structures] == [
+        "SIVSTAND",
+        "FOEDSELSVEKT",
+        "UTDANNING",
+        "KJOENN",
+    ]
+
+    copied = copy.copy(metadata_all)
+    copied.remove("SIVSTAND")
+    assert copied.get("SIVSTAND") is None
+    assert metadata_all.get("SIVSTAND") is not None
+    assert copied.get("KJOENN") is metadata_all.get("KJOENN")
+
+    metadata_all.data_structures = [kjoenn]
+    assert metadata_all.get("UTDANNING") is None
+    assert metadata_all.get("KJOENN") is kjoenn
+
+
 def test_metadata():
     enumerated_metadata = Metadata(**ENUMERATED_METADATA)
     assert (
@@ -0,0 +1,139 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from job_executor.adapter.fs.archive_directory import (
+    ArchiveDirectory,
+    ArchiveRetention,
+)
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+DRAFT_VERSION = json.dumps({"version": "1.0.0.0"}, indent=2)
+METADATA_ALL = json.dumps({"dataStructures": ["x" * 1000] * 100}, indent=2)
+
+
+def _archive_backup(archive_path: Path, days_ago: int) -> Path:
+    backup_dir = archive_path / f"tmp_{NOW - timedelta(days=days_ago)}"
+    os.makedirs(backup_dir)
+    (backup_dir / "draft_version.json").write_text(DRAFT_VERSION)
+    (backup_dir / "metadata_all__DRAFT.json").write_text(METADATA_ALL)
+    return backup_dir
+
+
+def _archive_draft_version(archive_path: Path, days_ago: int) -> Path:
+    timestamp = NOW - timedelta(days=days_ago)
+    draft_version_path = (
+        archive_path / f"draft_version_1.0.0.0_{timestamp}.json"
+    )
+    os.makedirs(archive_path, exist_ok=True)
+    draft_version_path.write_text(DRAFT_VERSION)
+    return draft_version_path
+
+
+def test_list_snapshots_newest_first(tmp_path: Path):
+    archive_dir = ArchiveDirectory(tmp_path)
+    old_backup = _archive_backup(tmp_path, 10)
+    draft_version = _archive_draft_version(tmp_path, 5)
+    new_backup = _archive_backup(tmp_path, 1)
+    assert [snapshot.path for snapshot in archive_dir.list_snapshots()] == [
+        new_backup,
+        draft_version,
+        old_backup,
+    ]
+    assert archive_dir.list_snapshots()[0].archived_at == NOW - timedelta(
+        days=1
+    )
+
+
+def test_compact_by_count_and_age(tmp_path: Path):
+    archive_dir = ArchiveDirectory(tmp_path)
+    for days_ago in [1, 2, 3, 40]:
+        _archive_backup(tmp_path, days_ago)
+    result = archive_dir.compact(
+        ArchiveRetention(max_count=3, max_age=timedelta(days=30)), NOW
+    )
+    assert result.deleted_snapshots == 1
+    result = archive_dir.compact(
+        ArchiveRetention(max_count=2, max_age=timedelta(days=30)), NOW
+    )
+    assert result.deleted_snapshots == 1
+    assert [
+        snapshot.archived_at for snapshot in archive_dir.list_snapshots()
+    ] == [NOW - timedelta(days=1), NOW - timedelta(days=2)]
+
+
+def test_compact_compresses_and_deduplicates(tmp_path: Path):
+    archive_dir = ArchiveDirectory(tmp_path)
+    old_backups = [_archive_backup(tmp_path, days) for days in [10, 20]]
+    old_draft_version = _archive_draft_version(tmp_path, 10)
+    new_backup = _archive_backup(tmp_path, 1)
+    result = archive_dir.compact(
+        ArchiveRetention(compress_after=timedelta(days=7)), NOW
+    )
+    assert result.deleted_snapshots == 0
+    assert result.compressed_files == 5
+    assert result.bytes_after < result.bytes_before
+    for backup_dir in old_backups:
+        assert sorted(os.listdir(backup_dir)) == [
+            "draft_version.json.gz",
+            "metadata_all__DRAFT.json.gz",
+        ]
+        assert (
+            gzip.decompress(
+                (backup_dir / "metadata_all__DRAFT.json.gz").read_bytes()
+            ).decode()
+            == METADATA_ALL
+        )
+    assert os.path.samefile(
+        old_backups[0] / "metadata_all__DRAFT.json.gz",
+        old_backups[1] / "metadata_all__DRAFT.json.gz",
+    )
+    assert os.path.samefile(
+        old_backups[0] / "draft_version.json.gz",
+        old_draft_version.with_name(f"{old_draft_version.name}.gz"),
+    )
+    assert not old_draft_version.exists()
+    assert sorted(os.listdir(new_backup)) == [
+        "draft_version.json",
+        "metadata_all__DRAFT.json",
+    ]
+    assert len(os.listdir(archive_dir.objects_dir)) == 2
+
+    # Compressed snapshots are not compressed again
+    result = archive_dir.compact(
+        ArchiveRetention(compress_after=timedelta(days=7)), NOW
+    )
+    assert result.compressed_files == 0
+
+
+def test_compact_by_bytes(tmp_path: Path):
+    archive_dir = ArchiveDirectory(tmp_path)
+    for days_ago in [1, 2, 3]:
+        backup_dir = _archive_backup(tmp_path, days_ago)
+        (backup_dir / "metadata_all__DRAFT.json").write_text(
+            METADATA_ALL + str(days_ago)
+        )
+    backup_bytes = len(DRAFT_VERSION) + len(METADATA_ALL) + 1
+    result = archive_dir.compact(
+        ArchiveRetention(max_bytes=2 * backup_bytes), NOW
+    )
+    assert result.deleted_snapshots == 1
+    assert result.bytes_before == 3 * backup_bytes
+    assert result.bytes_after == archive_dir.total_bytes() == 2 * backup_bytes
+    assert archive_dir.list_snapshots()[-1].archived_at == NOW - timedelta(
+        days=2
+    )
+
+
+def test_compact_deletes_unused_objects(tmp_path: Path):
+    archive_dir = ArchiveDirectory(tmp_path)
+    _archive_backup(tmp_path, 10)
+    archive_dir.compact(ArchiveRetention(compress_after=timedelta(days=7)), NOW)
+    assert len(os.listdir(archive_dir.objects_dir)) == 2
+    result = archive_dir.compact(ArchiveRetention(max_count=0), NOW)
+    assert result.deleted_snapshots == 1
+    assert result.deleted_objects == 2
+    assert os.listdir(archive_dir.objects_dir) == []
+    assert archive_dir.total_bytes() == 0
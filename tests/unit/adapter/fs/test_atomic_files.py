@@ -0,0 +1,109 @@
+import json
+import multiprocessing
+import os
+import random
+import signal
+import time
+from pathlib import Path
+
+import pytest
+
+from job_executor.adapter.fs.atomic_files import write_atomic
+from job_executor.adapter.fs.datastore_files import DatastoreDirectory
+
+# Two versions of a file that are large enough to take several writes
+VERSIONS = [
+    json.dumps([{"version": version, "value": "x" * 100}] * 20_000, indent=2)
+    for version in range(2)
+]
+
+
+def _write_forever(file_path: Path) -> None:
+    version = 0
+    while True:
+        write_atomic(file_path, VERSIONS[version])
+        version = 1 - version
+
+
+def _start_writer(file_path: Path) -> multiprocessing.Process:
+    writer = multiprocessing.get_context("fork").Process(
+        target=_write_forever, args=(file_path,), daemon=True
+    )
+    writer.start()
+    return writer
+
+
+def test_write_atomic(tmp_path: Path):
+    file_path = tmp_path / "file.json"
+    write_atomic(file_path, VERSIONS[0])
+    os.chmod(file_path, 0o640)
+    write_atomic(file_path, VERSIONS[1].encode("utf-8"))
+    assert file_path.read_text() == VERSIONS[1]
+    assert file_path.stat().st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["file.json"]
+
+
+def test_failed_write_keeps_previous_file(mocker, tmp_path: Path):
+    file_path = tmp_path / "file.json"
+    write_atomic(file_path, VERSIONS[0])
+    mocker.patch("os.replace", side_effect=OSError("No space left on device"))
+    with pytest.raises(OSError):
+        write_atomic(file_path, VERSIONS[1])
+    assert file_path.read_text() == VERSIONS[0]
+    assert os.listdir(tmp_path) == ["file.json"]
+
+
+def test_readers_never_see_partial_file(tmp_path: Path):
+    file_path = tmp_path / "file.json"
+    write_atomic(file_path, VERSIONS[0])
+    writer = _start_writer(file_path)
+    try:
+        seen_versions = set()
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            content = file_path.read_text()
+            assert content in VERSIONS
+            seen_versions.add(content)
+    finally:
+        writer.kill()
+        writer.join()
+    assert len(seen_versions) == 2
+
+
+def test_killed_writer_leaves_complete_file(tmp_path: Path):
+    file_path = tmp_path / "file.json"
+    write_atomic(file_path, VERSIONS[0])
+    for _ in range(20):
+        writer = _start_writer(file_path)
+        time.sleep(random.uniform(0.001, 0.05))
+        os.kill(writer.pid, signal.SIGKILL)
+        writer.join()
+        assert file_path.read_text() in VERSIONS
+
+
+def test_failed_datastore_write_keeps_previous_file(mocker, tmp_path: Path):
+    os.makedirs(tmp_path / "datastore")
+    datastore_dir = DatastoreDirectory(tmp_path)
+    draft_metadata_all = {
+        "dataStore": {
+            "name": "no.ssb.test",
+            "label": "Test",
+            "description": "Test",
+            "languageCode": "no",
+        },
+        "languages": [{"code": "no", "label": "Norsk"}],
+        "dataStructures": [],
+    }
+    write_atomic(
+        datastore_dir.draft_metadata_all_path, json.dumps(draft_metadata_all)
+    )
+    metadata_all_draft = datastore_dir.get_metadata_all_draft()
+    metadata_all_draft.data_store.label = "Changed"
+    mocker.patch("os.fsync", side_effect=OSError("Input/output error"))
+    with pytest.raises(OSError):
+        datastore_dir.write_metadata_all_draft(metadata_all_draft)
+    assert (
+        json.loads(datastore_dir.draft_metadata_all_path.read_text())
+        == draft_metadata_all
+    )
+    assert os.listdir(tmp_path / "datastore") == ["metadata_all__DRAFT.json"]
@@ -0,0 +1,28 @@
+import json
+import tarfile
+from pathlib import Path
+
+from job_executor.adapter.fs.input_files import InputDirectory
+
+METADATA = {"temporalityType": "FIXED", "identifierVariables": [{}]}
+
+
+def _package(input_path: Path, dataset_name: str, members: list[str]) -> None:
+    dataset_dir = input_path / dataset_name
+    dataset_dir.mkdir(parents=True)
+    (dataset_dir / f"{dataset_name}.json").write_text(json.dumps(METADATA))
+    (dataset_dir / f"{dataset_name}.parquet.encr").write_bytes(b"x" * 1024)
+    with tarfile.open(input_path / f"{dataset_name}.tar", "w") as tar:
+        for member in members:
+            tar.add(dataset_dir / member, arcname=member)
+
+
+def test_get_importable_metadata(tmp_path: Path):
+    input_dir = InputDirectory(tmp_path)
+    _package(tmp_path, "FIRST", ["FIRST.json", "FIRST.parquet.encr"])
+    _package(tmp_path, "LAST", ["LAST.parquet.encr", "LAST.json"])
+    _package(tmp_path, "MISSING", ["MISSING.parquet.encr"])
+    assert input_dir.get_importable_metadata("FIRST") == METADATA
+    assert input_dir.get_importable_metadata("LAST") == METADATA
+    assert input_dir.get_importable_metadata("MISSING") is None
+    assert input_dir.get_importable_metadata("NO_TAR") is None
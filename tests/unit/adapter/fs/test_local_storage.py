@@ -6,6 +6,7 @@ from pathlib import Path
 import pytest
 
 from job_executor.adapter.fs import LocalStorageAdapter
+from job_executor.adapter.fs.datastore_files import DatastoreDirectory
 from job_executor.adapter.fs.models.datastore_versions import (
     DatastoreVersions,
     DraftVersion,
@@ -88,6 +89,15 @@ def test_write_draft_version():
     )
 
 
+def test_metadata_stamp_survives_new_datastore_directory():
+    datastore_dir = local_storage.datastore_dir
+    stamp = datastore_dir.get_metadata_stamp("1_0_0")
+    datastore_dir.write_draft_version(datastore_dir.get_draft_version())
+    rebuilt_datastore_dir = DatastoreDirectory(datastore_dir.root_dir)
+    assert rebuilt_datastore_dir.generation == datastore_dir.generation
+    assert rebuilt_datastore_dir.get_metadata_stamp("1_0_0") != stamp
+
+
 def test_get_datastore_versions():
     assert isinstance(
         local_storage.datastore_dir.get_datastore_versions(), DatastoreVersions
@@ -120,19 +130,29 @@ def test_write_metadata_all():
     )
 
 
+def test_written_json_format():
+    # Files are written as json.dump(model_dump(...), indent=2) would
+    metadata_all = local_storage.datastore_dir.get_metadata_all("1_0_0")
+    metadata_all.data_store.description = "Datalager for forskning på æøå"
+    local_storage.datastore_dir.write_metadata_all(metadata_all, "1_0_0")
+    with open(METADATA_ALL_PATH, "rb") as f:
+        assert f.read() == json.dumps(
+            metadata_all.model_dump(by_alias=True, exclude_none=True),
+            indent=2,
+        ).encode("ascii")
+    draft_version = local_storage.datastore_dir.get_draft_version()
+    local_storage.datastore_dir.write_draft_version(draft_version)
+    with open(DRAFT_VERSION_PATH, "rb") as f:
+        assert f.read() == json.dumps(
+            draft_version.model_dump(by_alias=True), indent=2
+        ).encode("ascii")
+
+
 def delete_parquet_draft():
     local_storage.datastore_dir.delete_parquet_draft(DRAFT_DATASET_NAME)
     assert not os.path.isfile(DRAFT_DATA_PATH)
 
 
-def test_rename_parquet_draft_to_release():
-    release_path = local_storage.datastore_dir.rename_parquet_draft_to_release(
-        DRAFT2_DATASET_NAME, "1_1_0"
-    )
-    assert os.path.isdir(RELEASED_DRAFT2_DATA_PATH)
-    assert release_path == f"{DRAFT2_DATASET_NAME}__1_1"
-
-
 def test_move_working_dir_parquet_to_datastore():
     local_storage.datastore_dir.make_dataset_dir(WORKING_DIR_DATASET)
     local_storage.move_working_dir_parquet_to_datastore(WORKING_DIR_DATASET)
@@ -151,8 +171,9 @@ def test_make_temp_directory():
         "metadata_all__DRAFT.json",
         "datastore_versions.json",
         "draft_version.json",
+        "manifest.json",
     ]
-    assert len(tmp_actual_content) == 3
+    assert len(tmp_actual_content) == 4
     for content in tmp_expected_content:
         assert content in tmp_actual_content
 
@@ -175,6 +196,62 @@ def test_archive_temp_directory():
     assert not os.path.isdir(Path(DATASTORE_DIR) / "datastore" / "tmp")
 
 
+def test_restore_temp_directory():
+    datastore_dir = local_storage.datastore_dir
+    draft_version = datastore_dir.draft_version_path.read_bytes()
+    datastore_dir.save_temporary_backup()
+    # Files are replaced, never written in place, so a hardlinked backup
+    # keeps the content from when it was made
+    datastore_dir.write_draft_version(
+        DraftVersion(
+            version="1.2.0.0",
+            description="Changed",
+            release_time=0,
+            language_code="no",
+            update_type=None,
+            data_structure_updates=[],
+        )
+    )
+    assert datastore_dir.draft_version_path.read_bytes() != draft_version
+    datastore_dir.restore_from_temporary_backup()
+    assert datastore_dir.draft_version_path.read_bytes() == draft_version
+
+
+def test_restore_temp_directory_checksum_mismatch():
+    datastore_dir = local_storage.datastore_dir
+    datastore_versions = datastore_dir.datastore_versions_path.read_bytes()
+    datastore_dir.save_temporary_backup()
+    tmp_dir = Path(DATASTORE_DIR) / "datastore" / "tmp"
+    os.remove(tmp_dir / "draft_version.json")
+    (tmp_dir / "draft_version.json").write_text("{}")
+    with pytest.raises(LocalStorageError) as e:
+        datastore_dir.restore_from_temporary_backup()
+    assert "Checksum mismatch for backup file draft_version.json" in str(e)
+    assert os.path.isfile(tmp_dir / "datastore_versions.json")
+    assert (
+        datastore_dir.datastore_versions_path.read_bytes() == datastore_versions
+    )
+
+
+def test_archive_temp_directory_deduplicates_files():
+    datastore_dir = local_storage.datastore_dir
+    for _ in range(2):
+        datastore_dir.save_temporary_backup()
+        datastore_dir.archive_temporary_backup()
+    archive_dir = Path(DATASTORE_DIR) / "archive"
+    archived_backups = [
+        archive_dir / content
+        for content in os.listdir(archive_dir)
+        if content.startswith("tmp_")
+    ]
+    assert len(archived_backups) == 2
+    assert len(os.listdir(archive_dir / "objects")) == 4
+    for file_name in os.listdir(archived_backups[0]):
+        assert os.path.samefile(
+            archived_backups[0] / file_name, archived_backups[1] / file_name
+        )
+
+
 def test_archived_temp_directory_unrecognized_files():
     local_storage.datastore_dir.save_temporary_backup()
     tmp_dir = Path(DATASTORE_DIR) / "datastore" / "tmp"
@@ -193,3 +270,34 @@ def test_archive_or_delete_non_existent_tmp_dir():
     with pytest.raises(LocalStorageError) as e:
         local_storage.datastore_dir.delete_temporary_backup()
     assert "Could not find a tmp directory to delete." in str(e)
+
+
+def test_release_and_revert_parquet_drafts():
+    datastore_dir = local_storage.datastore_dir
+    parquet_rename = datastore_dir.plan_parquet_release(
+        DRAFT_DATASET_NAME, "1_1_0"
+    )
+    assert parquet_rename.release_name == "UTDANNING__1_1.parquet"
+    assert os.path.isfile(DRAFT_DATA_PATH)
+
+    datastore_dir.release_parquet_drafts([parquet_rename], max_workers=4)
+    # Releasing again resumes a partly released plan
+    datastore_dir.release_parquet_drafts([parquet_rename], max_workers=4)
+    assert not os.path.exists(DRAFT_DATA_PATH)
+    assert os.path.isfile(
+        f"{DATASTORE_DATA_DIR}/UTDANNING/UTDANNING__1_1.parquet"
+    )
+
+    datastore_dir.revert_parquet_releases([parquet_rename])
+    datastore_dir.revert_parquet_releases([parquet_rename])
+    assert os.path.isfile(DRAFT_DATA_PATH)
+
+
+def test_release_partitioned_parquet_draft():
+    datastore_dir = local_storage.datastore_dir
+    parquet_rename = datastore_dir.plan_parquet_release(
+        DRAFT2_DATASET_NAME, "1_1_0"
+    )
+    assert parquet_rename.release_name == f"{DRAFT2_DATASET_NAME}__1_1"
+    datastore_dir.release_parquet_drafts([parquet_rename], max_workers=4)
+    assert os.path.isdir(RELEASED_DRAFT2_DATA_PATH)
@@ -0,0 +1,168 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from job_executor.adapter.fs.atomic_files import write_atomic
+from job_executor.adapter.fs.operation_journal import OperationJournal
+from job_executor.common.exceptions import LocalStorageError
+
+
+class Crash(BaseException):
+    """
+    Stops a transaction the way a killed process would, without running
+    any of the exception handlers of the code under test.
+    """
+
+
+def _get_paths(tmp_path: Path) -> tuple[Path, Path, Path, Path]:
+    return (
+        tmp_path / "datastore" / "draft_version.json",
+        tmp_path / "datastore" / "metadata_all__DRAFT.json",
+        tmp_path / "working" / "DATASET__DRAFT.parquet",
+        tmp_path / "data" / "DATASET" / "DATASET__DRAFT.parquet",
+    )
+
+
+def _set_up_files(tmp_path: Path) -> tuple[Path, Path, Path, Path]:
+    paths = _get_paths(tmp_path)
+    draft_version, metadata_all, working_parquet, datastore_parquet = paths
+    for file_path in [draft_version, metadata_all, working_parquet]:
+        os.makedirs(file_path.parent, exist_ok=True)
+        file_path.write_text(f"{file_path.name} before")
+    os.makedirs(datastore_parquet.parent)
+    return paths
+
+
+def _read_files(tmp_path: Path) -> dict[str, str]:
+    return {
+        str(file_path.relative_to(tmp_path)): file_path.read_text()
+        for file_path in tmp_path.rglob("*")
+        if file_path.is_file() and "journal" not in file_path.parts
+    }
+
+
+def _run_transaction(tmp_path: Path, crash_at: int | None = None) -> None:
+    """
+    Runs an import like transaction on the files, and crashes before
+    change number crash_at of the transaction is made.
+    """
+    draft_version, metadata_all, working_parquet, datastore_parquet = (
+        _get_paths(tmp_path)
+    )
+    journal = OperationJournal(tmp_path / "datastore" / "journal")
+    changes = [
+        lambda: journal.record_replace(draft_version),
+        lambda: write_atomic(draft_version, "draft_version.json after"),
+        lambda: journal.record_replace(metadata_all),
+        lambda: write_atomic(metadata_all, "metadata_all__DRAFT.json after"),
+        lambda: journal.record_move(working_parquet, datastore_parquet),
+        lambda: shutil.move(working_parquet, datastore_parquet),
+        lambda: journal.commit(),
+    ]
+    journal.begin("job", "ADD", "DATASET")
+    for change_number, change in enumerate(changes):
+        if change_number == crash_at:
+            raise Crash()
+        change()
+
+
+def test_commit(tmp_path: Path):
+    _set_up_files(tmp_path)
+    _run_transaction(tmp_path)
+    journal = OperationJournal(tmp_path / "datastore" / "journal")
+    assert journal.open_transaction() is None
+    assert os.listdir(journal.path) == []
+    assert journal.undo() is None
+    assert _read_files(tmp_path) == {
+        "datastore/draft_version.json": "draft_version.json after",
+        "datastore/metadata_all__DRAFT.json": "metadata_all__DRAFT.json after",
+        "data/DATASET/DATASET__DRAFT.parquet": "DATASET__DRAFT.parquet before",
+    }
+
+
+@pytest.mark.parametrize("crash_at", range(7))
+def test_undo_after_crash(tmp_path: Path, crash_at: int):
+    _set_up_files(tmp_path)
+    files_before = _read_files(tmp_path)
+    with pytest.raises(Crash):
+        _run_transaction(tmp_path, crash_at)
+    # Recovery runs in a new process, from what is on disk
+    journal = OperationJournal(tmp_path / "datastore" / "journal")
+    assert journal.open_transaction() == {
+        "type": "begin",
+        "jobId": "job",
+        "operation": "ADD",
+        "datasetName": "DATASET",
+    }
+    assert journal.undo() is not None
+    assert _read_files(tmp_path) == files_before
+    assert journal.open_transaction() is None
+    assert os.listdir(journal.path) == []
+
+
+def test_interrupted_undo_is_undone_again(mocker, tmp_path: Path):
+    _set_up_files(tmp_path)
+    files_before = _read_files(tmp_path)
+    with pytest.raises(Crash):
+        _run_transaction(tmp_path, crash_at=6)
+    journal = OperationJournal(tmp_path / "datastore" / "journal")
+    replace = os.replace
+    replace_calls = []
+
+    def crash_on_second_replace(source: Path, target: Path) -> None:
+        replace_calls.append(target)
+        if len(replace_calls) == 2:
+            raise Crash()
+        replace(source, target)
+
+    mocker.patch("os.replace", side_effect=crash_on_second_replace)
+    with pytest.raises(Crash):
+        journal.undo()
+    mocker.stopall()
+    assert journal.open_transaction() is not None
+    journal.undo()
+    assert _read_files(tmp_path) == files_before
+
+
+def test_torn_record_is_ignored(tmp_path: Path):
+    _set_up_files(tmp_path)
+    with pytest.raises(Crash):
+        _run_transaction(tmp_path, crash_at=2)
+    journal = OperationJournal(tmp_path / "datastore" / "journal")
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"type": "move", "source": "/data/DATA')
+    assert [record["type"] for record in journal.read_records()] == [
+        "begin",
+        "replace",
+    ]
+    journal.undo()
+    assert (
+        tmp_path / "datastore" / "draft_version.json"
+    ).read_text() == "draft_version.json before"
+
+
+def test_undo_move_interrupted_across_filesystems(tmp_path: Path):
+    _, _, working_parquet, datastore_parquet = _set_up_files(tmp_path)
+    journal = OperationJournal(tmp_path / "datastore" / "journal")
+    journal.begin("job", "CHANGE", "DATASET")
+    journal.record_move(working_parquet, datastore_parquet)
+    # shutil.move copies before it deletes the source
+    shutil.copyfile(working_parquet, datastore_parquet)
+    journal.undo()
+    assert working_parquet.exists()
+    assert not datastore_parquet.exists()
+
+
+def test_one_open_transaction(tmp_path: Path):
+    journal = OperationJournal(tmp_path / "journal")
+    with pytest.raises(LocalStorageError):
+        journal.record_replace(tmp_path / "draft_version.json")
+    journal.begin("job", "ADD", "DATASET")
+    with pytest.raises(LocalStorageError) as e:
+        journal.begin("other job", "ADD", "OTHER_DATASET")
+    assert "already open" in str(e)
+    journal.commit()
+    with pytest.raises(LocalStorageError):
+        journal.commit()
@@ -0,0 +1,83 @@
+import os
+import shutil
+import stat
+from pathlib import Path
+
+import pyarrow
+from microdata_tools.validation.model.metadata import UnitIdType
+
+from job_executor.adapter.fs.pseudonym_cache_directory import (
+    PseudonymCacheDirectory,
+)
+
+CACHE_DIR = Path("tests/unit/resources/adapter/fs/pseudonym_cache")
+IDENTIFIERS = pyarrow.array([f"i{count}" for count in range(100)])
+PSEUDONYMS = pyarrow.array(list(range(100)), pyarrow.int64())
+
+
+def setup_function():
+    if os.path.isdir(CACHE_DIR):
+        shutil.rmtree(CACHE_DIR)
+
+
+def teardown_function():
+    if os.path.isdir(CACHE_DIR):
+        shutil.rmtree(CACHE_DIR)
+
+
+def test_lookup_empty_cache():
+    cache = PseudonymCacheDirectory(CACHE_DIR / "TEST_DATASTORE", 1024**2)
+    cached = cache.lookup(UnitIdType.FNR, IDENTIFIERS)
+    assert cached.null_count == len(IDENTIFIERS)
+
+
+def test_store_and_lookup():
+    cache = PseudonymCacheDirectory(CACHE_DIR / "TEST_DATASTORE", 1024**2)
+    cache.store(UnitIdType.FNR, IDENTIFIERS[:50], PSEUDONYMS[:50])
+    cached = cache.lookup(UnitIdType.FNR, IDENTIFIERS)
+    assert cached.to_pylist() == list(range(50)) + [None] * 50
+    assert cache.lookup(UnitIdType.ORGNR, IDENTIFIERS).null_count == 100
+
+    cache.store(UnitIdType.FNR, IDENTIFIERS[25:], PSEUDONYMS[25:])
+    cached = cache.lookup(UnitIdType.FNR, IDENTIFIERS)
+    assert cached.to_pylist() == list(range(100))
+
+
+def test_cache_is_only_accessible_by_owner():
+    cache = PseudonymCacheDirectory(CACHE_DIR / "TEST_DATASTORE", 1024**2)
+    cache.store(UnitIdType.FNR, IDENTIFIERS, PSEUDONYMS)
+    segments_dir = cache.path_with_rdn / "FNR"
+    [segment_name] = os.listdir(segments_dir)
+    assert os.listdir(cache.path_with_rdn) == ["FNR"]
+    assert segment_name.endswith(".parquet")
+    for directory in [cache.path_with_rdn, segments_dir]:
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    file_mode = stat.S_IMODE(os.stat(segments_dir / segment_name).st_mode)
+    assert file_mode == 0o600
+
+
+def test_cache_is_isolated_per_datastore():
+    cache = PseudonymCacheDirectory(CACHE_DIR / "TEST_DATASTORE", 1024**2)
+    other_cache = PseudonymCacheDirectory(
+        CACHE_DIR / "OTHER_DATASTORE", 1024**2
+    )
+    cache.store(UnitIdType.FNR, IDENTIFIERS, PSEUDONYMS)
+    assert other_cache.lookup(UnitIdType.FNR, IDENTIFIERS).null_count == 100
+
+
+def test_least_recently_used_segments_are_evicted():
+    cache = PseudonymCacheDirectory(CACHE_DIR / "TEST_DATASTORE", 1024**2)
+    cache.store(UnitIdType.FNR, IDENTIFIERS[:50], PSEUDONYMS[:50])
+    cache.store(UnitIdType.FNR, IDENTIFIERS[50:], PSEUDONYMS[50:])
+    segment_paths = sorted((cache.path_with_rdn / "FNR").iterdir())
+    for segment_path, mtime in zip(segment_paths, [1, 2]):
+        os.utime(segment_path, (mtime, mtime))
+    cache.max_bytes = sum(path.stat().st_size for path in segment_paths)
+
+    # Found in the oldest segment, so the other segment is evicted instead
+    cache.lookup(UnitIdType.FNR, IDENTIFIERS[:10])
+    cache.store(UnitIdType.FNR, pyarrow.array(["new"]), pyarrow.array([100]))
+    assert segment_paths[0].exists()
+    assert not segment_paths[1].exists()
+    cached = cache.lookup(UnitIdType.FNR, IDENTIFIERS)
+    assert cached.to_pylist() == list(range(50)) + [None] * 50
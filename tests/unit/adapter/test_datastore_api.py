@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 from requests_mock import Mocker as RequestsMocker
@@ -12,7 +13,9 @@ from job_executor.adapter.datastore_api.models import (
     ReleaseStatus,
     UserInfo,
 )
+from job_executor.common import metrics
 from job_executor.common.exceptions import HttpResponseError
+from tests.stub_servers import DatastoreApiStub
 
 DATASTORE_API_URL = os.environ["DATASTORE_API_URL"]
 DATASTORE_RDN = "no.ssb.test"
@@ -107,6 +110,60 @@ def test_no_connection(requests_mock: RequestsMocker):
     assert ERROR_RESPONSE in str(e)
 
 
+def test_request_metrics(requests_mock: RequestsMocker):
+    requests_mock.put(
+        f"{DATASTORE_API_URL}/jobs/{JOB_ID}",
+        [{"json": {"message": "OK"}}, {"status_code": 500}],
+    )
+    durations = metrics.DATASTORE_API_REQUEST_DURATION
+    requests_before = durations.get_count(endpoint="update_job")
+    errors_before = metrics.DATASTORE_API_ERRORS.get(endpoint="update_job")
+    datastore_api.update_job_status(JOB_ID, JobStatus.QUEUED)
+    with pytest.raises(HttpResponseError):
+        datastore_api.update_description(JOB_ID, DESCRIPTION)
+    assert durations.get_count(endpoint="update_job") == requests_before + 2
+    assert (
+        metrics.DATASTORE_API_ERRORS.get(endpoint="update_job")
+        == errors_before + 1
+    )
+
+
+def test_pooled_connections(monkeypatch):
+    with DatastoreApiStub() as stub:
+        monkeypatch.setattr(datastore_api, "DATASTORE_API_URL", stub.url)
+        opened_before = metrics.DATASTORE_API_CONNECTIONS_OPENED.get()
+        for _ in range(10):
+            datastore_api.update_job_status(JOB_ID, JobStatus.VALIDATING)
+        datastore_api.get_datastores()
+        datastore_api.get_datastores()
+    assert stub.request_count == 12
+    # One connection for each of the retried and non-retried sessions
+    assert stub.connection_count == 2
+    assert metrics.DATASTORE_API_CONNECTIONS_OPENED.get() == opened_before + 2
+
+
+def test_sessions_are_not_shared_between_threads():
+    session = datastore_api._get_session(retry=True)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        thread_session = executor.submit(
+            datastore_api._get_session, True
+        ).result()
+    assert thread_session is not session
+    assert datastore_api._get_session(retry=True) is session
+
+
+def test_sessions_are_reset_after_fork(monkeypatch):
+    with DatastoreApiStub() as stub:
+        monkeypatch.setattr(datastore_api, "DATASTORE_API_URL", stub.url)
+        datastore_api.update_job_status(JOB_ID, JobStatus.VALIDATING)
+        assert datastore_api._get_sessions()
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if not datastore_api._get_sessions() else 1)
+        _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
 def test_get_maintenance_status(requests_mock: RequestsMocker):
     requests_mock.get(
         f"{DATASTORE_API_URL}/maintenance-statuses/latest",
@@ -131,54 +188,97 @@ def test_get_maintenance_status_error(requests_mock: RequestsMocker):
     assert ERROR_RESPONSE in str(e)
 
 
-@pytest.mark.parametrize(
-    "is_paused,expected_result",
-    [
-        (
-            True,
-            datastore_api.JobQueryResult(
-                built_jobs=JOB_LIST,
-                queued_manager_jobs=[],
-                queued_worker_jobs=[],
-            ),
+def _job(job_id: str, status: JobStatus, operation: Operation) -> Job:
+    return Job(
+        job_id=job_id,
+        datastore_rdn=DATASTORE_RDN,
+        status=status,
+        parameters=JobParameters(
+            target="INNTEKT",
+            operation=operation,
+            release_status=ReleaseStatus.PENDING_RELEASE,
         ),
-        (
-            False,
-            datastore_api.JobQueryResult(
-                built_jobs=JOB_LIST,
-                queued_manager_jobs=JOB_LIST,
-                queued_worker_jobs=JOB_LIST,
-            ),
+        log=[],
+        created_at="2022-05-18T11:40:22.519222",
+        created_by=UserInfo(
+            user_id="123-123-123", first_name="Data", last_name="Admin"
         ),
-    ],
-)
-def test_query_for_jobs(is_paused, expected_result, requests_mock, monkeypatch):
-    monkeypatch.setattr(
-        "job_executor.adapter.datastore_api.is_system_paused", lambda: is_paused
     )
 
-    # Always return built jobs even if system is paused
-    # If system is paused, return empty list for queued and queued_manager jobs
-    def mock_get_jobs(job_status=None, operations=None):
-        if job_status == "built":
-            return JOB_LIST
-        elif job_status == "queued":
-            return JOB_LIST if not is_paused else []
-        elif job_status == "queued_manager":
-            return JOB_LIST if not is_paused else []
 
-    monkeypatch.setattr(
-        "job_executor.adapter.datastore_api.get_jobs", mock_get_jobs
+BUILT_JOB = _job("1", JobStatus.BUILT, Operation.ADD)
+QUEUED_MANAGER_JOB = _job("2", JobStatus.QUEUED, Operation.SET_STATUS)
+QUEUED_WORKER_JOB = _job("3", JobStatus.QUEUED, Operation.CHANGE)
+IN_PROGRESS_JOB = _job("4", JobStatus.VALIDATING, Operation.ADD)
+
+
+def _mock_query_for_jobs(requests_mock: RequestsMocker, is_paused: bool):
+    requests_mock.get(
+        f"{DATASTORE_API_URL}/maintenance-statuses/latest",
+        json={
+            "paused": is_paused,
+            "msg": "OK",
+            "timestamp": "2023-05-08T06:31:00.519222",
+        },
+    )
+    requests_mock.get(
+        f"{DATASTORE_API_URL}/jobs?ignoreCompleted=true",
+        json=[
+            job.model_dump(by_alias=True, exclude_none=True)
+            for job in [
+                BUILT_JOB,
+                QUEUED_MANAGER_JOB,
+                IN_PROGRESS_JOB,
+                QUEUED_WORKER_JOB,
+            ]
+        ],
     )
 
+
+@pytest.mark.parametrize("is_paused", [True, False])
+def test_query_for_jobs(is_paused, requests_mock, monkeypatch):
+    monkeypatch.setattr(datastore_api, "_system_paused", None)
+    _mock_query_for_jobs(requests_mock, is_paused)
+
     result = datastore_api.query_for_jobs()
-    assert result.built_jobs == JOB_LIST
+    assert len(requests_mock.request_history) == 2
+    assert result.built_jobs == [BUILT_JOB]
     if is_paused:
         assert result.queued_manager_jobs == []
         assert result.queued_worker_jobs == []
     else:
-        assert result.queued_manager_jobs == JOB_LIST
-        assert result.queued_worker_jobs == JOB_LIST
+        assert result.queued_manager_jobs == [QUEUED_MANAGER_JOB]
+        assert result.queued_worker_jobs == [QUEUED_WORKER_JOB]
+
+
+def test_query_for_jobs_caches_maintenance_status(requests_mock, monkeypatch):
+    monkeypatch.setattr(datastore_api, "_system_paused", None)
+    _mock_query_for_jobs(requests_mock, is_paused=False)
+
+    datastore_api.query_for_jobs()
+    datastore_api.query_for_jobs()
+    paths = [request.path for request in requests_mock.request_history]
+    assert (
+        sum(path.endswith("/maintenance-statuses/latest") for path in paths)
+        == 1
+    )
+    assert sum(path.endswith("/jobs") for path in paths) == 2
+
+    monkeypatch.setattr(datastore_api, "MAINTENANCE_STATUS_TTL", 0)
+    datastore_api.query_for_jobs()
+    assert len(requests_mock.request_history) == 5
+
+
+def test_query_for_jobs_error(requests_mock, monkeypatch):
+    monkeypatch.setattr(datastore_api, "_system_paused", None)
+    requests_mock.get(
+        f"{DATASTORE_API_URL}/maintenance-statuses/latest",
+        status_code=500,
+        text=ERROR_RESPONSE,
+    )
+    requests_mock.get(f"{DATASTORE_API_URL}/jobs", json=[])
+    result = datastore_api.query_for_jobs()
+    assert result.available_jobs_count == 0
 
 
 def test_post_public_key(requests_mock: RequestsMocker):
@@ -5,6 +5,7 @@ from requests_mock import Mocker as RequestsMocker
 from job_executor.adapter import pseudonym_service
 from job_executor.common.exceptions import HttpResponseError
 from job_executor.config import environment, secrets
+from tests.stub_servers import PseudonymServiceStub, stub_pseudonym
 
 JOB_ID = "123-123-123"
 PSEUDONYM_SERVICE_URL = environment.pseudonym_service_url
@@ -45,3 +46,91 @@ def test_pseudonymize_bad_status(requests_mock: RequestsMocker):
     assert request.json() == IDENTIFIERS
     assert request.headers["X-API-Key"] == API_KEY
     assert "500: error" == str(e.value)
+
+
+def test_pseudonymize_negative_max_retries(
+    mocker, requests_mock: RequestsMocker
+):
+    mocker.patch.object(pseudonym_service, "MAX_RETRIES", -1)
+    requests_mock.post(URL, status_code=503, text="unavailable")
+    with pytest.raises(HttpResponseError) as e:
+        pseudonym_service.pseudonymize(IDENTIFIERS, UNIT_ID_TYPE, JOB_ID)
+    assert len(requests_mock.request_history) == 1
+    assert "503: unavailable" == str(e.value)
+
+
+@pytest.fixture
+def stub_client(mocker):
+    mocker.patch.object(pseudonym_service, "CHUNK_SIZE", 10)
+    mocker.patch.object(pseudonym_service, "MAX_WORKERS", 4)
+    mocker.patch.object(pseudonym_service, "MAX_RETRIES", 2)
+    mocker.patch.object(pseudonym_service, "BACKOFF_FACTOR", 0)
+
+    def use_stub(stub: PseudonymServiceStub) -> PseudonymServiceStub:
+        mocker.patch.object(
+            pseudonym_service, "PSEUDONYM_SERVICE_URL", stub.url
+        )
+        return stub
+
+    return use_stub
+
+
+STUB_IDENTIFIERS = [f"i{count}" for count in range(95)]
+STUB_PSEUDONYM_DICT = {
+    identifier: stub_pseudonym(identifier) for identifier in STUB_IDENTIFIERS
+}
+
+
+def test_pseudonymize_in_chunks(stub_client):
+    with stub_client(PseudonymServiceStub()) as stub:
+        assert (
+            pseudonym_service.pseudonymize(
+                STUB_IDENTIFIERS, UNIT_ID_TYPE, JOB_ID
+            )
+            == STUB_PSEUDONYM_DICT
+        )
+    assert len(stub.received_chunks) == 10
+    assert (
+        sorted(len(chunk) for chunk in stub.received_chunks) == [5] + [10] * 9
+    )
+
+
+def test_pseudonymize_retries_only_failed_chunk(stub_client):
+    with stub_client(PseudonymServiceStub(failures={"i55": 2})) as stub:
+        assert (
+            pseudonym_service.pseudonymize(
+                STUB_IDENTIFIERS, UNIT_ID_TYPE, JOB_ID
+            )
+            == STUB_PSEUDONYM_DICT
+        )
+    assert len(stub.received_chunks) == 12
+    retried_chunks = [chunk for chunk in stub.received_chunks if "i55" in chunk]
+    assert len(retried_chunks) == 3
+
+
+def test_pseudonymize_retries_exhausted(stub_client):
+    with stub_client(PseudonymServiceStub(failures={"i55": 3})) as stub:
+        with pytest.raises(HttpResponseError) as e:
+            pseudonym_service.pseudonymize(
+                STUB_IDENTIFIERS, UNIT_ID_TYPE, JOB_ID
+            )
+    assert "502: stub failure" == str(e.value)
+    assert len([chunk for chunk in stub.received_chunks if "i55" in chunk]) == 3
+
+
+def test_pseudonymize_does_not_retry_client_error(stub_client):
+    with stub_client(
+        PseudonymServiceStub(failures={"i55": 1}, failure_status_code=400)
+    ) as stub:
+        with pytest.raises(HttpResponseError) as e:
+            pseudonym_service.pseudonymize(
+                STUB_IDENTIFIERS, UNIT_ID_TYPE, JOB_ID
+            )
+    assert "400: stub failure" == str(e.value)
+    assert len([chunk for chunk in stub.received_chunks if "i55" in chunk]) == 1
+
+
+def test_pseudonymize_no_identifiers(stub_client):
+    with stub_client(PseudonymServiceStub()) as stub:
+        assert pseudonym_service.pseudonymize([], UNIT_ID_TYPE, JOB_ID) == {}
+    assert stub.received_chunks == []
@@ -0,0 +1,70 @@
+import pytest
+import requests
+
+from job_executor.adapter.datastore_api.models import JobQueryResult
+from job_executor.common import metrics
+from job_executor.domain.manager import Manager
+
+
+def test_counter():
+    counter = metrics.Counter("test_total", "Test counter", ("kind",))
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    counter.inc(kind='b"')
+    assert counter.get(kind="a") == 3
+    assert counter.render() == (
+        "# HELP test_total Test counter\n"
+        "# TYPE test_total counter\n"
+        'test_total{kind="a"} 3\n'
+        'test_total{kind="b\\""} 1'
+    )
+    with pytest.raises(ValueError):
+        counter.inc(other="a")
+
+
+def test_histogram():
+    histogram = metrics.Histogram("test_seconds", "Test histogram", (1, 10))
+    histogram.observe(0.5)
+    histogram.observe(5)
+    histogram.observe(50)
+    assert histogram.get_count() == 3
+    assert histogram.render().splitlines()[2:] == [
+        'test_seconds_bucket{le="1"} 1',
+        'test_seconds_bucket{le="10"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        "test_seconds_sum 55.5",
+        "test_seconds_count 3",
+    ]
+
+
+def test_scrape_metrics_endpoint():
+    manager = Manager(max_workers=4, max_bytes_all_workers=50 * 1024**3)
+    manager.handle_jobs(JobQueryResult())
+    manager.close_logging_thread()
+    metrics.ROLLBACKS.inc(rollback="manager_phase", operation="ADD")
+
+    server = metrics.start_server(0, host="127.0.0.1")
+    try:
+        port = server.server_address[1]
+        response = requests.get(f"http://127.0.0.1:{port}/metrics", timeout=5)
+        not_found = requests.get(f"http://127.0.0.1:{port}/", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    scraped = response.text.splitlines()
+    assert "job_executor_max_workers 4" in scraped
+    assert f"job_executor_max_worker_bytes {50 * 1024**3}" in scraped
+    assert "job_executor_live_workers 0" in scraped
+    assert "job_executor_worker_bytes 0" in scraped
+    assert 'job_executor_queued_jobs{queue="worker"} 0' in scraped
+    assert any(
+        line.startswith(
+            'job_executor_rollbacks_total{rollback="manager_phase",'
+            'operation="ADD"}'
+        )
+        for line in scraped
+    )
+    assert "# TYPE job_executor_job_duration_seconds histogram" in scraped
+    assert not_found.status_code == 404
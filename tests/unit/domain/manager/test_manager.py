@@ -1,18 +1,48 @@
+import threading
 from dataclasses import dataclass
 
+from job_executor.adapter.datastore_api.models import (
+    Job,
+    JobParameters,
+    JobQueryResult,
+    JobStatus,
+    Operation,
+    ReleaseStatus,
+    UserInfo,
+)
+from job_executor.adapter.fs.archive_directory import ArchiveRetention
+from job_executor.adapter.fs.working_files import WorkingDirectory
 from job_executor.domain.manager import Manager
+from job_executor.domain.models import JobContext
+from job_executor.domain.worker.memory_model import (
+    JobFeatures,
+    WorkerMemoryModel,
+)
+from job_executor.domain.worker.metrics import StepMetrics, WorkerMetrics
+from job_executor.domain.worker.models import Worker
+
+MB = 1024**2
+GB = 1024**3
 
 
 @dataclass
 class MockedWorker:
     job_id: str
     job_size: int
+    features: JobFeatures | None = None
+
+    @property
+    def reserved_bytes(self) -> int:
+        return self.job_size
 
     def is_alive(self) -> bool:
         return True
 
     def start(self) -> None: ...
 
+    def sample_rss(self) -> int | None:
+        return None
+
 
 def test_initial_state():
     manager = Manager(
@@ -122,3 +152,252 @@ def test_unregister_job():
     can_spawn = manager.can_spawn_new_worker(new_job_size=1024)
     assert can_spawn is True
     manager.close_logging_thread()
+
+
+def _manager_job(job_id: str, datastore_rdn: str, operation: Operation) -> Job:
+    return Job(
+        job_id=job_id,
+        datastore_rdn=datastore_rdn,
+        status=JobStatus.QUEUED,
+        parameters=JobParameters(
+            operation=operation,
+            target="KJOENN",
+            description="description",
+            release_status=(
+                ReleaseStatus.PENDING_RELEASE
+                if operation == Operation.SET_STATUS
+                else None
+            ),
+        ),
+        log=[],
+        created_at="2022-05-18T11:40:22.519222",
+        created_by=UserInfo(
+            user_id="123-123-123", first_name="Data", last_name="Admin"
+        ),
+    )
+
+
+def test_batches_draft_jobs_per_datastore(mocker):
+    mocker.patch(
+        "job_executor.domain.manager.build_job_context",
+        side_effect=lambda job, handler: JobContext(
+            job=job,
+            handler=handler,
+            local_storage=None,  # type: ignore
+        ),
+    )
+    handled = []
+    mocker.patch(
+        "job_executor.domain.datastores.run_draft_batch",
+        side_effect=lambda job_contexts: handled.append(
+            [job_context.job.job_id for job_context in job_contexts]
+        ),
+    )
+    mocker.patch.object(
+        Manager,
+        "_handle_manager_job",
+        side_effect=lambda job_context: handled.append(job_context.job.job_id),
+    )
+    manager = Manager(
+        max_workers=4,
+        max_bytes_all_workers=50 * 1024**3,
+    )
+    handled_jobs = manager.handle_jobs(
+        JobQueryResult(
+            queued_manager_jobs=[
+                _manager_job("1", "A", Operation.SET_STATUS),
+                _manager_job("2", "B", Operation.DELETE_DRAFT),
+                _manager_job("3", "A", Operation.DELETE_DRAFT),
+                _manager_job("4", "A", Operation.REMOVE),
+                _manager_job("5", "A", Operation.SET_STATUS),
+                _manager_job("6", "B", Operation.SET_STATUS),
+                _manager_job("7", "C", Operation.ROLLBACK_REMOVE),
+            ]
+        )
+    )
+    assert handled_jobs == 7
+    assert handled == [["1", "3"], "4", ["2", "6"], "5", "7"]
+    manager.close_logging_thread()
+
+
+def test_compacts_archives_in_background(mocker):
+    compaction_started = threading.Event()
+    compaction_finished = threading.Event()
+
+    def compact_archives(retention: ArchiveRetention) -> None:
+        compaction_started.set()
+        compaction_finished.wait(timeout=10)
+
+    compact = mocker.patch(
+        "job_executor.domain.archive.compact_archives",
+        side_effect=compact_archives,
+    )
+    manager = Manager(
+        max_workers=4,
+        max_bytes_all_workers=50 * 1024**3,
+        archive_retention=ArchiveRetention(max_count=10),
+        archive_compaction_interval=3600,
+    )
+    try:
+        manager.compact_archives_in_background()
+        assert compaction_started.wait(timeout=10)
+        # Still running, and then too soon after the last compaction
+        manager.compact_archives_in_background()
+        compaction_finished.set()
+        manager.archive_compaction_thread.join()
+        manager.compact_archives_in_background()
+        compact.assert_called_once_with(ArchiveRetention(max_count=10))
+
+        manager.archive_compaction_interval = 0
+        manager.compact_archives_in_background()
+        manager.archive_compaction_thread.join()
+        assert compact.call_count == 2
+    finally:
+        compaction_finished.set()
+        manager.close_logging_thread()
+
+
+def test_admits_workers_by_predicted_peak():
+    memory_model = WorkerMemoryModel()
+    memory_model.record_peak(
+        "1", JobFeatures("ADD", 10 * MB, 2, "FIXED"), 10 * MB, 256 * MB
+    )
+    memory_model.record_peak(
+        "2", JobFeatures("ADD", GB, 2, "FIXED"), GB, 256 * MB + 8 * GB
+    )
+    manager = Manager(
+        max_workers=10,
+        max_bytes_all_workers=10 * GB,
+        memory_model=memory_model,
+    )
+    try:
+        large_job_peak = memory_model.predict(
+            JobFeatures("ADD", GB, 3, "FIXED")
+        )
+        assert large_job_peak == 256 * MB + 8 * GB
+        assert manager.can_spawn_new_worker(large_job_peak)
+        manager.workers.append(MockedWorker("large", large_job_peak))  # type: ignore
+
+        # Small jobs run alongside the large one until the memory is used
+        small_job_peak = memory_model.predict(
+            JobFeatures("ADD", 10 * MB, 2, "FIXED")
+        )
+        assert small_job_peak == 256 * MB + 80 * MB
+        small_jobs = 0
+        while manager.can_spawn_new_worker(small_job_peak):
+            manager.workers.append(  # type: ignore
+                MockedWorker(f"small_{small_jobs}", small_job_peak)
+            )
+            small_jobs += 1
+        assert small_jobs == 5
+    finally:
+        manager.close_logging_thread()
+
+
+def test_worker_reserves_sampled_peak_above_prediction(mocker):
+    mocker.patch(
+        "job_executor.domain.worker.models._read_rss_bytes",
+        side_effect=[3 * GB, GB],
+    )
+    manager = Manager(max_workers=4, max_bytes_all_workers=10 * GB)
+    try:
+        worker = Worker(
+            process=mocker.Mock(pid=123),
+            job_id="1",
+            job_size=GB,
+            predicted_peak_bytes=2 * GB,
+        )
+        manager.workers.append(worker)
+        assert manager.current_total_size == 2 * GB
+        manager.sample_worker_rss()
+        assert manager.current_total_size == 3 * GB
+        manager.sample_worker_rss()
+        assert manager.current_total_size == 3 * GB
+        assert worker.peak_rss_bytes == 3 * GB
+    finally:
+        manager.close_logging_thread()
+
+
+def test_unregister_worker_records_peak(mocker, tmp_path):
+    working_dir = WorkingDirectory(tmp_path)
+    working_dir.write_metrics(
+        "DATASET",
+        WorkerMetrics(
+            job_id="1",
+            dataset_name="DATASET",
+            predicted_peak_rss_bytes=GB,
+            steps=[
+                StepMetrics(step="decrypt", peak_rss_bytes=2 * GB),
+                StepMetrics(step="validate", peak_rss_bytes=5 * GB),
+            ],
+        ).model_dump(by_alias=True),
+    )
+    mocker.patch(
+        "job_executor.domain.manager.get_local_storage",
+        return_value=mocker.Mock(working_dir=working_dir),
+    )
+    model_path = tmp_path / "memory_model.json"
+    manager = Manager(
+        max_workers=4,
+        max_bytes_all_workers=10 * GB,
+        memory_model=WorkerMemoryModel(model_path),
+    )
+    try:
+        features = JobFeatures("ADD", GB, 2, "FIXED")
+        manager.workers.append(
+            Worker(
+                process=mocker.Mock(),
+                job_id="1",
+                job_size=GB,
+                dataset_name="DATASET",
+                datastore_rdn="no.dev.test",
+                features=features,
+                predicted_peak_bytes=GB,
+            )
+        )
+        manager.unregister_worker("1")
+        assert manager.workers == []
+        memory_model = WorkerMemoryModel(model_path)
+        assert memory_model.predict(features) == 5 * GB
+        [observation] = memory_model.state.observations["ADD/FIXED/2"]
+        assert observation.predicted_peak_bytes == GB
+        assert observation.peak_rss_bytes == 5 * GB
+    finally:
+        manager.close_logging_thread()
+
+
+def test_unregister_worker_without_metrics(mocker, tmp_path):
+    mocker.patch(
+        "job_executor.domain.manager.get_local_storage",
+        return_value=mocker.Mock(working_dir=WorkingDirectory(tmp_path)),
+    )
+    memory_model = WorkerMemoryModel()
+    manager = Manager(
+        max_workers=4,
+        max_bytes_all_workers=10 * GB,
+        memory_model=memory_model,
+    )
+    try:
+        features = JobFeatures("ADD", GB, 2, "FIXED")
+        for job_id, exitcode in [("failed", 1), ("killed", -9)]:
+            worker = Worker(
+                process=mocker.Mock(exitcode=exitcode),
+                job_id=job_id,
+                job_size=GB,
+                dataset_name="DATASET",
+                datastore_rdn="no.dev.test",
+                features=features,
+                predicted_peak_bytes=GB,
+            )
+            worker.peak_rss_bytes = 7 * GB
+            manager.workers.append(worker)
+            manager.unregister_worker(job_id)
+        assert manager.workers == []
+        # Only the killed worker is recorded, as a lower bound of its peak
+        [observation] = memory_model.state.observations["ADD/FIXED/2"]
+        assert observation.job_id == "killed"
+        assert observation.lower_bound
+        assert observation.peak_rss_bytes == 7 * GB
+        assert memory_model.predict(features) == 7 * GB
+    finally:
+        manager.close_logging_thread()
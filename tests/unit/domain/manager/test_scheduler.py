@@ -0,0 +1,32 @@
+import time
+from multiprocessing import Process
+
+from job_executor.domain.manager.scheduler import PollScheduler
+
+
+def test_backoff_while_idle():
+    scheduler = PollScheduler(min_interval=1, max_interval=10)
+    intervals = []
+    for _ in range(6):
+        scheduler.record_poll(found_work=False)
+        intervals.append(scheduler.interval)
+    assert intervals == [2, 4, 8, 10, 10, 10]
+    scheduler.record_poll(found_work=True)
+    assert scheduler.interval == 1
+
+
+def test_wait_for_interval():
+    scheduler = PollScheduler(min_interval=0.1, max_interval=1)
+    start = time.perf_counter()
+    assert scheduler.wait([]) is False
+    assert time.perf_counter() - start >= 0.1
+
+
+def test_wait_ends_when_worker_exits():
+    scheduler = PollScheduler(min_interval=30, max_interval=30)
+    process = Process(target=time.sleep, args=(0.2,))
+    process.start()
+    start = time.perf_counter()
+    assert scheduler.wait([process.sentinel]) is True
+    assert time.perf_counter() - start < 10
+    process.join()
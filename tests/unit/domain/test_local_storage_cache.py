@@ -0,0 +1,67 @@
+import shutil
+from pathlib import Path
+
+from job_executor.domain import local_storage
+from job_executor.domain.local_storage import (
+    get_local_storage,
+    invalidate_local_storage,
+    warm_local_storage_cache,
+)
+
+DATASTORE_DIR = Path("tests/unit/resources/adapter/fs/TEST_DATASTORE")
+
+
+def test_get_local_storage_is_cached(mocker):
+    get_datastore_directory = mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        return_value=DATASTORE_DIR,
+    )
+    local_storages = [get_local_storage("no.ssb.test") for _ in range(50)]
+    assert get_datastore_directory.call_count == 1
+    assert all(storage is local_storages[0] for storage in local_storages)
+    assert local_storages[0].working_dir.path == Path(
+        f"{DATASTORE_DIR}_working"
+    )
+
+    invalidate_local_storage("no.ssb.test")
+    assert get_local_storage("no.ssb.test") is not local_storages[0]
+    assert get_datastore_directory.call_count == 2
+
+    mocker.patch.object(local_storage, "LOCAL_STORAGE_TTL", 0)
+    get_local_storage("no.ssb.test")
+    assert get_datastore_directory.call_count == 3
+
+
+def test_get_local_storage_looks_up_moved_directory(mocker, tmp_path):
+    old_dir = tmp_path / "old"
+    new_dir = tmp_path / "new"
+    shutil.copytree(DATASTORE_DIR, old_dir)
+    get_datastore_directory = mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        side_effect=[old_dir, new_dir],
+    )
+    assert get_local_storage("no.ssb.test").datastore_dir.root_dir == old_dir
+    shutil.move(old_dir, new_dir)
+    assert get_local_storage("no.ssb.test").datastore_dir.root_dir == new_dir
+    assert get_local_storage("no.ssb.test").datastore_dir.root_dir == new_dir
+    assert get_datastore_directory.call_count == 2
+
+
+def test_warm_local_storage_cache(mocker):
+    mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastores",
+        return_value=["no.ssb.test", "no.ssb.other"],
+    )
+    get_datastore_directory = mocker.patch(
+        "job_executor.adapter.datastore_api.get_datastore_directory",
+        return_value=DATASTORE_DIR,
+    )
+    assert warm_local_storage_cache() == ["no.ssb.test", "no.ssb.other"]
+    assert get_datastore_directory.call_count == 2
+    get_local_storage("no.ssb.test")
+    get_local_storage("no.ssb.other")
+    assert get_datastore_directory.call_count == 2
+
+    invalidate_local_storage()
+    get_local_storage("no.ssb.test")
+    assert get_datastore_directory.call_count == 3
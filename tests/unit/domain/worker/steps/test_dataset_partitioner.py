@@ -93,6 +93,25 @@ def test_partitioner():
             raise AssertionError(f"Unexpected year: {year}")
 
 
+def test_partitioner_replaces_previous_output():
+    dataset_path = Path(f"{WORKING_DIR}/input_pseudonymized.parquet")
+    output_dir = dataset_path.parent / "input__DRAFT"
+    dataset_partitioner.run(dataset_path, "input")
+    # Left behind by a build of a different version of the dataset
+    os.makedirs(output_dir / "start_year=2019")
+    parquet.write_table(
+        INPUT_TABLE.slice(0, 10), output_dir / "start_year=2019/part-0.parquet"
+    )
+
+    dataset_partitioner.run(dataset_path, "input")
+    assert sorted(os.listdir(output_dir)) == [
+        "start_year=2020",
+        "start_year=2021",
+        "start_year=2022",
+    ]
+    assert len(pyarrow.parquet.read_table(output_dir)) == TABLE_SIZE  # type: ignore
+
+
 def test_partitioner_missing_start_year():
     # remove start_year column from input table
     input_table = INPUT_TABLE.remove_column(2)
@@ -103,3 +122,34 @@ def test_partitioner_missing_start_year():
     dataset_path = Path(f"{WORKING_DIR}/input_pseudonymized.parquet")
     with pytest.raises(BuilderStepError):
         dataset_partitioner.run(dataset_path, "input")
+
+
+def test_partitioner_in_batches_with_file_and_row_group_limits():
+    dataset_path = Path(f"{WORKING_DIR}/input_pseudonymized.parquet")
+    dataset_partitioner.run(
+        dataset_path,
+        "input",
+        batch_size=100,
+        max_rows_per_file=400,
+        max_rows_per_group=200,
+    )
+    output_dir = dataset_path.parent / "input__DRAFT"
+    assert sorted(os.listdir(output_dir)) == [
+        "start_year=2020",
+        "start_year=2021",
+        "start_year=2022",
+    ]
+    for year in [2020, 2021, 2022]:
+        partition_path = output_dir / f"start_year={year}"
+        files = sorted(partition_path.iterdir())
+        assert len(files) == 3
+        assert (
+            sum(parquet.ParquetFile(file).metadata.num_rows for file in files)
+            == 1000
+        )
+        for file in files:
+            metadata = parquet.ParquetFile(file).metadata
+            assert metadata.num_rows <= 400
+            for row_group in range(metadata.num_row_groups):
+                assert metadata.row_group(row_group).num_rows <= 200
+    assert len(pyarrow.parquet.read_table(output_dir)) == TABLE_SIZE  # type: ignore
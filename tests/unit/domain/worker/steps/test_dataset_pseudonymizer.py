@@ -5,10 +5,14 @@ from pathlib import Path
 
 import pyarrow
 import pytest
+from microdata_tools.validation.model.metadata import UnitIdType
 from pyarrow import dataset, parquet
 
 from job_executor.adapter import pseudonym_service
 from job_executor.adapter.fs.models.metadata import Metadata
+from job_executor.adapter.fs.pseudonym_cache_directory import (
+    PseudonymCacheDirectory,
+)
 from job_executor.common.exceptions import BuilderStepError
 from job_executor.domain.worker.steps import dataset_pseudonymizer
 
@@ -261,7 +265,201 @@ def test_pseudonymizer_start_year(mocker):
     )
 
 
-def test_pseudonymizer_adapter_failure():
+def test_pseudonymizer_in_batches(mocker):
+    pseudonymize = mocker.patch.object(
+        pseudonym_service, "pseudonymize", return_value=PSEUDONYM_DICT
+    )
+    pseudonymized_output_file = dataset_pseudonymizer.run(
+        INPUT_PARQUET_PATH_START_YEAR,
+        PSEUDONYMIZE_UNIT_ID_AND_VALUE_METADATA,
+        JOB_ID,
+        batch_size=100,
+    )
+    output_path = WORKING_DIR / pseudonymized_output_file
+    actual_table = dataset.dataset(output_path).to_table()
+    assert actual_table.num_rows == TABLE_SIZE
+    assert actual_table["unit_id"].to_pylist() == UNIT_ID_PSEUDONYMIZED
+    assert actual_table["value"].to_pylist() == UNIT_ID_PSEUDONYMIZED
+    assert actual_table.column_names == [
+        "unit_id",
+        "value",
+        "start_epoch_days",
+        "stop_epoch_days",
+        "start_year",
+    ]
+    # Every batch is written as its own row group
+    assert parquet.ParquetFile(output_path).num_row_groups == 10
+    pseudonymize.assert_called_once()
+    assert sorted(pseudonymize.call_args.args[0]) == sorted(UNIT_ID_INPUT)
+
+
+def test_pseudonymizer_partitioned_output(mocker):
+    mocker.patch.object(
+        pseudonym_service, "pseudonymize", return_value=PSEUDONYM_DICT
+    )
+    output_path = WORKING_DIR / "input__DRAFT"
+    assert (
+        dataset_pseudonymizer.run(
+            INPUT_PARQUET_PATH_START_YEAR,
+            METADATA,
+            JOB_ID,
+            batch_size=300,
+            output_path=output_path,
+            partitioned=True,
+        )
+        == "input__DRAFT"
+    )
+    assert os.listdir(output_path) == ["start_year=2020"]
+    actual_table = parquet.read_table(output_path / "start_year=2020")
+    assert actual_table.column_names == [
+        "unit_id",
+        "value",
+        "start_epoch_days",
+        "stop_epoch_days",
+    ]
+    _validate_content(actual_table, EXPECTED_TABLE)
+    assert not os.path.exists(WORKING_DIR / OUTPUT_PARQUET_FILE_START_YEAR)
+
+
+def test_pseudonymizer_partitioned_output_missing_start_year(mocker):
+    mocker.patch.object(
+        pseudonym_service, "pseudonymize", return_value=PSEUDONYM_DICT
+    )
+    with pytest.raises(BuilderStepError):
+        dataset_pseudonymizer.run(
+            INPUT_PARQUET_PATH,
+            METADATA,
+            JOB_ID,
+            output_path=WORKING_DIR / "input__DRAFT",
+            partitioned=True,
+        )
+
+
+def test_pseudonymizer_shares_request_for_same_unit_type(mocker):
+    relation_table = INPUT_TABLE.set_column(
+        1,
+        "value",
+        pyarrow.array([f"i{count + 500}" for count in range(TABLE_SIZE)]),
+    )
+    parquet.write_table(relation_table, INPUT_PARQUET_PATH)
+    pseudonymize = mocker.patch.object(
+        pseudonym_service,
+        "pseudonymize",
+        return_value={f"i{count}": count for count in range(TABLE_SIZE + 500)},
+    )
+    pseudonymized_output_file = dataset_pseudonymizer.run(
+        INPUT_PARQUET_PATH,
+        PSEUDONYMIZE_UNIT_ID_AND_VALUE_METADATA,
+        JOB_ID,
+        batch_size=300,
+    )
+    actual_table = dataset.dataset(
+        WORKING_DIR / pseudonymized_output_file
+    ).to_table()
+    assert actual_table["unit_id"].to_pylist() == UNIT_ID_PSEUDONYMIZED
+    assert actual_table["value"].to_pylist() == [
+        count + 500 for count in range(TABLE_SIZE)
+    ]
+    pseudonymize.assert_called_once()
+    assert sorted(pseudonymize.call_args.args[0]) == sorted(
+        f"i{count}" for count in range(TABLE_SIZE + 500)
+    )
+
+
+def test_pseudonymizer_with_cache(mocker):
+    pseudonymize = mocker.patch.object(
+        pseudonym_service, "pseudonymize", return_value=PSEUDONYM_DICT
+    )
+    pseudonym_cache = PseudonymCacheDirectory(
+        WORKING_DIR / "pseudonym_cache" / "TEST_DATASTORE", 1024**3
+    )
+    pseudonym_cache.store(
+        UnitIdType.FNR,
+        pyarrow.array(UNIT_ID_INPUT[:600]),
+        pyarrow.array(UNIT_ID_PSEUDONYMIZED[:600]),
+    )
+    dataset_pseudonymizer.run(
+        INPUT_PARQUET_PATH,
+        METADATA,
+        JOB_ID,
+        pseudonym_cache=pseudonym_cache,
+    )
+    actual_table = dataset.dataset(
+        WORKING_DIR / OUTPUT_PARQUET_FILE_NAME
+    ).to_table()
+    _validate_content(actual_table, EXPECTED_TABLE)
+    assert sorted(pseudonymize.call_args.args[0]) == sorted(UNIT_ID_INPUT[600:])
+    segments_dir = pseudonym_cache.path_with_rdn / "FNR"
+    assert len(os.listdir(segments_dir)) == 2
+
+    # Every identifier is cached after the first run
+    pseudonymize.reset_mock()
+    dataset_pseudonymizer.run(
+        INPUT_PARQUET_PATH,
+        METADATA,
+        JOB_ID,
+        pseudonym_cache=pseudonym_cache,
+    )
+    actual_table = dataset.dataset(
+        WORKING_DIR / OUTPUT_PARQUET_FILE_NAME
+    ).to_table()
+    _validate_content(actual_table, EXPECTED_TABLE)
+    assert pseudonymize.call_args.args[0] == []
+    # Nothing was missing, so nothing was added to the cache
+    assert len(os.listdir(segments_dir)) == 2
+
+
+def test_collect_unique_identifiers_across_batches():
+    parquet.write_table(
+        pyarrow.Table.from_pydict({"unit_id": ["a", "b", "a", "c", "b", "a"]}),
+        WORKING_DIR / "duplicates.parquet",
+    )
+    unique_identifiers = dataset_pseudonymizer._collect_unique_identifiers(
+        dataset.dataset(WORKING_DIR / "duplicates.parquet"), ["unit_id"], 2
+    )
+    assert sorted(unique_identifiers.to_pylist()) == ["a", "b", "c"]
+
+
+def test_collect_unique_identifiers_merges_batches():
+    unit_ids = [f"i{number % 7}" for number in range(50)]
+    parquet.write_table(
+        pyarrow.Table.from_pydict({"unit_id": unit_ids}),
+        WORKING_DIR / "duplicates.parquet",
+    )
+    unique_identifiers = dataset_pseudonymizer._collect_unique_identifiers(
+        dataset.dataset(WORKING_DIR / "duplicates.parquet"), ["unit_id"], 1
+    )
+    assert sorted(unique_identifiers.to_pylist()) == sorted(set(unit_ids))
+
+
+def test_collect_unique_identifiers_from_several_columns():
+    parquet.write_table(
+        pyarrow.Table.from_pydict(
+            {"unit_id": ["a", "b", "a", "c"], "value": ["d", "a", "e", "d"]}
+        ),
+        WORKING_DIR / "duplicates.parquet",
+    )
+    unique_identifiers = dataset_pseudonymizer._collect_unique_identifiers(
+        dataset.dataset(WORKING_DIR / "duplicates.parquet"),
+        ["unit_id", "value"],
+        3,
+    )
+    assert sorted(unique_identifiers.to_pylist()) == ["a", "b", "c", "d", "e"]
+
+
+def test_map_to_pseudonyms_repeated_identifiers():
+    identifiers = pyarrow.chunked_array([["i2", "i0", "i2"], ["i1", "i0"]])
+    unique_identifiers = pyarrow.array(["i2", "i0", "i1"])
+    pseudonyms = pyarrow.array([2, 0, 1], type=pyarrow.int64())
+    actual = dataset_pseudonymizer._map_to_pseudonyms(
+        identifiers, unique_identifiers, pseudonyms
+    )
+    assert actual.type == pyarrow.int64()
+    assert actual.to_pylist() == [2, 0, 2, 1, 0]
+
+
+def test_pseudonymizer_adapter_failure(mocker):
+    mocker.patch.object(pseudonym_service, "BACKOFF_FACTOR", 0)
     with pytest.raises(BuilderStepError) as e:
         dataset_pseudonymizer.run(INPUT_PARQUET_PATH, METADATA, JOB_ID)
     assert "Failed to pseudonymize dataset" == str(e.value)
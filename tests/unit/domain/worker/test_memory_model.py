@@ -0,0 +1,150 @@
+from pathlib import Path
+
+import pytest
+
+from job_executor.domain.worker.memory_model import (
+    MAX_OBSERVATIONS_PER_KEY,
+    JobFeatures,
+    WorkerMemoryModel,
+)
+
+KB = 1024
+MB = 1024**2
+GB = 1024**3
+
+
+def test_job_features_keys():
+    assert JobFeatures("ADD", GB, 5, "STATUS").keys == [
+        "ADD/STATUS/3",
+        "ADD/STATUS",
+        "ADD",
+    ]
+    assert JobFeatures("ADD", GB, None, "STATUS").keys == [
+        "ADD/STATUS",
+        "ADD",
+    ]
+    assert JobFeatures("PATCH_METADATA", GB).keys == ["PATCH_METADATA"]
+
+
+def test_predict_without_observations():
+    features = JobFeatures("ADD", GB, 4, "FIXED")
+    assert WorkerMemoryModel().predict(features) == GB
+    assert WorkerMemoryModel(default_expansion=5).predict(features) == 5 * GB
+
+
+def test_predict_from_most_specific_observations():
+    memory_model = WorkerMemoryModel()
+    memory_model.record_peak(
+        "1", JobFeatures("PATCH_METADATA", MB), MB, 200 * MB
+    )
+    memory_model.record_peak(
+        "2", JobFeatures("ADD", GB, 4, "STATUS"), GB, 200 * MB + 12 * GB
+    )
+    memory_model.record_peak(
+        "3", JobFeatures("ADD", 10 * MB, 2, "FIXED"), 10 * MB, 200 * MB
+    )
+    memory_model.record_peak(
+        "4", JobFeatures("ADD", GB, 2, "FIXED"), GB, 200 * MB + 4 * GB
+    )
+    memory_model.record_peak(
+        "5", JobFeatures("ADD", GB, 2, "FIXED"), GB, 200 * MB + 3 * GB
+    )
+    # The highest expansion above the smaller jobs of the same operation,
+    # temporality and columns
+    assert (
+        memory_model.predict(JobFeatures("ADD", 2 * GB, 3, "FIXED"))
+        == 200 * MB + 8 * GB
+    )
+    # Falls back to the same operation and temporality
+    assert (
+        memory_model.predict(JobFeatures("ADD", GB, 40, "STATUS"))
+        == 200 * MB + 12 * GB
+    )
+    # Falls back to the same operation
+    assert (
+        memory_model.predict(JobFeatures("ADD", GB, 2, "EVENT"))
+        == 200 * MB + 12 * GB
+    )
+    # The base is not shared between operations
+    assert memory_model.predict(JobFeatures("CHANGE", GB)) == GB
+    assert (
+        memory_model.predict(JobFeatures("PATCH_METADATA", GB)) == 199 * MB + GB
+    )
+
+
+def test_predict_fits_base_and_expansion():
+    memory_model = WorkerMemoryModel()
+    for job_id, input_bytes in enumerate([GB, 2 * GB, 4 * GB]):
+        memory_model.record_peak(
+            str(job_id),
+            JobFeatures("ADD", input_bytes),
+            input_bytes,
+            256 * MB + 3 * input_bytes,
+        )
+    assert memory_model.predict(JobFeatures("ADD", 8 * GB)) == pytest.approx(
+        256 * MB + 24 * GB
+    )
+    # A small job with a high peak raises the base, not the expansion
+    memory_model.record_peak("3", JobFeatures("ADD", 10 * KB), KB, 306 * MB)
+    assert memory_model.predict(JobFeatures("ADD", 8 * GB)) == pytest.approx(
+        306 * MB - 30 * KB + 24 * GB
+    )
+    # Never lower than the input
+    assert memory_model.predict(JobFeatures("PATCH_METADATA", GB)) == GB
+
+
+def test_lower_bounds_raise_the_expansion():
+    memory_model = WorkerMemoryModel()
+    memory_model.record_peak("1", JobFeatures("ADD", 10 * MB), MB, 256 * MB)
+    memory_model.record_peak("2", JobFeatures("ADD", GB), GB, 256 * MB + GB)
+    assert memory_model.predict(JobFeatures("ADD", 4 * GB)) == 256 * MB + (
+        4 * GB
+    )
+    # Killed early, so the peak is below the prediction and does not
+    # lower the base
+    memory_model.record_peak(
+        "3", JobFeatures("ADD", 10 * MB), MB, 50 * MB, lower_bound=True
+    )
+    assert memory_model.predict(JobFeatures("ADD", 10 * MB)) == 256 * MB + (
+        10 * MB
+    )
+    # Killed above the prediction
+    memory_model.record_peak(
+        "4", JobFeatures("ADD", 4 * GB), GB, 256 * MB + 8 * GB, lower_bound=True
+    )
+    assert memory_model.predict(JobFeatures("ADD", 4 * GB)) == 256 * MB + (
+        8 * GB
+    )
+    assert memory_model.predict(JobFeatures("ADD", 10 * MB)) == 256 * MB + (
+        20 * MB
+    )
+
+
+def test_observations_are_saved(tmp_path: Path):
+    model_path = tmp_path / "memory_model.json"
+    memory_model = WorkerMemoryModel(model_path)
+    features = JobFeatures("ADD", GB, 2, "FIXED")
+    for job_number in range(MAX_OBSERVATIONS_PER_KEY + 5):
+        memory_model.record_peak(
+            str(job_number), features, 2 * GB, (job_number + 1) * GB
+        )
+    saved_model = WorkerMemoryModel(model_path)
+    assert saved_model.state == memory_model.state
+    observations = saved_model.state.observations["ADD/FIXED/2"]
+    assert len(observations) == MAX_OBSERVATIONS_PER_KEY
+    assert observations[-1].job_id == str(MAX_OBSERVATIONS_PER_KEY + 4)
+    assert observations[-1].predicted_peak_bytes == 2 * GB
+    assert (
+        observations[-1].peak_rss_bytes == (MAX_OBSERVATIONS_PER_KEY + 5) * GB
+    )
+
+
+def test_unreadable_model_is_ignored(tmp_path: Path):
+    model_path = tmp_path / "memory_model.json"
+    model_path.write_text('{"observations": {"ADD": [{"jobId"')
+    memory_model = WorkerMemoryModel(model_path)
+    assert memory_model.state.observations == {}
+    memory_model.record_peak("1", JobFeatures("ADD", GB), GB, 2 * GB)
+    assert WorkerMemoryModel(model_path).predict(JobFeatures("ADD", GB)) == (
+        2 * GB
+    )
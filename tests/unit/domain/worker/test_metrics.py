@@ -0,0 +1,43 @@
+import json
+import logging
+
+import pytest
+
+from job_executor.adapter import pseudonym_service
+from job_executor.config.log import MicrodataJSONFormatter
+from job_executor.domain.worker.metrics import WorkerMetrics
+
+
+def test_measure_step(mocker, caplog):
+    mocker.patch.object(
+        pseudonym_service, "get_request_count", side_effect=[3, 5]
+    )
+    metrics = WorkerMetrics(job_id="123", dataset_name="DATASET")
+    with caplog.at_level(logging.INFO):
+        with metrics.measure("pseudonymize") as step_metrics:
+            data = b"x" * (32 * 1024 * 1024)
+            step_metrics.row_count = len(data)
+    del data
+    [step] = metrics.steps
+    assert step.step == "pseudonymize"
+    assert step.wall_seconds > 0
+    assert step.cpu_seconds >= 0
+    assert step.peak_rss_bytes >= 32 * 1024 * 1024
+    assert step.row_count == 32 * 1024 * 1024
+    assert step.pseudonym_service_requests == 2
+    assert metrics.peak_rss_bytes == step.peak_rss_bytes
+
+    [record] = caplog.records
+    assert record.metrics["step"] == "pseudonymize"
+    assert record.metrics["pseudonymServiceRequests"] == 2
+    log = json.loads(MicrodataJSONFormatter().format(record))
+    assert log["metrics"] == record.metrics
+
+
+def test_measure_failing_step():
+    metrics = WorkerMetrics(job_id="123", dataset_name="DATASET")
+    with pytest.raises(ValueError):
+        with metrics.measure("validate"):
+            raise ValueError("invalid")
+    assert [step.step for step in metrics.steps] == ["validate"]
+    assert metrics.model_dump(by_alias=True)["steps"][0]["step"] == "validate"
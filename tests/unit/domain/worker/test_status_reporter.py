@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from job_executor.adapter.datastore_api.models import JobStatus
+from job_executor.common.exceptions import HttpResponseError
+from job_executor.domain.worker.status_reporter import StatusReporter
+
+JOB_ID = "123"
+
+
+def _blocking_update_job_status(mocker):
+    """
+    Mocks update_job_status so that the first call blocks until the
+    returned release event is set. Waits for the first call when the
+    returned in_flight event is waited on.
+    """
+    in_flight = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def update_job_status(job_id, status, log=None):
+        if not in_flight.is_set():
+            in_flight.set()
+            release.wait(timeout=5)
+        calls.append((status, log))
+
+    mocker.patch(
+        "job_executor.adapter.datastore_api.update_job_status",
+        side_effect=update_job_status,
+    )
+    return in_flight, release, calls
+
+
+def test_coalesces_obsolete_statuses(mocker):
+    in_flight, release, calls = _blocking_update_job_status(mocker)
+    reporter = StatusReporter(JOB_ID)
+    reporter.update_status(JobStatus.DECRYPTING)
+    in_flight.wait(timeout=5)
+    reporter.update_status(JobStatus.VALIDATING)
+    reporter.update_status(JobStatus.TRANSFORMING, log="transforming")
+    reporter.update_status(JobStatus.PSEUDONYMIZING)
+    reporter.update_status(JobStatus.PARTITIONING)
+    reporter.update_status(JobStatus.BUILT)
+    release.set()
+    reporter.close()
+    assert calls == [
+        (JobStatus.DECRYPTING, None),
+        (JobStatus.TRANSFORMING, "transforming"),
+        (JobStatus.BUILT, None),
+    ]
+
+
+def test_keeps_order_of_descriptions(mocker):
+    in_flight, release, calls = _blocking_update_job_status(mocker)
+    update_description = mocker.patch(
+        "job_executor.adapter.datastore_api.update_description",
+        side_effect=lambda job_id, description: calls.append(description),
+    )
+    reporter = StatusReporter(JOB_ID)
+    reporter.update_status(JobStatus.DECRYPTING)
+    in_flight.wait(timeout=5)
+    reporter.update_status(JobStatus.VALIDATING)
+    reporter.update_description("description")
+    reporter.update_status(JobStatus.TRANSFORMING)
+    release.set()
+    reporter.close()
+    update_description.assert_called_once_with(JOB_ID, "description")
+    assert calls == [
+        (JobStatus.DECRYPTING, None),
+        (JobStatus.VALIDATING, None),
+        "description",
+        (JobStatus.TRANSFORMING, None),
+    ]
+
+
+def test_surfaces_delivery_failures(mocker):
+    update_job_status = mocker.patch(
+        "job_executor.adapter.datastore_api.update_job_status",
+        side_effect=HttpResponseError("503: unavailable"),
+    )
+    reporter = StatusReporter(JOB_ID)
+    reporter.update_status(JobStatus.DECRYPTING)
+    # Wait for the failed delivery before reporting the next status
+    while update_job_status.call_count == 0:
+        threading.Event().wait(0.01)
+    with pytest.raises(HttpResponseError):
+        reporter.update_status(JobStatus.VALIDATING)
+    reporter.update_status(JobStatus.FAILED, log="failed")
+    with pytest.raises(HttpResponseError, match="503"):
+        reporter.close()
+    assert update_job_status.call_args.args == (JOB_ID, JobStatus.FAILED)